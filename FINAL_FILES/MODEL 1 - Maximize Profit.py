@@ -1,125 +1,79 @@
-# Importing required libraries
-from docplex.mp.model import Model
-
-# Initialize the CPLEX model
-mdl = Model("ABSA_Oil")
-
-# Data structures
-# Cost of each crude oil and the cost of processing them
-costs = {
-    "processing": 19,
-    "crude": {"Azeri BTC": 57, "Poseidon Streams": 48, "Laguna": 35, "Snøhvit Condensate": 71},
-    }
-
-# Selling Prices of each refined product
-prices = {
-    "Gasoline-87": 90.45,
-    "Gasoline-89": 93.66,
-    "Gasoline-92": 95.50,
-    "Jet fuel": 61.25,
-    "Diesel fuel": 101.64,
-    "Heating oil": 66.36
-    }
-
-# Capacities of each refineries
-capacities = {
-    "UK": 735000,
-    "Spain": 625000,
-    "Poland": 540000,
-    "Greece": 400000,
-    }
-
-# The monthly supply quota for each Crude oil
-monthly_supply_quotas = {
-    "Azeri BTC": 645000,        
-    "Poseidon Streams": 575000, 
-    "Laguna": 550000,           
-    "Snøhvit Condensate": 645000 
-    }
-
-# The minimum number of barrels that each refinery should meet for each refined product
-demands = {
-    "Gasoline-87": {"Greece": 35000, "Poland": 22000, "Spain": 76000, "UK": 98000},
-    "Gasoline-89": {"Greece": 45000, "Poland": 38000, "Spain": 103000, "UK": 52000},
-    "Gasoline-92": {"Greece": 50000, "Poland": 60000, "Spain": 83000, "UK": 223000},
-    "Jet fuel": {"Greece": 20000, "Poland": 25000, "Spain": 47000, "UK": 127000},
-    "Diesel fuel": {"Greece": 75000, "Poland": 35000, "Spain": 125000, "UK": 87000},
-    "Heating oil": {"Greece": 25000, "Poland": 205000, "Spain": 30000, "UK": 13000}
-    }
-
-#.....
-
-# Decision Variables
-purchase_vars = mdl.continuous_var_dict(costs["crude"].keys(), name="purchase")
-production_vars = mdl.continuous_var_matrix(prices.keys(), capacities.keys(), name="produce")
-def discounted_revenue(production, demand, price):
-    # Calculate excess production
-    excess = mdl.max(production - demand, 0)
-    # Calculate revenue for production up to demand
-    regular_revenue = mdl.min(production, demand) * price
-    # Calculate revenue for excess production at a discounted rate
-    excess_revenue = excess * price * 0.93
-    return regular_revenue + excess_revenue
-
-# Objective Function: Maximize Profit
-revenue = mdl.sum(discounted_revenue(production_vars[prod, ref], demands[prod].get(ref, 0), prices[prod])
-                  for prod in prices for ref in capacities)
-crude_cost = mdl.sum(costs["crude"][crude] * purchase_vars[crude] for crude in costs["crude"])
-production_cost = mdl.sum(costs["processing"] * production_vars[prod, ref] for prod in prices for ref in capacities)
-mdl.maximize(revenue - crude_cost - production_cost)
-
-# Constraints
-# 1. Production meets or exceeds demand in each region for each product
-for prod, regions in demands.items():
-    for region, demand in regions.items():
-        mdl.add_constraint(production_vars[prod, region] >= demand)
-
-# 2. Refinery capacities are not exceeded
-for ref, capacity in capacities.items():
-    mdl.add_constraint(mdl.sum(production_vars[prod, ref] for prod in prices) <= capacity)
-
-# 3. Crude oil purchases and usage with a 1:1 ratio
-for crude in costs["crude"]:
-    total_crude_usage = mdl.sum(production_vars[prod, ref] for prod in prices for ref in capacities) / len(costs["crude"])
-    mdl.add_constraint(purchase_vars[crude] == total_crude_usage)
-
-# 4. Respecting the monthly supply quota for each crude type
-for crude, quota in monthly_supply_quotas.items():
-    mdl.add_constraint(purchase_vars[crude] <= quota)
-
-# Solve the model
-solution = mdl.solve()
-
-# Print the solution
-if solution:
-    print("The objective value (Profit) is: ", mdl.objective_value)
-
-    # Calculate and print Revenue
-    revenue_value = sum(prices[prod] * production_vars[prod, ref].solution_value for prod in prices for ref in capacities)
-    print("Total Revenue: ", revenue_value)
-
-    # Calculate and print Crude Cost
-    crude_cost_value = sum(costs["crude"][crude] * purchase_vars[crude].solution_value for crude in costs["crude"])
-    print("Total Crude Cost: ", crude_cost_value)
-
-    # Calculate and print Production Cost
-    production_cost_value = sum(costs["processing"] * production_vars[prod, ref].solution_value for prod in prices for ref in capacities)
-    print("Total Production Cost: ", production_cost_value)
-
-    # Print decision variable values
-    for crude in costs["crude"]:
-        print(f"Purchased {purchase_vars[crude].solution_value} barrels of {crude} crude oil.")
-    for prod in prices:
-        for ref in capacities:
-            print(f"Produced {production_vars[prod, ref].solution_value} barrels of {prod} in {ref} refinery.")
-    # Print the total barrels produced in each refinery and the amount of crude transported from each port
-    for ref in capacities:
-        total_barrels_in_refinery = sum(production_vars[prod, ref].solution_value for prod in prices)
-        #print(f"Total barrels produced in {ref} refinery: {total_barrels_in_refinery}")
-
-        # Calculate and print the amount of crude oil transported from each port to this refinery
-        crude_oil_per_port = total_barrels_in_refinery / 4
-        print(f"Crude oil transported from each port to {ref} refinery: {crude_oil_per_port}")
-
-else:
-    print("No solution found")
\ No newline at end of file
+# Importing required libraries
+from network_data import PROFIT_REPORT_REFINERIES, load_network
+from model_cache import default_cache
+from profit_model import build_profit_lp, solve_docplex, solve_profit_lp
+from telemetry import RunTelemetry
+
+# Telemetry: phase timings and model counters of this run, written as one JSON line
+# to the file named by TELEMETRY_LOG (nothing is written when it is unset); see
+# telemetry.py for the cProfile / tracemalloc switches. The record is written when
+# the block ends, with the error filled in if the run fails.
+with RunTelemetry("MODEL 1 - Maximize Profit", sense="max") as run:
+    # Data structures
+    # Costs, prices, capacities, quotas and demands are loaded once as arrays
+    with run.phase("load"):
+        net = load_network()
+
+    # Solver: "docplex" builds the original docplex model (needs CPLEX). Any other
+    # value solves the same model in matrix form with a backend from solvers.py:
+    # "highs" (SciPy, no licence needed), "simplex" (built in), "cplex" or "auto"
+    # (HiGHS, else the built-in simplex; CPLEX only when named). None reads the
+    # SOLVER_BACKEND environment variable.
+    SOLVER = None
+
+    # Revenue formulation for SOLVER = "docplex": "split" keeps the model a pure LP,
+    # "minmax" is the original mdl.max/mdl.min form that docplex solves as a MIP. Both
+    # give the same optimum.
+    REVENUE_FORM = "split"
+
+    # Model cache: with MODEL_CACHE_DIR set, built models are kept there (keyed by a
+    # hash of the data) and later runs on the same data skip the build; see
+    # model_cache.py. None when MODEL_CACHE_DIR is unset.
+    CACHE = default_cache()
+
+    # Build and solve the model: decision variables, objective and constraints 1-4
+    # are defined in profit_model.build_docplex_model() / build_profit_lp()
+    if SOLVER == "docplex":
+        solution = solve_docplex(net, sense="max", revenue_form=REVENUE_FORM, telemetry=run, cache=CACHE)
+    else:
+        with run.phase("build"):
+            lp = build_profit_lp(net, sense="max", cache=CACHE)
+        solution = solve_profit_lp(lp, backend=SOLVER, telemetry=run)
+
+    with run.phase("report"):
+        # Print the solution
+        if solution:
+            print("The objective value (Profit) is: ", solution.objective)
+
+            purchased = solution.purchase
+            produced = solution.production
+
+            # Calculate and print Revenue
+            revenue_value = float(net.price @ produced.sum(axis=1))
+            print("Total Revenue: ", revenue_value)
+
+            # Calculate and print Crude Cost
+            crude_cost_value = float(net.crude_cost @ purchased)
+            print("Total Crude Cost: ", crude_cost_value)
+
+            # Calculate and print Production Cost
+            production_cost_value = float(net.processing_cost * produced.sum())
+            print("Total Production Cost: ", production_cost_value)
+
+            # Print decision variable values
+            for c, crude in enumerate(net.crudes):
+                print(f"Purchased {purchased[c]} barrels of {crude} crude oil.")
+            for p, prod in enumerate(net.products):
+                for ref in PROFIT_REPORT_REFINERIES:
+                    print(f"Produced {produced[p, net.refinery_index[ref]]} barrels of {prod} in {ref} refinery.")
+            # Print the total barrels produced in each refinery and the amount of crude transported from each port
+            for ref in PROFIT_REPORT_REFINERIES:
+                r = net.refinery_index[ref]
+                total_barrels_in_refinery = produced[:, r].sum()
+
+                # Calculate and print the amount of crude oil transported from each port to this refinery
+                crude_oil_per_port = total_barrels_in_refinery / len(net.crudes)
+                print(f"Crude oil transported from each port to {ref} refinery: {crude_oil_per_port}")
+
+        else:
+            print("No solution found")
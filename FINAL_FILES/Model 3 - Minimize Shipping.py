@@ -1,292 +1,74 @@
-# Importing required libraries
-import cplex
-import sys
-import itertools
-from cplex.exceptions import CplexError
-from cplex.exceptions import CplexError, CplexSolverError
-
-
-# Crude oil costs per barrel
-crude_oil_costs_per_barrel = {
-    "Azeri BTC": 57,  
-    "Poseidon Streams": 48,  
-    "Laguna": 35,  
-    "Snøhvit Condensate": 71  
-}
-
-# Data for transportation
-tanker_rates = {
-    'GPT': {
-        'Gudrun': 13000, 'Ingeborg': 22000, 'Valborg': 20000, 'Estrid': 15000, 'Rose': 14000,
-        'Cork Cat': 23000, 'Guam': 21000, 'Chance': 16000
-    },
-    'MRT': {
-        'Ismine': 25000, 'Signe': 27000, 'Venture': 23000, 'Pretty World': 25000, 'Viking': 26000,
-        'Limerick': 28000, 'York Gulls': 25000, 'Lancaster': 26000
-    },
-    'LR1': {
-        'PTI Volans': 30000, 'Trinity': 32000, 'Galway': 31000, 'Glasgow': 33000
-    },
-    'LR2': {
-        'Garonne': 41000, 'Torm Rhone': 44000, 'Thorpe': 51000, 'Venus': 56000
-    }
-}
-
-tankers_capicity_in_barrels = {'GPT': {'Gudrun': 84500,
-  'Ingeborg': 205334,
-  'Valborg': 173224,
-  'Estrid': 141115,
-  'Rose': 101399,
-  'Cork Cat': 211249,
-  'Guam': 188857,
-  'Chance': 146523},
- 'MRT': {'Ismine': 270400,
-  'Signe': 358279,
-  'Venture': 226459,
-  'Pretty World': 316452,
-  'Viking': 287300,
-  'Limerick': 377714,
-  'York Gulls': 242092,
-  'Lancaster': 332211},
- 'LR1': {'PTI Volans': 515449,
-  'Trinity': 574600,
-  'Galway': 557700,
-  'Glasgow': 650650},
- 'LR2': {'Garonne': 929499,
-  'Torm Rhone': 1153425,
-  'Thorpe': 1309750,
-  'Venus': 1352000}}
-
-port_charges = {
-    'Ceyhan': {
-        'GPT': 109000, 'MRT': 112000, 'LR1': 124000, 'LR2': 135000
-    },
-    'Houma': {
-        'GPT': 111000, 'MRT': 114000, 'LR1': 138000, 'LR2': 159000
-    },
-    'Puerto Miranda': {
-        'GPT': 135000, 'MRT': 147000, 'LR1': 158000, 'LR2': 169000  
-    },
-    'Melkoya': {
-        'GPT': 136000, 'MRT': 147000, 'LR1': 156000, 'LR2': 177000
-    }
-}
-
-# Cost per hour
-fuel_costs = {
-    "GPT": 2500,
-    "MRT": 2750,
-    'LR1': 3000, 
-    'LR2': 3250,
-}
-# Times in days from port to refinery
-shipping_times_in_days = {
-    'Ceyhan': {'Greece': 2, 'Poland': 15, 'Spain': 8, 'UK': 12},
-    'Houma': {'Greece': 20, 'Poland': 18, 'Spain': 16, 'UK': 15},
-    'Puerto Miranda': {'Greece': 19, 'Poland': 20, 'Spain': 14, 'UK': 15},
-    'Melkoya': {'Greece': 11, 'Poland': 3, 'Spain': 4, 'UK': 3}
-}
-# Mapping from crude oil types to ports
-crude_to_port = {
-    "Azeri BTC": "Ceyhan",
-    "Poseidon Streams": "Houma",
-    "Laguna": "Puerto Miranda",
-    "Snøhvit Condensate": "Melkoya"
-}
-
-crude_to_tanker_type = {
-    "Azeri BTC": "GPT",
-    "Poseidon Streams": "MRT",
-    "Laguna": "LR1",
-    "Snøhvit Condensate": "LR2"
-}
-
-# Quantities per destination
-quantities_per_destination = {
-    "UK": 183750,
-    "Spain": 156250,
-    "Poland": 135000,
-    "Greece": 75000
-}
-
-# Invert the crude_to_tanker_type dictionary
-tanker_type_to_crude = {v: k for k, v in crude_to_tanker_type.items()}
-
-# Create a list of ports, tankers, and destinations
-ports = list(port_charges.keys())
-tankers = [tanker for sublist in tankers_capicity_in_barrels.values() for tanker in sublist]
-destinations = ["Greece", "Poland", "Spain", "UK"]
-
-# Correct instantiation of a Cplex object
-model = cplex.Cplex()
-
-# Variables: binary decision for each port, tanker, destination
-# Format: "Port_Tanker_Destination"
-variables = ["{}_{}_{}".format(port, tanker, destination) 
-             for port, tanker, destination in itertools.product(ports, tankers, destinations)]
-
-# Adding variables to the model
-model.variables.add(names=variables, types=["B"] * len(variables))
-
-# Function to create consistent variable names 
-def create_var_name(port, tanker, destination):
-    return f"{port}_{tanker}_{destination}"
-
-# The objective function calculation
-objective = []
-for tanker_type in tankers_capicity_in_barrels:
-    crude_type = tanker_type_to_crude[tanker_type]  # Get the crude type for this tanker type
-    port = crude_to_port[crude_type]  # Get the port for this crude type
-    for tanker in tankers_capicity_in_barrels[tanker_type]:
-        for destination in destinations:
-            quantity = quantities_per_destination[destination]
-            var_name = create_var_name(port, tanker, destination)
-            rate = tanker_rates[tanker_type].get(tanker, 0)
-            port_charge = port_charges[port].get(tanker_type, 0)
-            fuel_cost_per_hour = fuel_costs[tanker_type]
-            shipping_days = shipping_times_in_days[port].get(destination, 0)
-            fuel_cost = fuel_cost_per_hour * shipping_days * 24
-            crude_oil_cost = crude_oil_costs_per_barrel[crude_type] * quantity
-            total_cost = rate + port_charge + fuel_cost + crude_oil_cost
-            objective.append((var_name, total_cost))
-
-model.objective.set_sense(model.objective.sense.minimize)
-model.objective.set_linear(objective)
-
-# Creating a dictionary for costs and capacities
-costs_and_capacities = {}
-for tanker_type in tankers_capicity_in_barrels:
-    for tanker in tankers_capicity_in_barrels[tanker_type]:
-        tanker_capacity = tankers_capicity_in_barrels[tanker_type][tanker]
-        for port in ports:
-            for destination in destinations:
-                var_name = "{}_{}_{}".format(port, tanker, destination)
-                rate = tanker_rates[tanker_type].get(tanker, 0)
-                port_charge = port_charges[port].get(tanker_type, 0)
-                fuel_cost_per_hour = fuel_costs[tanker_type]
-                shipping_days = shipping_times_in_days[port].get(destination, 0)
-                fuel_cost = fuel_cost_per_hour * shipping_days * 24
-                total_cost = rate + port_charge + fuel_cost
-                costs_and_capacities[var_name] = (total_cost, tanker_capacity)
-                
-# Alocating boats as per rates and capacity
-allocated_boats = set()
-sorted_boats_by_route = {}
-for port in ports:
-    for destination in destinations:
-        required_quantity = quantities_per_destination[destination]
-
-        # Filter boats that are not already allocated and have sufficient capacity for the required quantity
-        eligible_boats = [(var_name, cost) for var_name, (cost, capacity) in costs_and_capacities.items()
-                          if var_name.split('_')[1] not in allocated_boats and capacity >= required_quantity and var_name.startswith(port + "_")]
-        
-        if eligible_boats:
-            # Sort by cost and select the cheapest boat
-            sorted_boats = sorted(eligible_boats, key=lambda x: x[1])
-            cheapest_boat = sorted_boats[0][0]
-            sorted_boats_by_route[(port, destination)] = [cheapest_boat]
-
-            # Add the selected boat to the allocated set
-            allocated_boats.add(cheapest_boat.split('_')[1])
-        else:
-            # No eligible boats available for this route
-            sorted_boats_by_route[(port, destination)] = []
-
-# Constraint_1: Each boat can only be assigned to one route
-for tanker in tankers:
-    vars_for_tanker = [create_var_name(port, tanker, destination) for port in ports for destination in destinations]
-    model.linear_constraints.add(
-        lin_expr=[ [vars_for_tanker, [1] * len(vars_for_tanker)] ],
-        senses=["L"],
-        rhs=[1]
-    )
-
-# Constraint_2: Each tanker can only be assigned to one route
-for port in ports:
-    for destination in destinations:
-        quantity = quantities_per_destination[destination]
-        vars_for_port_destination = []
-
-        # Capacity coefficients for each variable
-        capacity_coefficients = []
-
-        for tanker in tankers:
-            var_name = create_var_name(port, tanker, destination)
-            vars_for_port_destination.append(var_name)
-
-            # Determine the tanker type based on the tanker's name
-            for tanker_type, tankers_list in tankers_capicity_in_barrels.items():
-                if tanker in tankers_list:
-                    # Get the capacity of the tanker
-                    capacity = tankers_capicity_in_barrels[tanker_type][tanker]
-                    break
-
-            capacity_coefficients.append(capacity)
-
-        # Adjust the right-hand side of the constraint to match the new quantity
-        model.linear_constraints.add(
-            lin_expr=[ [vars_for_port_destination, capacity_coefficients] ],
-            senses=["G"],  # Greater than or equal to, to ensure enough capacity
-            rhs=[quantity]
-        )
-
-# Additional Constraint: Each port-destination pair should have exactly one tanker assigned
-for port in ports:
-    for destination in destinations:
-        vars_for_port_destination = [create_var_name(port, tanker, destination) for tanker in tankers]
-        # Add constraint for each port-destination pair
-        model.linear_constraints.add(
-            lin_expr=[[vars_for_port_destination, [1] * len(vars_for_port_destination)]],
-            senses=["E"],  # "E" stands for equality
-            rhs=[1]
-        )
-
-
-# Solve the model
-try:
-    model.solve()
-    print("Model solved successfully.")
-except CplexError as exc:
-    print("Error solving model:", exc)
-    sys.exit(1)  # Exit if model couldn't be solved
-
-# Initialize total cost
-total_cost = 0
-
-# Retrieve and print the solution
-solution_values = model.solution.get_values()
-for var_name, value in zip(variables, solution_values):
-    if value > 0.5:  # If the variable is part of the solution
-        route_cost = costs_and_capacities[var_name][0]
-        total_cost += route_cost  # Add the cost of this route to the total cost
-        # print(f"{var_name} selected with a cost of {route_cost}")
-
-# Print the total cost
-print(f"Total cost of the solution: {total_cost}")
-
-# Check the solution status
-solution = model.solution
-if solution.is_primal_feasible():
-    print("Solution status = ", solution.get_status())
-    found_solution = False
-    for tanker_type in tankers_capicity_in_barrels:
-        for tanker in tankers_capicity_in_barrels[tanker_type]:
-            # Get the tanker type from the tanker name
-            crude_type = tanker_type_to_crude[tanker_type]
-            for port in crude_to_port.values():
-                for destination in destinations:
-                    var_name = create_var_name(port, tanker, destination)
-                    try:
-                        if solution.get_values(var_name) > 0.5:
-                            # Quantity required for the destination
-                            quantity = quantities_per_destination[destination]
-                            route_cost = costs_and_capacities[var_name][0]  # Get the route cost from the dictionary
-                            # Print the statement with tanker type included
-                            print(f"From {port}, Tanker {tanker} of type {tanker_type} going to {destination}, transporting {quantity} barrels with shipping cost: {route_cost}")
-                            found_solution = True
-                    except CplexSolverError as e:
-                        print(f"Error accessing variable '{var_name}': {e}")
-    if not found_solution:
-        print("No routes selected in the solution.")
-else:
-    print("No solution available.")
\ No newline at end of file
+# Importing required libraries
+from model_cache import default_cache
+from network_data import load_network, report_number
+from shipping_model import solve_shipping
+from telemetry import RunTelemetry
+
+# Telemetry: phase timings and model counters of this run, written as one JSON line
+# to the file named by TELEMETRY_LOG (nothing is written when it is unset); see
+# telemetry.py for the cProfile / tracemalloc switches. The record is written when
+# the block ends, with the error filled in if the run fails.
+with RunTelemetry("Model 3 - Minimize Shipping") as run:
+    # Costs, fleet, port charges, fuel costs and shipping times are loaded once as arrays
+    with run.phase("load"):
+        net = load_network()
+
+    # Set to True to give the CPLEX columns "Port_Tanker_Destination" names (e.g. for
+    # exporting the model as an LP file). The model itself only uses column indices.
+    NAME_VARIABLES = False
+
+    # Solver: "mip" builds and solves the MIP. "auto" solves this model as an
+    # assignment problem instead (one tanker per port-destination pair, each tanker
+    # used at most once, capacity only removes tanker choices), much faster on large
+    # fleets, and falls back to the MIP when side constraints are added.
+    # The objective only charges home-port routes, so it is 0 at many plans and the
+    # total route cost printed below depends on which optimal plan the solver returns:
+    # 16036000 with the MIP on CPLEX (the original output), 15987000 with the MIP on
+    # HiGHS and 14509000 with "auto". The status is printed as "optimal" rather than
+    # CPLEX's code 101.
+    ENGINE = "mip"
+
+    # Solver backend for the MIP, from solvers.py: "highs" (SciPy, no licence needed),
+    # "simplex" (built in, small instances only), "cplex" or "auto" (HiGHS, else the
+    # built-in simplex; CPLEX only when named). None reads the SOLVER_BACKEND
+    # environment variable.
+    BACKEND = None
+
+    # MIP start for the "mip" engine: "greedy" (cheapest eligible tanker per
+    # port-destination pair), "assignment" (the assignment solution) or None. CPLEX
+    # and the built-in simplex use it; HiGHS cannot take one and warns when given one
+    MIP_START = "greedy"
+
+    # Model cache for the "mip" engine: with MODEL_CACHE_DIR set, the built MIP is kept
+    # there (keyed by a hash of the data) and later runs on the same data skip the
+    # build; see model_cache.py. None when MODEL_CACHE_DIR is unset.
+    CACHE = default_cache()
+
+    # Build and solve the model: binary decision for each port, tanker, destination,
+    # the objective (route cost plus crude cost on each tanker's home port) and
+    #   Constraint_1: Each boat can only be assigned to one route
+    #   Constraint_2: Each port-destination pair gets enough tanker capacity
+    #   Additional Constraint: Each port-destination pair should have exactly one tanker assigned
+    solution = solve_shipping(net, engine=ENGINE, name_variables=NAME_VARIABLES, backend=BACKEND,
+                              start=MIP_START, telemetry=run, cache=CACHE)
+
+    with run.phase("report"):
+        # Check the solution status
+        if solution is not None:
+            print(f"Model solved successfully ({solution.engine}).")
+            routes_table = solution.routes
+
+            # Print the total cost
+            print(f"Total cost of the solution: {report_number(routes_table['cost'].sum())}")
+
+            print("Solution status = ", solution.status)
+            if solution.result is not None and solution.result.incumbents is not None:
+                print(f"Time to first incumbent: {solution.result.time_to_first_incumbent}, "
+                      f"time to optimal: {solution.result.time_to_optimal}")
+            for route in routes_table:
+                # Print the statement with tanker type included
+                print(f"From {route['port']}, Tanker {route['tanker']} of type {route['tanker_class']} going to {route['destination']}, transporting {report_number(route['quantity'])} barrels with shipping cost: {report_number(route['cost'])}")
+            if len(routes_table) == 0:
+                print("No routes selected in the solution.")
+        else:
+            print("No solution available.")
@@ -0,0 +1,50 @@
+# Helpers shared by the bench_*.py scripts: timing and scaled-up copies of the
+# ABSA Oil instance
+
+import dataclasses
+import time
+
+import numpy as np
+
+from network_data import NetworkData
+
+
+def timed(fn, *args, **kwargs):
+    # (seconds, result) of one call
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def scale_fleet(net, n_tankers):
+    # Repeat the fleet (names suffixed with the copy number) up to n_tankers
+    pick = np.arange(n_tankers) % len(net.tankers)
+    names = tuple(f"{net.tankers[t]} {i // len(net.tankers)}" for i, t in enumerate(pick))
+    return dataclasses.replace(
+        net, tankers=names,
+        tanker_class=net.tanker_class[pick],
+        tanker_capacity=net.tanker_capacity[pick],
+        tanker_rate=net.tanker_rate[pick],
+    )
+
+
+def tile_network(net, refinery_factor, product_factor):
+    # Repeat the refineries and products of net; crudes and fleet stay as they are
+    refineries = tuple(f"{r} {i}" for i in range(refinery_factor) for r in net.refineries)
+    products = tuple(f"{p} {j}" for j in range(product_factor) for p in net.products)
+    capacity = np.tile(net.capacity, refinery_factor)
+    return NetworkData(
+        crudes=net.crudes, products=products, refineries=refineries, ports=net.ports,
+        tanker_classes=net.tanker_classes, tankers=net.tankers,
+        processing_cost=net.processing_cost,
+        crude_cost=net.crude_cost,
+        price=np.tile(net.price, product_factor),
+        capacity=capacity,
+        quota=net.quota * refinery_factor * product_factor,
+        demand=np.tile(net.demand, (product_factor, refinery_factor)) / product_factor,
+        tanker_class=net.tanker_class, tanker_capacity=net.tanker_capacity, tanker_rate=net.tanker_rate,
+        port_charge=net.port_charge, fuel_cost=net.fuel_cost,
+        shipping_days=np.tile(net.shipping_days, (1, refinery_factor)),
+        crude_port=net.crude_port, crude_class=net.crude_class,
+        delivery=np.tile(net.delivery, refinery_factor),
+    )
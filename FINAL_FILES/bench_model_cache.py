@@ -0,0 +1,67 @@
+# Benchmark: building MODEL 1 in Python vs. reading it back from the model cache
+#
+# For generated networks of growing size (network_generator.py), the model is made
+# ready for CPLEX in each of these ways (no solving, so sizes past the Community
+# Edition limit are fine):
+#   docplex   build_docplex_model() and the docplex -> CPLEX transfer
+#   matrix    build_profit_lp() and the bulk CplexBackend.load()
+#   hit       the cached entry: the .npz arrays plus CPLEX reading the model file
+# A cache hit still hashes the network to find its key; that time is included.
+#
+#   python bench_model_cache.py [max_scale] [mps|sav]
+
+import sys
+import tempfile
+
+from bench_common import timed
+from model_cache import ModelCache
+from network_generator import generate_network
+from profit_model import ProfitLP, build_docplex_model, build_profit_lp
+from solvers import CplexBackend
+
+
+def _docplex(net):
+    mdl, _, _ = build_docplex_model(net)
+    mdl.get_cplex()
+    return mdl
+
+
+def _matrix(net, backend):
+    lp = build_profit_lp(net)
+    return lp, backend.load(lp)
+
+
+def _hit(net, cache, backend):
+    lp = cache.load_problem(cache.key("profit_lp", net, "max", False), ProfitLP)
+    return lp, backend.read(lp.model_file, lp)
+
+
+def main(max_scale=10_000, fmt="mps"):
+    backend = CplexBackend()
+    print(f"{'scale':>7} {'vars':>8} {'rows':>8} {'docplex s':>10} {'matrix s':>9} {'hit s':>8} "
+          f"{'vs docplex':>10} {'vs matrix':>9}")
+    _docplex(generate_network()).end()    # warm-up: imports and the first CPLEX environment
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ModelCache(tmp, fmt=fmt)
+        scale = 1
+        while scale <= max_scale:
+            net = generate_network(scale)
+            t_docplex, mdl = timed(_docplex, net)
+            mdl.end()
+            t_matrix, (lp, model) = timed(_matrix, net, backend)
+            model.end()
+            # Fill the cache entry (arrays and model file), then time the hit
+            lp = build_profit_lp(net, cache=cache)
+            model = backend.load(lp)
+            backend.write(model, lp.model_file)
+            model.end()
+            t_hit, (_, model) = timed(_hit, net, cache, backend)
+            model.end()
+            print(f"{scale:>7} {lp.num_vars:>8} {lp.num_rows:>8} {t_docplex:>10.3f} {t_matrix:>9.3f} "
+                  f"{t_hit:>8.3f} {t_docplex / t_hit:>9.1f}x {t_matrix / t_hit:>8.1f}x")
+            scale *= 10
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000,
+         sys.argv[2] if len(sys.argv) > 2 else "mps")
@@ -0,0 +1,40 @@
+# Benchmark: Monte Carlo evaluation of the MODEL 1 plan against 10^6 demand samples
+#
+# Solves MODEL 1, scores its plan against lognormal demand (20% coefficient of
+# variation) at a few chunk sizes, and reports run time, peak traced memory and the
+# profit percentiles.
+#
+#   python bench_montecarlo.py [samples]
+
+import sys
+import time
+import tracemalloc
+
+from demand_montecarlo import evaluate_plan
+from network_data import load_network
+from profit_model import build_profit_lp, solve_profit_lp
+
+
+def main(samples=1_000_000):
+    net = load_network()
+    plan = solve_profit_lp(build_profit_lp(net, "max"))
+    print(f"plan profit at expected demand: {plan.objective:,.0f}")
+
+    print(f"{'chunk':>8} {'seconds':>8} {'peak MB':>8}")
+    for chunk_size in (8_192, 65_536, 262_144):
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = evaluate_plan(net, plan.purchase, plan.production, samples, chunk_size=chunk_size)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{chunk_size:>8} {elapsed:>8.2f} {peak / 2**20:>8.1f}")
+
+    print(f"mean profit {result.profit_mean:,.0f}, std {result.profit_std:,.0f}, "
+          f"P(any shortfall) {result.any_shortfall_prob:.3f}")
+    for q, value in result.percentiles().items():
+        print(f"  P{q:<3} {value:>16,.0f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
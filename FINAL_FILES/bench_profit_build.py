@@ -0,0 +1,34 @@
+# Benchmark: per-constraint docplex build vs. sparse matrix build + bulk CPLEX load
+#
+# The ABSA Oil instance is tiled to larger sizes (more refineries and products) and
+# each size is built both ways. Solving is left out on purpose: this measures the
+# Python-side model construction that dominates at scale.
+#
+#   python bench_profit_build.py [max_refineries]
+
+import sys
+
+from bench_common import tile_network, timed
+from network_data import load_network
+from profit_model import build_docplex_model, build_profit_lp, load_cplex
+
+
+def main(max_refineries=400):
+    base = load_network()
+    print(f"{'refineries':>10} {'products':>8} {'vars':>8} {'rows':>8} "
+          f"{'docplex s':>10} {'matrix s':>9} {'load s':>8} {'speedup':>8}")
+    factor = 1
+    while len(base.refineries) * factor <= max_refineries:
+        net = tile_network(base, factor, max(1, factor // 4))
+        t_docplex, (mdl, _, _) = timed(build_docplex_model, net)
+        mdl.end()
+        t_matrix, lp = timed(build_profit_lp, net)
+        t_load, cpx = timed(load_cplex, lp)
+        cpx.end()
+        print(f"{len(net.refineries):>10} {len(net.products):>8} {lp.num_vars:>8} {lp.num_rows:>8} "
+              f"{t_docplex:>10.3f} {t_matrix:>9.4f} {t_load:>8.3f} {t_docplex / (t_matrix + t_load):>7.1f}x")
+        factor *= 2
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 400)
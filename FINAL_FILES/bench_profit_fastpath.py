@@ -0,0 +1,52 @@
+# Benchmark and cross-check: closed-form profit solver vs. CPLEX
+#
+# Perturbs prices, crude costs and demands at random, solves each variant with
+# solve_closed_form() and with the matrix LP in CPLEX, and checks that the
+# objectives agree. Then reports closed-form solves per second.
+#
+#   python bench_profit_fastpath.py [variants]
+
+import dataclasses
+import sys
+import time
+
+import numpy as np
+
+from network_data import load_network
+from profit_model import build_profit_lp, solve_closed_form, solve_profit_lp
+
+
+def perturbed(net, rng):
+    return dataclasses.replace(
+        net,
+        price=net.price * rng.uniform(0.6, 1.4, net.price.shape),
+        crude_cost=net.crude_cost * rng.uniform(0.6, 1.4, net.crude_cost.shape),
+        demand=net.demand * rng.uniform(0.5, 1.5, net.demand.shape),
+    )
+
+
+def main(variants=200, seed=0):
+    rng = np.random.default_rng(seed)
+    base = load_network()
+    nets = [perturbed(base, rng) for _ in range(variants)]
+
+    worst = 0.0
+    for net in nets:
+        for sense in ("max", "min"):
+            fast = solve_closed_form(net, sense)
+            exact = solve_profit_lp(build_profit_lp(net, sense))
+            if (fast is None) != (exact is None):
+                raise AssertionError(f"feasibility differs for sense={sense}")
+            if fast is not None:
+                worst = max(worst, abs(fast.objective - exact.objective) / max(1.0, abs(exact.objective)))
+    print(f"cross-checked {variants} variants x 2 senses, worst relative objective gap {worst:.2e}")
+
+    start = time.perf_counter()
+    for net in nets * 50:
+        solve_closed_form(net)
+    elapsed = time.perf_counter() - start
+    print(f"closed form: {len(nets) * 50 / elapsed:,.0f} solves/s ({elapsed / (len(nets) * 50) * 1e6:.1f} us each)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,42 @@
+# Benchmark: original mdl.max/mdl.min revenue (MIP) vs. the in_demand/excess split (LP)
+#
+# Builds and solves the profit model on tiled instances with both revenue forms and
+# checks that they reach the same objective.
+#
+#   python bench_profit_revenue.py [max_refineries]
+
+import sys
+import time
+
+from bench_common import tile_network
+from network_data import load_network
+from profit_model import build_docplex_model
+
+
+def _solve(net, revenue_form):
+    start = time.perf_counter()
+    mdl, _, _ = build_docplex_model(net, "max", revenue_form)
+    built = time.perf_counter()
+    mdl.solve()
+    solved = time.perf_counter()
+    result = (mdl.objective_value, mdl.number_of_binary_variables, built - start, solved - built)
+    mdl.end()
+    return result
+
+
+def main(max_refineries=64):
+    base = load_network()
+    print(f"{'refineries':>10} {'products':>8} {'binaries':>8} {'minmax solve s':>14} "
+          f"{'split solve s':>13} {'speedup':>8} {'objective gap':>13}")
+    factor = 1
+    while len(base.refineries) * factor <= max_refineries:
+        net = tile_network(base, factor, max(1, factor // 4))
+        obj_mm, binaries, _, solve_mm = _solve(net, "minmax")
+        obj_lp, _, _, solve_lp = _solve(net, "split")
+        print(f"{len(net.refineries):>10} {len(net.products):>8} {binaries:>8} {solve_mm:>14.3f} "
+              f"{solve_lp:>13.3f} {solve_mm / solve_lp:>7.1f}x {abs(obj_mm - obj_lp):>13.3g}")
+        factor *= 2
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 64)
@@ -0,0 +1,67 @@
+# Benchmark: what-if latency of a persistent ProfitModel vs. rebuilding from scratch
+#
+# Each what-if shocks the product prices, one demand, the refinery capacities or one
+# crude quota, then re-solves. "cold" rebuilds the matrix form from the updated data
+# and solves it with a fresh backend model, "persistent" applies the change to a
+# long-lived ProfitModel. Objectives are cross-checked along the way.
+#
+#   python bench_profit_whatif.py [what_ifs]
+
+import sys
+import time
+
+import numpy as np
+
+from bench_common import tile_network
+from network_data import load_network
+from profit_model import ProfitModel, build_profit_lp, solve_profit_lp
+from solvers import available_backends
+
+# (backend, refinery factor); the CPLEX Community Edition stops at 1000 rows
+SIZES = [("cplex", 1), ("cplex", 4), ("highs", 4), ("highs", 64)]
+
+
+def shock(model, k, rng):
+    net = model.net
+    what = k % 4
+    if what == 0:
+        model.update_prices(net.price * rng.uniform(0.8, 1.2, net.price.shape))
+    elif what == 1:
+        p, r = rng.integers(len(net.products)), rng.integers(len(net.refineries))
+        model.update_demands({(net.products[p], net.refineries[r]): float(net.demand[p, r] * rng.uniform(0.5, 1.5))})
+    elif what == 2:
+        model.update_capacity(net.capacity * rng.uniform(0.9, 1.1, net.capacity.shape))
+    else:
+        c = rng.integers(len(net.crudes))
+        model.update_quota({net.crudes[c]: float(net.quota[c] * rng.uniform(0.9, 1.1))})
+
+
+def main(what_ifs=200, seed=0):
+    base = load_network()
+    installed = available_backends()
+    print(f"{'backend':>8} {'vars':>7} {'cold ms':>8} {'persistent ms':>14} {'speedup':>8} {'max rel diff':>13}")
+    for backend, factor in SIZES:
+        if backend not in installed:
+            continue
+        rng = np.random.default_rng(seed)
+        model = ProfitModel(tile_network(base, factor, max(1, factor // 4)), "max", backend)
+        model.solve()
+        cold = warm = worst = 0.0
+        for k in range(what_ifs):
+            shock(model, k, rng)
+            start = time.perf_counter()
+            updated = model.solve()
+            warm += time.perf_counter() - start
+
+            start = time.perf_counter()
+            rebuilt = solve_profit_lp(build_profit_lp(model.net, "max"), backend)
+            cold += time.perf_counter() - start
+            if updated is not None and rebuilt is not None:
+                worst = max(worst, abs(updated.objective - rebuilt.objective) / abs(rebuilt.objective))
+        model.close()
+        print(f"{backend:>8} {model.lp.num_vars:>7} {1e3 * cold / what_ifs:>8.3f} {1e3 * warm / what_ifs:>14.3f} "
+              f"{cold / warm:>7.1f}x {worst:>13.1e}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
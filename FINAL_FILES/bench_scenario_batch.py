@@ -0,0 +1,62 @@
+# Benchmark: scenario batch throughput vs. building and solving every scenario cold
+#
+# Writes a random scenario table (crude prices, product prices and every demand
+# shocked by up to +-20%) to a temporary directory, runs it through
+# scenario_batch.run_batch() with 1 worker and with one worker per CPU, and times
+# a cold build_profit_lp() + solve per scenario for comparison.
+#
+#   python bench_scenario_batch.py [scenarios] [backend]
+
+import csv
+import dataclasses
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from network_data import load_network
+from profit_model import build_profit_lp, solve_profit_lp
+from scenario_batch import read_scenarios, run_batch
+
+
+def write_random_scenarios(path, net, n_scenarios, seed=0):
+    rng = np.random.default_rng(seed)
+    columns = ([f"crude_cost:{crude}" for crude in net.crudes]
+               + [f"price:{prod}" for prod in net.products]
+               + [f"demand:{prod}:{ref}" for prod in net.products for ref in net.refineries])
+    base = np.concatenate([net.crude_cost, net.price, net.demand.ravel()])
+    values = base * rng.uniform(0.8, 1.2, (n_scenarios, len(base)))
+    with open(path, "w", newline="", encoding="utf-8") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(["scenario"] + columns)
+        for i, row in enumerate(values.tolist()):
+            writer.writerow([f"s{i}"] + row)
+
+
+def cold(path, net, backend):
+    # The old way, minus process start-up: rebuild and solve every scenario
+    _, _, values = read_scenarios(path)
+    n_crudes, n_products = len(net.crudes), len(net.products)
+    start = time.perf_counter()
+    for row in values:
+        scenario = dataclasses.replace(net, crude_cost=row[:n_crudes],
+                                       price=row[n_crudes:n_crudes + n_products],
+                                       demand=row[n_crudes + n_products:].reshape(net.demand.shape))
+        solve_profit_lp(build_profit_lp(scenario, "max"), backend)
+    return len(values) / (time.perf_counter() - start)
+
+
+def main(n_scenarios=2000, backend=None):
+    net = load_network()
+    with tempfile.TemporaryDirectory() as tmp:
+        table = os.path.join(tmp, "scenarios.csv")
+        write_random_scenarios(table, net, n_scenarios)
+        print(f"cold rebuild per scenario: {cold(table, net, backend):.1f} scenarios/s")
+        for workers in sorted({1, os.cpu_count() or 1}):
+            print(run_batch(table, os.path.join(tmp, "results.npz"), net, backend=backend, workers=workers))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000, sys.argv[2] if len(sys.argv) > 2 else None)
@@ -0,0 +1,51 @@
+# Benchmark and cross-check: Model 3 assignment engine vs. the CPLEX MIP
+#
+# Model 3's own objective is zero on every route away from a tanker's home port, so
+# many route tables tie. The cross-check therefore uses the full route cost tensor
+# as the objective on randomised small fleets (within the CPLEX community edition
+# limits) and compares optimal objectives. Then the engine alone is timed on large
+# fleets.
+#
+#   python bench_shipping_assignment.py [variants]
+
+import dataclasses
+import sys
+import time
+
+import numpy as np
+
+from bench_common import scale_fleet
+from network_data import load_network
+from shipping_model import route_cost_tensor, solve_shipping
+
+
+def main(variants=30, seed=0):
+    rng = np.random.default_rng(seed)
+    base = load_network()
+
+    worst = 0.0
+    for _ in range(variants):
+        n_tankers = int(rng.integers(16, 62))
+        net = scale_fleet(base, n_tankers)
+        net = dataclasses.replace(net, tanker_rate=net.tanker_rate * rng.uniform(0.5, 1.5, n_tankers),
+                                  delivery=net.delivery * rng.uniform(0.5, 3.0, net.delivery.shape))
+        cost, _ = route_cost_tensor(net)
+        fast = solve_shipping(net, engine="assignment", objective=cost)
+        exact = solve_shipping(net, engine="mip", objective=cost)
+        if (fast is None) != (exact is None):
+            raise AssertionError(f"feasibility differs with {n_tankers} tankers")
+        if fast is not None:
+            worst = max(worst, abs(fast.objective - exact.objective) / max(1.0, abs(exact.objective)))
+    print(f"cross-checked {variants} fleets, worst relative objective gap {worst:.2e}")
+
+    print(f"{'tankers':>8} {'vars':>8} {'assignment s':>13}")
+    for n_tankers in (24, 1000, 5000, 10000, 50000):
+        net = scale_fleet(base, n_tankers)
+        start = time.perf_counter()
+        solve_shipping(net)
+        elapsed = time.perf_counter() - start
+        print(f"{n_tankers:>8} {len(net.ports) * n_tankers * len(net.refineries):>8} {elapsed:>13.4f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 30)
@@ -0,0 +1,55 @@
+# Benchmark: Model 3 build with one linear_constraints.add per row vs. one per family
+#
+# The 24-tanker fleet is repeated up to 10,000 tankers. Only the build is timed;
+# the models are not solved.
+#
+#   python bench_shipping_build.py [max_tankers]
+
+import sys
+
+import cplex
+
+from bench_common import scale_fleet, timed
+from network_data import load_network
+from shipping_model import RouteIndex, build_shipping_model, objective_tensor, route_cost_tensor
+
+
+def build_per_row(net, routes, route_cost):
+    # The pre-batching build: one add() call per constraint row
+    model = cplex.Cplex()
+    model.variables.add(obj=objective_tensor(net, route_cost).ravel().tolist(), types="B" * routes.size)
+    var = routes.grid()
+    for t in range(routes.shape[1]):
+        ind = var[:, t, :].ravel().tolist()
+        model.linear_constraints.add(lin_expr=[[ind, [1] * len(ind)]], senses=["L"], rhs=[1])
+    for o in range(routes.shape[0]):
+        for r in range(routes.shape[2]):
+            model.linear_constraints.add(lin_expr=[[var[o, :, r].tolist(), net.tanker_capacity.tolist()]],
+                                         senses=["G"], rhs=[float(net.delivery[r])])
+    for o in range(routes.shape[0]):
+        for r in range(routes.shape[2]):
+            ind = var[o, :, r].tolist()
+            model.linear_constraints.add(lin_expr=[[ind, [1] * len(ind)]], senses=["E"], rhs=[1])
+    return model
+
+
+def main(max_tankers=10000):
+    base = load_network()
+    print(f"{'tankers':>8} {'vars':>8} {'rows':>7} {'per-row s':>10} {'batched s':>10} {'speedup':>8}")
+    for n_tankers in (24, 100, 1000, 5000, 10000):
+        if n_tankers > max_tankers:
+            break
+        net = scale_fleet(base, n_tankers)
+        routes = RouteIndex(net)
+        route_cost, _ = route_cost_tensor(net)
+        t_row, model = timed(build_per_row, net, routes, route_cost)
+        n_rows = model.linear_constraints.get_num()
+        model.end()
+        t_batch, (model, _) = timed(build_shipping_model, net, routes, route_cost)
+        assert model.linear_constraints.get_num() == n_rows
+        model.end()
+        print(f"{n_tankers:>8} {routes.size:>8} {n_rows:>7} {t_row:>10.3f} {t_batch:>10.3f} {t_row / t_batch:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
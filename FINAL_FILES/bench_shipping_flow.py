@@ -0,0 +1,53 @@
+# Benchmark: split-delivery min-cost flow vs. the Model 3 binary MIP
+#
+# Times solve_split_deliveries() as the fleet grows and, for comparison, the
+# build + solve of the one-tanker-per-pair binary model. The engine column shows
+# whether the repaired flow or the assignment plan was returned, and the MIP column
+# shows "limit" when the backend refuses a model that size (the CPLEX Community
+# Edition stops at 1000 rows or columns). Every split plan is checked against the
+# one-tanker assignment on route cost, which it must never exceed, and against
+# max_trips.
+#
+#   python bench_shipping_flow.py [max_tankers] [max_trips] [MIP backend]
+
+import sys
+
+from bench_common import scale_fleet, timed
+from network_data import load_network
+from shipping_flow import solve_split_deliveries
+from shipping_model import route_cost_tensor, solve_assignment, solve_mip
+from solvers import SolverError
+
+
+def main(max_tankers=2000, max_trips=1, backend=None):
+    base = load_network()
+    print(f"{'tankers':>8} {'split s':>8} {'engine':>10} {'routes':>7} {'split cost':>12} {'assign cost':>12} "
+          f"{'MIP s':>8}")
+    for n_tankers in (24, 60, 500, 2000, 5000):
+        if n_tankers > max_tankers:
+            break
+        net = scale_fleet(base, n_tankers)
+        route_cost, _ = route_cost_tensor(net)
+        t_split, split = timed(solve_split_deliveries, net, route_cost, max_trips)
+        assignment = solve_assignment(net, route_cost, objective=route_cost)
+        if split is not None:
+            if split.trips.sum(axis=(0, 2)).max() > max_trips:
+                raise AssertionError(f"{n_tankers} tankers: a tanker makes more than {max_trips} trips")
+            if assignment is not None and split.trip_cost > assignment.objective + 1e-6:
+                raise AssertionError(f"{n_tankers} tankers: split plan costs more than the assignment")
+        try:
+            t_mip, _ = timed(solve_mip, net, backend=backend)
+            mip = f"{t_mip:>8.3f}"
+        except SolverError:
+            mip = f"{'limit':>8}"
+        split_cost = "-" if split is None else f"{split.trip_cost:.0f}"
+        assign_cost = "-" if assignment is None else f"{assignment.objective:.0f}"
+        engine = "-" if split is None else split.engine
+        print(f"{n_tankers:>8} {t_split:>8.3f} {engine:>10} {0 if split is None else len(split.routes):>7} "
+              f"{split_cost:>12} {assign_cost:>12} {mip}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 1,
+         sys.argv[3] if len(sys.argv) > 3 else None)
@@ -0,0 +1,65 @@
+# Benchmark: Model 3 MIP with and without a MIP start
+#
+# Randomised fleets (within the CPLEX community edition limits) are solved with the
+# full route cost as the objective, cold and warm-started from the greedy
+# allocation or from the assignment solution. For each backend that reports its
+# incumbents, prints the mean time to the first incumbent and to the proven optimum,
+# and how far the greedy allocation was from the optimum.
+#
+#   python bench_shipping_warmstart.py [variants] [backend ...]
+#
+# The built-in simplex backend also reports incumbents, but its branch-and-bound
+# needs minutes per fleet here, so it only runs when asked for.
+
+import dataclasses
+import sys
+
+import numpy as np
+
+from bench_common import scale_fleet
+from network_data import load_network
+from shipping_model import RouteIndex, allocation_start, greedy_allocation, route_cost_tensor, solve_mip
+
+STARTS = (None, "greedy", "assignment")
+
+# Fleet sizes per backend: the built-in simplex is only meant for small models
+MAX_TANKERS = {"cplex": 60, "simplex": 16}
+
+
+def random_fleet(base, rng, max_tankers):
+    n_tankers = int(rng.integers(12, max_tankers + 1))
+    net = scale_fleet(base, n_tankers)
+    return dataclasses.replace(net, tanker_rate=net.tanker_rate * rng.uniform(0.5, 1.5, n_tankers))
+
+
+def main(variants=20, backends=("cplex",), seed=0):
+    base = load_network()
+    print(f"{'backend':>8} {'start':>10} {'first inc s':>12} {'optimal s':>10} {'start gap':>10}")
+    for backend in backends:
+        rng = np.random.default_rng(seed)
+        first = {start: [] for start in STARTS}
+        optimal = {start: [] for start in STARTS}
+        gap = []
+        for _ in range(variants):
+            net = random_fleet(base, rng, MAX_TANKERS.get(backend, 60))
+            cost, _ = route_cost_tensor(net)
+            for start in STARTS:
+                solution = solve_mip(net, cost, objective=cost, backend=backend, start=start)
+                if solution is None:
+                    break
+                result = solution.result
+                first[start].append(result.time_to_first_incumbent)
+                optimal[start].append(result.time_to_optimal)
+            allocation = greedy_allocation(net)
+            if len(allocation) == len(net.ports) * len(net.refineries):
+                greedy = cost.ravel() @ allocation_start(RouteIndex(net), allocation)
+                gap.append(greedy / solution.objective - 1)
+        for start in STARTS:
+            label = start or "none"
+            gap_text = f"{np.mean(gap):>9.2%}" if start == "greedy" and gap else f"{'':>9}"
+            print(f"{backend:>8} {label:>10} {np.mean(first[start]):>12.4f} "
+                  f"{np.mean(optimal[start]):>10.4f} {gap_text}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20, tuple(sys.argv[2:]) or ("cplex",))
@@ -0,0 +1,74 @@
+# Benchmark: a stream of repeated planning queries with and without SolutionCache
+#
+# A pool of distinct queries (MODEL 1 with perturbed prices and demands, Model 3
+# with perturbed fleet rates) is drawn from with Zipf-like popularity, as a planning
+# tool re-asking the same questions would. Every request is answered by the cache;
+# the time of each hit and each miss is recorded. The uncached cost is the miss
+# time, since a miss is exactly one full solve.
+#
+#   python bench_solution_cache.py [requests] [distinct] [memory entries] [backend]
+
+import dataclasses
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from network_data import load_network
+from solution_cache import SolutionCache
+
+
+def query_pool(net, distinct, seed=0):
+    # [(model, net)] of distinct what-if queries around net
+    rng = np.random.default_rng(seed)
+    pool = []
+    for i in range(distinct):
+        if i % 2 == 0:
+            pool.append(("profit", dataclasses.replace(
+                net, price=(net.price * rng.uniform(0.9, 1.1, net.price.shape)).round(2),
+                demand=(net.demand * rng.uniform(0.9, 1.1, net.demand.shape)).round())))
+        else:
+            pool.append(("shipping", dataclasses.replace(
+                net, tanker_rate=(net.tanker_rate * rng.uniform(0.9, 1.1, net.tanker_rate.shape)).round(-2))))
+    return pool
+
+
+def main(requests=5000, distinct=200, entries=64, backend=None):
+    net = load_network()
+    pool = query_pool(net, distinct)
+    rng = np.random.default_rng(1)
+    weights = 1.0 / np.arange(1, distinct + 1)
+    picks = rng.choice(distinct, requests, p=weights / weights.sum())
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = SolutionCache(entries, tmp)
+        times = {"memory": [], "disk": [], "miss": []}
+        for i in picks:
+            model, query = pool[i]
+            before = (cache.hits, cache.disk_hits)
+            start = time.perf_counter()
+            if model == "profit":
+                cache.solve_profit(query, backend=backend)
+            else:
+                cache.solve_shipping(query, backend=backend)
+            elapsed = time.perf_counter() - start
+            tier = ("memory" if cache.hits > before[0] else "disk" if cache.disk_hits > before[1] else "miss")
+            times[tier].append(elapsed)
+
+    print(f"{requests} requests over {distinct} distinct queries, {entries} in memory")
+    for tier, values in times.items():
+        if values:
+            print(f"{tier:>7}: {len(values):>6} x {1e6 * np.mean(values):>10.1f} us "
+                  f"(median {1e6 * np.median(values):.1f} us)")
+    cached = sum(sum(values) for values in times.values())
+    uncached = requests * np.mean(times["miss"])
+    print(f"total: {cached:.3f} s cached vs ~{uncached:.3f} s uncached ({uncached / cached:.1f}x)")
+    print(cache.stats())
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 200,
+         int(sys.argv[3]) if len(sys.argv) > 3 else 64,
+         sys.argv[4] if len(sys.argv) > 4 else None)
@@ -0,0 +1,57 @@
+# Benchmark: build (load) and solve time of every installed solver backend
+#
+# The profit LP is tiled to more refineries and products as in bench_profit_build.py,
+# and the Model 3 MIP is solved on fleets repeated as in bench_shipping_build.py.
+# "skip" means the backend refused the model (CPLEX Community Edition size limits,
+# or the built-in simplex on anything but small instances).
+#
+#   python bench_solvers.py [backend ...]
+
+import sys
+
+from bench_common import scale_fleet, tile_network
+from network_data import load_network
+from profit_model import build_profit_lp
+from shipping_model import RouteIndex, build_shipping_lp, route_cost_tensor
+from solvers import SolverError, available_backends, solve
+
+# The built-in branch-and-bound re-solves every node from scratch; keep it to the
+# instances it is meant for
+SIMPLEX_MAX_VARS = 400
+
+
+def profit_problems(base):
+    for factor in (1, 4, 16, 64):
+        net = tile_network(base, factor, max(1, factor // 4))
+        yield f"profit max {len(net.refineries)}x{len(net.products)}", build_profit_lp(net, "max")
+
+
+def shipping_problems(base):
+    for n_tankers in (24, 60, 250, 1000):
+        net = scale_fleet(base, n_tankers)
+        route_cost, _ = route_cost_tensor(net)
+        yield f"shipping {n_tankers} tankers", build_shipping_lp(net, RouteIndex(net), route_cost)
+
+
+def main(backends):
+    base = load_network()
+    print(f"{'model':<24} {'vars':>7} {'rows':>6} {'backend':>8} {'build s':>8} {'solve s':>8} "
+          f"{'status':>8} {'objective':>14}")
+    for problems in (profit_problems(base), shipping_problems(base)):
+        for label, problem in problems:
+            for name in backends:
+                row = f"{label:<24} {problem.num_vars:>7} {problem.num_rows:>6} {name:>8}"
+                if name == "simplex" and problem.num_vars > SIMPLEX_MAX_VARS:
+                    print(f"{row} {'skip':>8}")
+                    continue
+                try:
+                    result = solve(problem, name)
+                except SolverError:
+                    print(f"{row} {'skip':>8}")
+                    continue
+                print(f"{row} {result.build_time:>8.4f} {result.solve_time:>8.4f} "
+                      f"{result.status:>8} {result.objective:>14.1f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:] or available_backends())
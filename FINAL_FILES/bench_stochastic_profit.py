@@ -0,0 +1,39 @@
+# Benchmark: two-stage stochastic profit model, L-shaped decomposition vs. the
+# monolithic extensive form, over a growing number of demand scenarios
+#
+# The extensive form is solved with HiGHS (it outgrows the CPLEX Community Edition
+# at a handful of scenarios) and skipped beyond EXTENSIVE_MAX scenarios.
+#
+#   python bench_stochastic_profit.py [workers]
+
+import sys
+import time
+
+from network_data import load_network
+from solvers import available_backends, solve
+from stochastic_profit import build_extensive_form, sample_demands, solve_stochastic
+
+SCENARIOS = [10, 100, 1_000, 10_000, 100_000]
+EXTENSIVE_MAX = 10_000
+
+
+def main(workers=1):
+    net = load_network()
+    solve_stochastic(net, sample_demands(net, 1))   # warm up the master backend
+    print(f"{'scenarios':>9} {'iters':>5} {'benders s':>10} {'extensive s':>12} {'objective':>16} {'rel diff':>9}")
+    for n in SCENARIOS:
+        demands = sample_demands(net, n)
+        stochastic = solve_stochastic(net, demands, workers=workers)
+
+        extensive = diff = "-"
+        if n <= EXTENSIVE_MAX and "highs" in available_backends():
+            start = time.perf_counter()
+            result = solve(build_extensive_form(net, demands), "highs")
+            extensive = f"{time.perf_counter() - start:.3f}"
+            diff = f"{abs(result.objective - stochastic.objective) / abs(result.objective):.1e}"
+        print(f"{n:>9} {stochastic.iterations:>5} {stochastic.solve_time:>10.3f} {extensive:>12} "
+              f"{stochastic.objective:>16.2f} {diff:>9}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1)
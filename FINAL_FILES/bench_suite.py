@@ -0,0 +1,220 @@
+# Benchmark suite: data load, model build, solve and solution extraction, timed
+# separately for MODEL 1 (profit max), MODEL 2 (profit min) and Model 3 (shipping)
+# over generated instances of growing size
+#
+# Each instance comes from network_generator.generate_network(scale) and is written
+# to a Sample.dat-layout file first; "load" times reading it back with opl_data.
+# Phases are timed as the best of --repeat runs, then run once more under
+# tracemalloc for the peak memory of each phase. Model 3 is timed both with the
+# assignment engine (every size) and as a MIP (up to MIP_MAX_ROUTES columns), both
+# with objective=route_cost: the Model 3 objective charges only home-port routes,
+# which the generated fleets can always avoid, so it is 0 and the MIP trivial. The
+# assignment engine decodes its own routes, so its "solve" includes one decode.
+#
+# Results are written as JSON. With --baseline, every (model, scale, phase) time
+# is compared against a stored run and the script exits with status 1 when a phase
+# got slower by more than --tolerance (and by more than --min-seconds), an
+# objective changed, or a case that ran in the baseline now fails.
+#
+#   python bench_suite.py [--scales 1 10 100 1000] [--output bench.json]
+#                         [--baseline old.json] [--backend highs]
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import scipy
+
+from network_generator import generate_network, write_dat
+from opl_data import load_dat, network_from_dat
+from profit_model import build_profit_lp
+from shipping_model import RouteIndex, build_shipping_lp, decode_routes, route_cost_tensor, solve_assignment
+from solvers import solve
+
+SCALES = [1, 10, 100, 1000]
+MODELS = ["profit_max", "profit_min", "shipping", "shipping_mip"]
+PHASES = ["load", "build", "solve", "extract"]
+MIP_MAX_ROUTES = 20_000
+
+
+def _load(path):
+    return network_from_dat(load_dat(path, cache=False))
+
+
+def _phases(model, path, backend):
+    # [(phase, callable)] for one run; each callable takes the previous phase's result
+    if model in ("profit_max", "profit_min"):
+        sense = "max" if model == "profit_max" else "min"
+        return [
+            ("load", lambda _: _load(path)),
+            ("build", lambda net: build_profit_lp(net, sense)),
+            ("solve", lambda lp: (lp, solve(lp, backend))),
+            ("extract", lambda state: (None if state[1].x is None
+                                       else state[0].solution(state[1].x, state[1].status))),
+        ]
+    if model == "shipping":
+        def build(net):
+            route_cost, _ = route_cost_tensor(net)
+            return net, route_cost, route_cost
+
+        return [
+            ("load", lambda _: _load(path)),
+            ("build", build),
+            ("solve", lambda state: (state, solve_assignment(*state))),
+            ("extract", lambda state: (None if state[1] is None
+                                       else decode_routes(state[0][0], state[1].values, state[0][1]))),
+        ]
+
+    def build_mip(net):
+        route_cost, _ = route_cost_tensor(net)
+        return net, route_cost, build_shipping_lp(net, RouteIndex(net), route_cost, objective=route_cost)
+
+    return [
+        ("load", lambda _: _load(path)),
+        ("build", build_mip),
+        ("solve", lambda state: (state, solve(state[2], backend))),
+        ("extract", lambda state: (None if state[1].x is None
+                                   else decode_routes(state[0][0], state[1].x, state[0][1]))),
+    ]
+
+
+def _objective(model, solved):
+    # Objective from the result of the solve phase
+    result = solved[1]
+    if model == "shipping":
+        return None if result is None else float(result.objective)
+    return None if result.x is None else float(result.objective)
+
+
+def run_case(model, path, backend, repeat):
+    phases = _phases(model, path, backend)
+    best = dict.fromkeys(PHASES, float("inf"))
+    for _ in range(repeat):
+        value = None
+        for phase, fn in phases:
+            start = time.perf_counter()
+            value = fn(value)
+            best[phase] = min(best[phase], time.perf_counter() - start)
+
+    peak, outputs = {}, {}
+    tracemalloc.start()
+    try:
+        value = None
+        for phase, fn in phases:
+            tracemalloc.reset_peak()
+            value = outputs[phase] = fn(value)
+            peak[phase] = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {"seconds": best, "peak_bytes": peak, "objective": _objective(model, outputs["solve"])}
+
+
+def run_suite(scales=SCALES, models=MODELS, backend="highs", repeat=3, seed=0):
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in scales:
+            net = generate_network(scale, seed)
+            path = os.path.join(tmp, f"scale_{scale}.dat")
+            write_dat(net, path)
+            routes = len(net.ports) * len(net.tankers) * len(net.refineries)
+            size = {"crudes": len(net.crudes), "products": len(net.products), "refineries": len(net.refineries),
+                    "tankers": len(net.tankers), "routes": routes}
+            for model in models:
+                if model == "shipping_mip" and routes > MIP_MAX_ROUTES:
+                    continue
+                case = {"model": model, "scale": scale, "size": size}
+                try:
+                    case.update(run_case(model, path, backend, repeat))
+                except Exception as exc:    # a backend limit at one size should not end the run
+                    case["error"] = f"{type(exc).__name__}: {exc}"
+                results.append(case)
+                _print_case(case)
+    return {
+        "meta": {
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "scipy": scipy.__version__,
+            "platform": platform.platform(),
+            "backend": backend,
+            "repeat": repeat,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+def _print_case(case):
+    if "error" in case:
+        print(f"{case['model']:>13} {case['scale']:>6}  {case['error']}")
+        return
+    seconds = " ".join(f"{1e3 * case['seconds'][phase]:>10.2f}" for phase in PHASES)
+    peak = max(case["peak_bytes"].values()) / 2 ** 20
+    objective = "-" if case["objective"] is None else f"{case['objective']:.2f}"
+    print(f"{case['model']:>13} {case['scale']:>6} {seconds} {peak:>9.1f} {objective:>18}")
+
+
+def compare(current, baseline, tolerance=0.5, min_seconds=5e-3):
+    # [(model, scale, what, baseline value, current value)] of every phase that got
+    # slower by more than tolerance (relative) and min_seconds (absolute), every
+    # objective that changed, and every case that ran in the baseline but now fails
+    old = {(case["model"], case["scale"]): case for case in baseline["results"] if "error" not in case}
+    regressions = []
+    for case in current["results"]:
+        before = old.get((case["model"], case["scale"]))
+        if before is None:
+            continue
+        if "error" in case:
+            regressions.append((case["model"], case["scale"], "error", None, case["error"]))
+            continue
+        for phase in PHASES:
+            was, now = before["seconds"][phase], case["seconds"][phase]
+            if now > was * (1 + tolerance) and now - was > min_seconds:
+                regressions.append((case["model"], case["scale"], phase, was, now))
+        was, now = before["objective"], case["objective"]
+        if (was is None) != (now is None) or (was is not None and not np.isclose(was, now, rtol=1e-6)):
+            regressions.append((case["model"], case["scale"], "objective", was, now))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time load, build, solve and extract for all three models.")
+    parser.add_argument("--scales", type=float, nargs="+", default=SCALES, help="instance scales to generate")
+    parser.add_argument("--models", nargs="+", choices=MODELS, default=MODELS)
+    parser.add_argument("--backend", default="highs", help="solver backend for the LPs and the MIP (see solvers.py)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case; the best time is kept")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare against this JSON file from an earlier run")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed relative slowdown per phase")
+    parser.add_argument("--min-seconds", type=float, default=5e-3, help="ignore slowdowns smaller than this")
+    args = parser.parse_args(argv)
+
+    scales = [int(s) if float(s).is_integer() else s for s in args.scales]
+    print(f"{'model':>13} {'scale':>6} " + " ".join(f"{phase + ' ms':>10}" for phase in PHASES)
+          + f" {'peak MiB':>9} {'objective':>18}")
+    report = run_suite(scales, args.models, args.backend, args.repeat, args.seed)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as fh:
+            baseline = json.load(fh)
+        regressions = compare(report, baseline, args.tolerance, args.min_seconds)
+        for model, scale, what, was, now in regressions:
+            print(f"REGRESSION {model} scale {scale} {what}: {was} -> {now}")
+        if regressions:
+            return 1
+        print("No regressions against", args.baseline)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,99 @@
+# Monte Carlo stress test of a fixed production plan against sampled demand
+#
+# With the plan fixed, each demand sample d is scored exactly as discounted_revenue()
+# in MODEL 1 does: min(x, d) sells at the list price and max(x - d, 0) at 93% of it,
+# while the crude and processing costs of the plan do not depend on d. Demand that
+# the plan does not cover, max(d - x, 0), is the shortfall.
+#
+# Samples are drawn and scored in chunks of (chunk_size, products, refineries), so
+# memory is bounded by the chunk size plus one float per sample for the profit
+# distribution.
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from profit_model import DISCOUNT
+
+PERCENTILES = (1, 5, 25, 50, 75, 95, 99)
+
+
+@dataclass
+class MonteCarloResult:
+    samples: int
+    profit: np.ndarray            # profit of the plan per sample
+    revenue_mean: float
+    shortfall_mean: np.ndarray    # expected barrels short per (product, refinery)
+    shortfall_prob: np.ndarray    # probability of any shortfall per (product, refinery)
+    any_shortfall_prob: float     # probability that some cell is short
+
+    @property
+    def profit_mean(self):
+        return float(self.profit.mean())
+
+    @property
+    def profit_std(self):
+        return float(self.profit.std())
+
+    def percentiles(self, q=PERCENTILES):
+        return dict(zip(q, np.percentile(self.profit, q).tolist()))
+
+
+def lognormal_demand(mean, cv=0.2):
+    # Sampler of independent lognormal demands with the given mean array and
+    # coefficient of variation; cells with zero mean stay at zero
+    mean = np.asarray(mean, dtype=float)
+    sigma = np.sqrt(np.log1p(np.asarray(cv, dtype=float) ** 2))
+    mu = np.log(np.where(mean > 0, mean, 1.0)) - sigma ** 2 / 2
+    zero = mean <= 0
+
+    def sample(rng, n):
+        # exp(mu + sigma * z) in place, cheaper than rng.lognormal()
+        demand = rng.standard_normal((n,) + mean.shape)
+        demand *= sigma
+        demand += mu
+        np.exp(demand, out=demand)
+        if zero.any():
+            demand[:, zero] = 0.0
+        return demand
+
+    return sample
+
+
+def evaluate_plan(net, purchase, production, samples=1_000_000, sampler=None, chunk_size=65_536, seed=0):
+    # Score the plan (purchase per crude, production per product and refinery)
+    # against demand samples from sampler(rng, n) -> (n, products, refineries); the
+    # default is lognormal_demand(net.demand)
+    sampler = sampler or lognormal_demand(net.demand)
+    rng = np.random.default_rng(seed)
+    x = np.asarray(production, dtype=float)
+    price = net.price[:, None]
+    cell_price = np.broadcast_to(price, x.shape).ravel()
+    fixed_cost = float(net.crude_cost @ np.asarray(purchase, dtype=float) + net.processing_cost * x.sum())
+    # Revenue is price * (0.93 * x + 0.07 * min(x, d)); only the second term varies
+    full_discount = float(DISCOUNT * (price * x).sum())
+
+    profit = np.empty(samples)
+    shortfall_sum = np.zeros(x.shape)
+    shortfall_count = np.zeros(x.shape, dtype=np.int64)
+    any_short = 0
+    for start in range(0, samples, chunk_size):
+        n = min(chunk_size, samples - start)
+        demand = sampler(rng, n)
+        sold = np.minimum(demand, x)
+        revenue = full_discount + (1 - DISCOUNT) * (sold.reshape(n, -1) @ cell_price)
+        profit[start:start + n] = revenue - fixed_cost
+        short = demand - sold
+        shortfall_sum += short.sum(axis=0)
+        is_short = short > 0
+        shortfall_count += is_short.sum(axis=0)
+        any_short += int(is_short.reshape(n, -1).any(axis=1).sum())
+
+    return MonteCarloResult(
+        samples=samples,
+        profit=profit,
+        revenue_mean=float(profit.mean() + fixed_cost),
+        shortfall_mean=shortfall_sum / samples,
+        shortfall_prob=shortfall_count / samples,
+        any_shortfall_prob=any_short / samples,
+    )
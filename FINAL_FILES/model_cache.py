@@ -0,0 +1,232 @@
+# Content-addressed cache of built models
+#
+# Building a model in Python (the docplex expressions, or the matrix form plus the
+# per-row CPLEX load) is repeated on every run although the network rarely
+# changes. The builders can instead hash their inputs (the NetworkData arrays and
+# every build option) and keep, per hash:
+#   <key>.npz        the matrix form (c, A, senses, rhs, bounds, ...), so every
+#                    backend gets its arrays without rebuilding them
+#   <key>.<format>   the model as CPLEX wrote it (mps by default, or sav), which
+#                    CPLEX reads directly on the next run
+# LP files are not offered: CPLEX numbers the columns of an LP file in order of
+# first appearance, so columns with a zero objective would come back reordered.
+# The key covers the inputs and CACHE_VERSION, so any change in data or options
+# gives a new entry; bump CACHE_VERSION when a builder changes its output.
+#
+# The cache directory is bounded by max_bytes: whenever an entry is stored, the
+# least recently used entries (by file modification time, refreshed on every hit)
+# are deleted until it fits again. Files are written under temporary names and
+# renamed, so concurrent runs only ever see complete entries.
+#
+# default_cache() returns the cache in MODEL_CACHE_DIR, or None when that is unset.
+
+import dataclasses
+import hashlib
+import json
+import os
+
+import numpy as np
+import scipy.sparse as sp
+
+CACHE_VERSION = 1
+FORMATS = ("mps", "sav")
+DEFAULT_MAX_BYTES = 1 << 30
+
+
+def _update(digest, value):
+    # Feed a canonical byte form of value to digest
+    if isinstance(value, np.ndarray):
+        digest.update(f"ndarray{value.dtype.str}{value.shape}".encode())
+        digest.update(np.ascontiguousarray(value).tobytes() if value.dtype != object
+                      else repr(value.tolist()).encode())
+    elif sp.issparse(value):
+        value = sp.csr_matrix(value)
+        digest.update(f"csr{value.shape}".encode())
+        for part in (value.indptr, value.indices, value.data):
+            _update(digest, part)
+    elif dataclasses.is_dataclass(value) and not isinstance(value, type):
+        digest.update(type(value).__name__.encode())
+        for field in dataclasses.fields(value):
+            digest.update(field.name.encode())
+            _update(digest, getattr(value, field.name))
+    elif isinstance(value, dict):
+        digest.update(b"dict")
+        for key in sorted(value, key=repr):
+            _update(digest, key)
+            _update(digest, value[key])
+    elif isinstance(value, (list, tuple)):
+        digest.update(f"{type(value).__name__}{len(value)}".encode())
+        for item in value:
+            _update(digest, item)
+    else:
+        digest.update(f"{type(value).__name__}:{value!r}".encode())
+
+
+def input_hash(*inputs):
+    digest = hashlib.sha256(f"model_cache v{CACHE_VERSION}".encode())
+    for value in inputs:
+        _update(digest, value)
+    return digest.hexdigest()[:32]
+
+
+class ModelCache:
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES, fmt="mps"):
+        if fmt not in FORMATS:
+            raise ValueError(f"unknown model format {fmt!r}; choose from {FORMATS}")
+        self.directory = os.fspath(directory)
+        self.max_bytes = max_bytes
+        self.fmt = fmt
+        self.hits = self.misses = self.evictions = 0
+        os.makedirs(self.directory, exist_ok=True)
+
+    def key(self, kind, *inputs):
+        return input_hash(kind, *inputs)
+
+    def model_file(self, key):
+        # Where the solver model of this entry lives (it may not exist yet)
+        return os.path.join(self.directory, f"{key}.{self.fmt}")
+
+    def _arrays_file(self, key):
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def load_problem(self, key, cls):
+        # The cached matrix form as a cls instance (MatrixProblem, ProfitLP, ...)
+        # with model_file set, or None on a miss
+        path = self._arrays_file(key)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                meta = json.loads(data["__meta__"].item())
+                if meta["class"] != cls.__name__:
+                    raise ValueError(f"cache entry {key} holds a {meta['class']}")
+                values = dict(meta["values"])
+                for name, (kind, spec) in meta["fields"].items():
+                    if kind == "array":
+                        values[name] = data[name]
+                    elif kind == "csr":
+                        values[name] = sp.csr_matrix((data[name + ".data"], data[name + ".indices"],
+                                                      data[name + ".indptr"]), shape=tuple(spec))
+                    elif kind == "slices":
+                        values[name] = {k: slice(*v) for k, v in spec.items()}
+                    elif kind == "tuple":
+                        values[name] = tuple(spec)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._touch(key)
+        problem = cls(**values)
+        problem.model_file = self.model_file(key)
+        return problem
+
+    def store_problem(self, key, problem):
+        # Save the matrix form of problem (not its MIP start or model file) and point
+        # problem.model_file at the entry, so the first solve writes the model there
+        arrays, fields, values = {}, {}, {}
+        for field in dataclasses.fields(problem):
+            value = getattr(problem, field.name)
+            if field.name in ("start", "model_file"):
+                continue
+            if sp.issparse(value):
+                value = sp.csr_matrix(value)
+                arrays.update({f"{field.name}.data": value.data, f"{field.name}.indices": value.indices,
+                               f"{field.name}.indptr": value.indptr})
+                fields[field.name] = ("csr", list(value.shape))
+            elif isinstance(value, np.ndarray):
+                arrays[field.name] = value
+                fields[field.name] = ("array", None)
+            elif isinstance(value, dict):
+                fields[field.name] = ("slices", {k: [v.start, v.stop, v.step] for k, v in value.items()})
+            elif isinstance(value, tuple):
+                fields[field.name] = ("tuple", list(value))
+            else:
+                values[field.name] = value
+        meta = {"class": type(problem).__name__, "fields": fields, "values": values}
+        path = self._arrays_file(key)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as fh:
+            np.savez(fh, __meta__=np.array(json.dumps(meta)), **arrays)
+        os.replace(tmp, path)
+        problem.model_file = self.model_file(key)
+        self.evict()
+        return problem
+
+    def store_model(self, key, model):
+        # Save a loaded cplex.Cplex as the solver model of key. MPS files end a
+        # name at the first blank, so names with blanks (docplex names columns
+        # after the crudes) are written with "_" instead, from a copy.
+        import cplex
+        from solvers import CplexBackend, _quiet
+
+        copy = None
+        if self.fmt != "sav":
+            groups = (model.variables, model.linear_constraints)
+            if any(" " in name for group in groups for name in group.get_names()):
+                model = copy = _quiet(cplex.Cplex(model))
+                for group in (model.variables, model.linear_constraints):
+                    group.set_names([(i, name.replace(" ", "_")) for i, name in enumerate(group.get_names())])
+        try:
+            CplexBackend().write(model, self.model_file(key))
+        finally:
+            if copy is not None:
+                copy.end()
+        self.evict()
+
+    def has_model(self, key):
+        # True (and counted as a hit) when the solver model of key is cached
+        if os.path.exists(self.model_file(key)):
+            self.hits += 1
+            self._touch(key)
+            return True
+        self.misses += 1
+        return False
+
+    def _touch(self, key):
+        for path in (self._arrays_file(key), self.model_file(key)):
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                pass
+
+    def entries(self):
+        # {key: (bytes, last use, paths)} of every complete entry
+        entries = {}
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".tmp") or not entry.is_file():
+                continue
+            key = entry.name.split(".", 1)[0]
+            stat = entry.stat()
+            size, used, paths = entries.get(key, (0, 0.0, []))
+            entries[key] = (size + stat.st_size, max(used, stat.st_mtime), paths + [entry.path])
+        return entries
+
+    def size(self):
+        return sum(size for size, _, _ in self.entries().values())
+
+    def evict(self):
+        # Delete least recently used entries until the cache fits max_bytes
+        entries = self.entries()
+        total = sum(size for size, _, _ in entries.values())
+        for size, _, paths in sorted(entries.values(), key=lambda entry: entry[1]):
+            if total <= self.max_bytes:
+                break
+            for path in paths:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            total -= size
+            self.evictions += 1
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            os.remove(os.path.join(self.directory, name))
+
+
+def default_cache():
+    # ModelCache in MODEL_CACHE_DIR (size from MODEL_CACHE_MAX_MB, format from
+    # MODEL_CACHE_FORMAT), or None when MODEL_CACHE_DIR is unset
+    directory = os.environ.get("MODEL_CACHE_DIR")
+    if not directory:
+        return None
+    max_mb = float(os.environ.get("MODEL_CACHE_MAX_MB", DEFAULT_MAX_BYTES / 2 ** 20))
+    return ModelCache(directory, int(max_mb * 2 ** 20), os.environ.get("MODEL_CACHE_FORMAT", "mps"))
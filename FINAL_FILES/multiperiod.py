@@ -0,0 +1,255 @@
+# Multi-period planning over the profit model (MODEL 1) and the shipping model
+# (Model 3), with a rolling horizon
+#
+# Each period is a NetworkData (one month: its own prices, costs, capacities, quotas
+# and demands). Product made at a refinery can be held there as inventory, so per
+# period t, product p and refinery r:
+#     inventory[t-1] + production[t] == demand[t] + excess[t] + inventory[t]
+#     sum_p production[t, p, r] <= capacity[t, r]
+#     sum_p inventory[t, p, r] <= storage[r]
+#     purchase[t, c] == sum(production[t]) / C <= quota[t, c]
+# Demand is always met; excess is sold at 93% of the list price and inventory costs
+# holding_cost per barrel per period. With one period and no inventory this is
+# exactly MODEL 1.
+#
+# plan_horizon() solves windows of `window` periods, commits the first `step`
+# periods of each window, carries their closing inventory into the next window and
+# moves on, so every LP stays window-sized however long the horizon is. window=None
+# solves the whole horizon as one LP. plan_shipping() then solves Model 3 for every
+# period, each port shipping its crude share of the refinery's production.
+#
+#   python multiperiod.py [months] [window] [step]     (window 0: one monolithic LP)
+
+import dataclasses
+import sys
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+import scipy.sparse as sp
+
+from network_data import load_network
+from profit_model import DISCOUNT
+from shipping_model import solve_shipping
+from solvers import MatrixProblem, solve
+
+
+@dataclass
+class WindowReport:
+    first: int                # first period of the window
+    periods: int              # periods in the window
+    committed: int            # periods fixed from this window
+    num_vars: int
+    num_rows: int
+    build_time: float
+    solve_time: float
+    status: str
+    objective: float          # window objective (nan if not solved)
+
+
+@dataclass
+class MultiPeriodPlan:
+    purchase: np.ndarray      # (periods, crudes)
+    production: np.ndarray    # (periods, products, refineries)
+    excess: np.ndarray        # (periods, products, refineries) sold at the discount
+    inventory: np.ndarray     # (periods, products, refineries) closing stock
+    profit: np.ndarray        # (periods,) profit of the committed plan
+    windows: list = field(default_factory=list)
+    status: str = "optimal"
+    planned: int = 0          # committed periods; the rest have no plan (see status)
+
+    @property
+    def objective(self):
+        return float(self.profit.sum())
+
+    def delivery(self, crudes):
+        # Barrels each port ships to each refinery per period: the refinery's
+        # production times the 1:1 crude share
+        return self.production.sum(axis=1) / crudes
+
+
+def monthly_periods(net, months, growth=0.0, seasonality=0.0, noise=0.0, seed=0):
+    # months copies of net whose demand follows a trend, a 12-month cycle (peak in
+    # month 6) and multiplicative noise
+    rng = np.random.default_rng(seed)
+    periods = []
+    for t in range(months):
+        factor = (1 + growth) ** t * (1 + seasonality * np.sin(2 * np.pi * (t - 3) / 12))
+        demand = net.demand * factor * (1 + noise * rng.standard_normal(net.demand.shape)).clip(0)
+        periods.append(dataclasses.replace(net, demand=demand))
+    return periods
+
+
+def build_window(periods, inventory0, holding_cost=0.0, storage=None):
+    # LP of consecutive periods starting from inventory0 (products, refineries).
+    # Columns per period: purchase (C), production, excess, inventory (P * R each).
+    net = periods[0]
+    n_periods = len(periods)
+    n_crudes, (n_products, n_refineries) = len(net.crudes), net.demand.shape
+    cells = n_products * n_refineries
+    per = n_crudes + 3 * cells
+    storage = np.full(n_refineries, np.inf) if storage is None else np.asarray(storage, dtype=float)
+    stored = np.flatnonzero(np.isfinite(storage))
+
+    rows, cols, vals, senses, rhs = [], [], [], [], []
+    c, ub = np.zeros(n_periods * per), np.full(n_periods * per, np.inf)
+    offset = 0.0
+    first = 0
+    cell = np.arange(cells)
+    for k, period in enumerate(periods):
+        base = k * per
+        purchase = base + np.arange(n_crudes)
+        production = base + n_crudes + cell
+        excess = production + cells
+        inventory = excess + cells
+        price = np.repeat(period.price, n_refineries)
+
+        c[purchase] = -period.crude_cost
+        c[production] = -period.processing_cost
+        c[excess] = DISCOUNT * price
+        c[inventory] = -holding_cost
+        ub[purchase] = period.quota
+        offset += float(price @ period.demand.ravel())
+
+        # Balance: inventory[k-1] + production - excess - inventory == demand
+        balance = first + cell
+        rows += [balance, balance, balance]
+        cols += [production, excess, inventory]
+        vals += [np.ones(cells), -np.ones(cells), -np.ones(cells)]
+        if k > 0:
+            rows.append(balance)
+            cols.append(inventory - per)
+            vals.append(np.ones(cells))
+            rhs.append(period.demand.ravel())
+        else:
+            rhs.append(period.demand.ravel() - np.asarray(inventory0, dtype=float).ravel())
+        senses.append(np.full(cells, "E"))
+        first += cells
+
+        # Capacity: sum_p production[p, r] <= capacity[r]
+        refinery = np.tile(np.arange(n_refineries), n_products)
+        rows.append(first + refinery)
+        cols.append(production)
+        vals.append(np.ones(cells))
+        senses.append(np.full(n_refineries, "L"))
+        rhs.append(period.capacity)
+        first += n_refineries
+
+        # Crude split: purchase[c] - sum(production) / C == 0
+        split = first + np.arange(n_crudes)
+        rows += [split, np.repeat(split, cells)]
+        cols += [purchase, np.tile(production, n_crudes)]
+        vals += [np.ones(n_crudes), np.full(n_crudes * cells, -1.0 / n_crudes)]
+        senses.append(np.full(n_crudes, "E"))
+        rhs.append(np.zeros(n_crudes))
+        first += n_crudes
+
+        # Storage: sum_p inventory[p, r] <= storage[r], where storage is finite
+        in_store = np.isin(refinery, stored)
+        rows.append(first + np.searchsorted(stored, refinery[in_store]))
+        cols.append(inventory[in_store])
+        vals.append(np.ones(int(in_store.sum())))
+        senses.append(np.full(len(stored), "L"))
+        rhs.append(storage[stored])
+        first += len(stored)
+
+    A = sp.csr_matrix((np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))),
+                      shape=(first, n_periods * per))
+    return MatrixProblem("max", c, A, np.concatenate(senses), np.concatenate(rhs).astype(float),
+                         np.zeros(n_periods * per), ub, offset=offset)
+
+
+def _split(x, periods):
+    net = periods[0]
+    n_crudes, shape = len(net.crudes), net.demand.shape
+    cells = shape[0] * shape[1]
+    x = x.reshape(len(periods), n_crudes + 3 * cells)
+    purchase = x[:, :n_crudes]
+    production, excess, inventory = (x[:, n_crudes + i * cells:n_crudes + (i + 1) * cells].reshape((-1,) + shape)
+                                     for i in range(3))
+    return purchase, production, excess, inventory
+
+
+def period_profit(period, purchase, production, excess, inventory, holding_cost=0.0):
+    return float(period.price @ (period.demand + DISCOUNT * excess).sum(axis=1)
+                 - period.crude_cost @ purchase - period.processing_cost * production.sum()
+                 - holding_cost * inventory.sum())
+
+
+def plan_horizon(periods, window=None, step=1, inventory0=None, holding_cost=0.0, storage=None, backend=None):
+    # Rolling-horizon plan over the list of periods. Each window of `window` periods
+    # is solved with a backend from solvers.py and its first `step` periods are
+    # committed; window=None (or >= the horizon) is one monolithic LP. Stops at the
+    # first window with no optimal plan and returns what was committed so far.
+    n_periods = len(periods)
+    window = n_periods if window is None else min(window, n_periods)
+    step = min(step, window)
+    net = periods[0]
+    n_crudes, shape = len(net.crudes), net.demand.shape
+    plan = MultiPeriodPlan(np.zeros((n_periods, n_crudes)), np.zeros((n_periods,) + shape),
+                           np.zeros((n_periods,) + shape), np.zeros((n_periods,) + shape), np.zeros(n_periods))
+    state = np.zeros(shape) if inventory0 is None else np.asarray(inventory0, dtype=float)
+
+    first = 0
+    while first < n_periods:
+        span = periods[first:first + window]
+        # The last window takes every remaining period
+        commit = len(span) if first + window >= n_periods else step
+        start = time.perf_counter()
+        problem = build_window(span, state, holding_cost, storage)
+        build_time = time.perf_counter() - start
+        result = solve(problem, backend)
+        plan.windows.append(WindowReport(first, len(span), commit, problem.num_vars, problem.num_rows,
+                                         build_time, result.solve_time, result.status, result.objective))
+        if result.x is None or result.status != "optimal":
+            plan.status = result.status
+            break
+
+        parts = _split(result.x, span)
+        fixed = slice(first, first + commit)
+        for target, value in zip((plan.purchase, plan.production, plan.excess, plan.inventory), parts):
+            target[fixed] = value[:commit]
+        for t in range(first, first + commit):
+            plan.profit[t] = period_profit(periods[t], plan.purchase[t], plan.production[t],
+                                           plan.excess[t], plan.inventory[t], holding_cost)
+        state = plan.inventory[first + commit - 1]
+        first += commit
+        plan.planned = first
+    return plan
+
+
+def plan_shipping(periods, plan, engine="auto", backend=None):
+    # Model 3 for every planned period, delivering plan.delivery() from each port.
+    # Returns [(ShippingSolution or None, seconds)] for the first plan.planned
+    # periods; after a window without an optimal plan there is nothing to ship.
+    deliveries = plan.delivery(len(periods[0].crudes))[:plan.planned]
+    results = []
+    for period, delivery in zip(periods, deliveries):
+        start = time.perf_counter()
+        solution = solve_shipping(dataclasses.replace(period, delivery=delivery), engine=engine, backend=backend)
+        results.append((solution, time.perf_counter() - start))
+    return results
+
+
+def main(months=24, window=6, step=1):
+    periods = monthly_periods(load_network(), months, growth=0.005, seasonality=0.2, noise=0.05)
+    plan = plan_horizon(periods, window or None, step, holding_cost=1.0)
+    print(f"{'first':>5} {'periods':>7} {'fixed':>5} {'vars':>6} {'rows':>6} {'build ms':>9} {'solve ms':>9} "
+          f"{'status':>10} {'objective':>16}")
+    for w in plan.windows:
+        print(f"{w.first:>5} {w.periods:>7} {w.committed:>5} {w.num_vars:>6} {w.num_rows:>6} "
+              f"{1e3 * w.build_time:>9.2f} {1e3 * w.solve_time:>9.2f} {w.status:>10} {w.objective:>16.2f}")
+    print(f"Plan status: {plan.status}, total profit: {plan.objective:.2f}")
+
+    print(f"{'month':>5} {'profit':>16} {'production':>12} {'inventory':>11} {'shipping':>14} {'ship ms':>8}")
+    for t, (solution, seconds) in enumerate(plan_shipping(periods, plan)):
+        shipping = "infeasible" if solution is None else f"{solution.routes['cost'].sum():.2f}"
+        print(f"{t:>5} {plan.profit[t]:>16.2f} {plan.production[t].sum():>12.0f} {plan.inventory[t].sum():>11.0f} "
+              f"{shipping:>14} {1e3 * seconds:>8.2f}")
+    for t in range(plan.planned, len(periods)):
+        print(f"{t:>5} {'not planned (' + plan.status + ')':>16}")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:4]]
+    main(*args)
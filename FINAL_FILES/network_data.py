@@ -0,0 +1,302 @@
+# Shared dataset for the ABSA Oil distribution network
+#
+# Every model script used to re-declare the same nested dicts and look them up
+# by name inside its build loops. The data now lives here once and is loaded
+# into dense NumPy arrays with integer index maps, so the models index arrays
+# instead of walking string-keyed dicts.
+
+from dataclasses import dataclass
+from functools import cached_property, lru_cache
+
+import numpy as np
+
+# Cost of each crude oil and the cost of processing them
+costs = {
+    "processing": 19,
+    "crude": {"Azeri BTC": 57, "Poseidon Streams": 48, "Laguna": 35, "Snøhvit Condensate": 71},
+    }
+
+# Selling Prices of each refined product
+prices = {
+    "Gasoline-87": 90.45,
+    "Gasoline-89": 93.66,
+    "Gasoline-92": 95.50,
+    "Jet fuel": 61.25,
+    "Diesel fuel": 101.64,
+    "Heating oil": 66.36
+    }
+
+# Capacities of each refineries
+capacities = {
+    "Greece": 400000,
+    "Poland": 540000,
+    "Spain": 625000,
+    "UK": 735000,
+    }
+
+# The monthly supply quota for each Crude oil
+monthly_supply_quotas = {
+    "Azeri BTC": 645000,
+    "Poseidon Streams": 575000,
+    "Laguna": 550000,
+    "Snøhvit Condensate": 645000
+    }
+
+# The minimum number of barrels that each refinery should meet for each refined product
+demands = {
+    "Gasoline-87": {"Greece": 35000, "Poland": 22000, "Spain": 76000, "UK": 98000},
+    "Gasoline-89": {"Greece": 45000, "Poland": 38000, "Spain": 103000, "UK": 52000},
+    "Gasoline-92": {"Greece": 50000, "Poland": 60000, "Spain": 83000, "UK": 223000},
+    "Jet fuel": {"Greece": 20000, "Poland": 25000, "Spain": 47000, "UK": 127000},
+    "Diesel fuel": {"Greece": 75000, "Poland": 35000, "Spain": 125000, "UK": 87000},
+    "Heating oil": {"Greece": 25000, "Poland": 205000, "Spain": 30000, "UK": 13000}
+    }
+
+# Charter rate of each tanker, grouped by tanker class
+tanker_rates = {
+    'GPT': {
+        'Gudrun': 13000, 'Ingeborg': 22000, 'Valborg': 20000, 'Estrid': 15000, 'Rose': 14000,
+        'Cork Cat': 23000, 'Guam': 21000, 'Chance': 16000
+    },
+    'MRT': {
+        'Ismine': 25000, 'Signe': 27000, 'Venture': 23000, 'Pretty World': 25000, 'Viking': 26000,
+        'Limerick': 28000, 'York Gulls': 25000, 'Lancaster': 26000
+    },
+    'LR1': {
+        'PTI Volans': 30000, 'Trinity': 32000, 'Galway': 31000, 'Glasgow': 33000
+    },
+    'LR2': {
+        'Garonne': 41000, 'Torm Rhone': 44000, 'Thorpe': 51000, 'Venus': 56000
+    }
+}
+
+# Capacity of each tanker in barrels, grouped by tanker class
+tankers_capicity_in_barrels = {'GPT': {'Gudrun': 84500,
+  'Ingeborg': 205334,
+  'Valborg': 173224,
+  'Estrid': 141115,
+  'Rose': 101399,
+  'Cork Cat': 211249,
+  'Guam': 188857,
+  'Chance': 146523},
+ 'MRT': {'Ismine': 270400,
+  'Signe': 358279,
+  'Venture': 226459,
+  'Pretty World': 316452,
+  'Viking': 287300,
+  'Limerick': 377714,
+  'York Gulls': 242092,
+  'Lancaster': 332211},
+ 'LR1': {'PTI Volans': 515449,
+  'Trinity': 574600,
+  'Galway': 557700,
+  'Glasgow': 650650},
+ 'LR2': {'Garonne': 929499,
+  'Torm Rhone': 1153425,
+  'Thorpe': 1309750,
+  'Venus': 1352000}}
+
+# Port charge for each tanker class at each port
+port_charges = {
+    'Ceyhan': {
+        'GPT': 109000, 'MRT': 112000, 'LR1': 124000, 'LR2': 135000
+    },
+    'Houma': {
+        'GPT': 111000, 'MRT': 114000, 'LR1': 138000, 'LR2': 159000
+    },
+    'Puerto Miranda': {
+        'GPT': 135000, 'MRT': 147000, 'LR1': 158000, 'LR2': 169000
+    },
+    'Melkoya': {
+        'GPT': 136000, 'MRT': 147000, 'LR1': 156000, 'LR2': 177000
+    }
+}
+
+# Cost per hour
+fuel_costs = {
+    "GPT": 2500,
+    "MRT": 2750,
+    'LR1': 3000,
+    'LR2': 3250,
+}
+
+# Times in days from port to refinery
+shipping_times_in_days = {
+    'Ceyhan': {'Greece': 2, 'Poland': 15, 'Spain': 8, 'UK': 12},
+    'Houma': {'Greece': 20, 'Poland': 18, 'Spain': 16, 'UK': 15},
+    'Puerto Miranda': {'Greece': 19, 'Poland': 20, 'Spain': 14, 'UK': 15},
+    'Melkoya': {'Greece': 11, 'Poland': 3, 'Spain': 4, 'UK': 3}
+}
+
+# Mapping from crude oil types to ports
+crude_to_port = {
+    "Azeri BTC": "Ceyhan",
+    "Poseidon Streams": "Houma",
+    "Laguna": "Puerto Miranda",
+    "Snøhvit Condensate": "Melkoya"
+}
+
+crude_to_tanker_type = {
+    "Azeri BTC": "GPT",
+    "Poseidon Streams": "MRT",
+    "Laguna": "LR1",
+    "Snøhvit Condensate": "LR2"
+}
+
+# Quantities per destination
+quantities_per_destination = {
+    "UK": 183750,
+    "Spain": 156250,
+    "Poland": 135000,
+    "Greece": 75000
+}
+
+
+# Refinery order of the capacities dict that MODEL 1 and MODEL 2 used to declare;
+# their reports still list refineries in this order. The arrays follow the
+# Greece / Poland / Spain / UK order of Model 3's destinations.
+PROFIT_REPORT_REFINERIES = ("UK", "Spain", "Poland", "Greece")
+
+
+def report_number(value):
+    # A float from the arrays as the dict-based scripts printed it: whole numbers
+    # (barrels, costs) as int, anything else unchanged
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+
+def _index(names):
+    return {name: i for i, name in enumerate(names)}
+
+
+@dataclass(frozen=True)
+class NetworkData:
+    # Entity names; position in each tuple is the integer index used by every array
+    crudes: tuple
+    products: tuple
+    refineries: tuple
+    ports: tuple
+    tanker_classes: tuple
+    tankers: tuple
+
+    processing_cost: float
+    crude_cost: np.ndarray        # (crudes,)
+    price: np.ndarray             # (products,)
+    capacity: np.ndarray          # (refineries,)
+    quota: np.ndarray             # (crudes,)
+    demand: np.ndarray            # (products, refineries)
+    tanker_class: np.ndarray      # (tankers,) index into tanker_classes
+    tanker_capacity: np.ndarray   # (tankers,)
+    tanker_rate: np.ndarray       # (tankers,)
+    port_charge: np.ndarray       # (ports, tanker_classes)
+    fuel_cost: np.ndarray         # (tanker_classes,) cost per hour
+    shipping_days: np.ndarray     # (ports, refineries)
+    crude_port: np.ndarray        # (crudes,) index into ports
+    crude_class: np.ndarray       # (crudes,) index into tanker_classes
+    delivery: np.ndarray          # (refineries,) barrels shipped from each port
+
+    def __post_init__(self):
+        # The default instance is shared by every caller, so keep its arrays read-only
+        for value in self.__dict__.values():
+            if isinstance(value, np.ndarray):
+                value.flags.writeable = False
+
+    @cached_property
+    def crude_index(self):
+        return _index(self.crudes)
+
+    @cached_property
+    def product_index(self):
+        return _index(self.products)
+
+    @cached_property
+    def refinery_index(self):
+        return _index(self.refineries)
+
+    @cached_property
+    def port_index(self):
+        return _index(self.ports)
+
+    @cached_property
+    def class_index(self):
+        return _index(self.tanker_classes)
+
+    @cached_property
+    def tanker_index(self):
+        return _index(self.tankers)
+
+    @property
+    def shape(self):
+        return {
+            "crudes": len(self.crudes),
+            "products": len(self.products),
+            "refineries": len(self.refineries),
+            "ports": len(self.ports),
+            "tanker_classes": len(self.tanker_classes),
+            "tankers": len(self.tankers),
+        }
+
+    @classmethod
+    def from_dicts(cls, costs, prices, capacities, monthly_supply_quotas, demands,
+                   tanker_rates, tankers_capicity_in_barrels, port_charges, fuel_costs,
+                   shipping_times_in_days, crude_to_port, crude_to_tanker_type,
+                   quantities_per_destination):
+        # Build the arrays from the nested dict layout used by the model scripts.
+        # Missing entries (e.g. a product with no demand at a refinery) become 0.
+        crudes = tuple(costs["crude"])
+        products = tuple(prices)
+        refineries = tuple(capacities)
+        ports = tuple(port_charges)
+        tanker_classes = tuple(tankers_capicity_in_barrels)
+        tankers = tuple(t for cls_tankers in tankers_capicity_in_barrels.values() for t in cls_tankers)
+
+        class_idx = _index(tanker_classes)
+        port_idx = _index(ports)
+
+        tanker_class = np.array(
+            [class_idx[k] for k, cls_tankers in tankers_capicity_in_barrels.items() for _ in cls_tankers],
+            dtype=np.int64)
+        tanker_capacity = np.array(
+            [cap for cls_tankers in tankers_capicity_in_barrels.values() for cap in cls_tankers.values()],
+            dtype=float)
+        tanker_rate = np.array(
+            [tanker_rates.get(k, {}).get(t, 0) for k, cls_tankers in tankers_capicity_in_barrels.items()
+             for t in cls_tankers],
+            dtype=float)
+
+        return cls(
+            crudes=crudes,
+            products=products,
+            refineries=refineries,
+            ports=ports,
+            tanker_classes=tanker_classes,
+            tankers=tankers,
+            processing_cost=float(costs["processing"]),
+            crude_cost=np.array([costs["crude"][c] for c in crudes], dtype=float),
+            price=np.array([prices[p] for p in products], dtype=float),
+            capacity=np.array([capacities[r] for r in refineries], dtype=float),
+            quota=np.array([monthly_supply_quotas.get(c, np.inf) for c in crudes], dtype=float),
+            demand=np.array([[demands.get(p, {}).get(r, 0) for r in refineries] for p in products],
+                            dtype=float).reshape(len(products), len(refineries)),
+            tanker_class=tanker_class,
+            tanker_capacity=tanker_capacity,
+            tanker_rate=tanker_rate,
+            port_charge=np.array([[port_charges[o].get(k, 0) for k in tanker_classes] for o in ports],
+                                 dtype=float).reshape(len(ports), len(tanker_classes)),
+            fuel_cost=np.array([fuel_costs.get(k, 0) for k in tanker_classes], dtype=float),
+            shipping_days=np.array([[shipping_times_in_days.get(o, {}).get(r, 0) for r in refineries]
+                                    for o in ports], dtype=float).reshape(len(ports), len(refineries)),
+            crude_port=np.array([port_idx[crude_to_port[c]] for c in crudes], dtype=np.int64),
+            crude_class=np.array([class_idx[crude_to_tanker_type[c]] for c in crudes], dtype=np.int64),
+            delivery=np.array([quantities_per_destination.get(r, 0) for r in refineries], dtype=float),
+        )
+
+
+@lru_cache(maxsize=None)
+def load_network():
+    # The repo's ABSA Oil instance, built once per process
+    return NetworkData.from_dicts(
+        costs, prices, capacities, monthly_supply_quotas, demands,
+        tanker_rates, tankers_capicity_in_barrels, port_charges, fuel_costs,
+        shipping_times_in_days, crude_to_port, crude_to_tanker_type,
+        quantities_per_destination)
@@ -0,0 +1,181 @@
+# Seeded generator of synthetic ABSA Oil networks of any size
+#
+# Every instance has the entities the models use (crude costs, product prices,
+# refinery capacities and demands, quotas, a tanker fleet per class with capacities
+# and rates, port charges, fuel costs and shipping days), drawn around the
+# magnitudes of the real instance, and is consistent by construction:
+#   - each refinery's demand fits its capacity, and C * min(quota) covers the total
+#     demand, so MODEL 1 is feasible and the quotas still bind;
+#   - like Sample.dat, crude c ships from port c in tanker class c, and each port
+#     delivers its 1:1 share of a refinery's capacity;
+#   - there are at least ports * refineries tankers big enough for any delivery, so
+#     Model 3 always has an assignment.
+#
+# generate_network() returns a NetworkData; write_dat() writes it in the indexed
+# OPL layout of Sample.dat, which opl_data.network_from_dat() reads back.
+#
+#   python network_generator.py [scale] [out.dat] [seed]
+
+import math
+import sys
+
+import numpy as np
+
+from network_data import NetworkData
+
+# The real instance: 4 crudes x 6 products x 4 refineries, 24 tankers
+BASE_SIZES = {"crudes": 4, "products": 6, "refineries": 4, "tankers": 24}
+
+# Sample.dat keeps per-day fuel consumption; NetworkData keeps it per hour
+_HOURS = 24
+
+
+def scaled_sizes(scale):
+    # Entity counts for `scale` times the real instance. Crudes, products and
+    # refineries each grow by the cube root of scale, so the product x refinery x
+    # crude size grows by scale; the fleet grows with the port-destination pairs it
+    # has to serve.
+    factor = scale ** (1 / 3)
+    sizes = {name: max(1, round(BASE_SIZES[name] * factor)) for name in ("crudes", "products", "refineries")}
+    pairs = sizes["crudes"] * sizes["refineries"]
+    sizes["tankers"] = max(BASE_SIZES["tankers"], math.ceil(1.5 * pairs))
+    return sizes
+
+
+def generate_network(scale=1, seed=0, crudes=None, products=None, refineries=None, tankers=None):
+    # A random network of scaled_sizes(scale); explicit counts override the scale
+    sizes = scaled_sizes(scale)
+    for name, value in (("crudes", crudes), ("products", products), ("refineries", refineries),
+                        ("tankers", tankers)):
+        if value is not None:
+            sizes[name] = int(value)
+    n_crudes, n_products, n_refineries, n_tankers = (sizes[k] for k in ("crudes", "products", "refineries",
+                                                                        "tankers"))
+    if n_tankers < n_crudes * n_refineries:
+        raise ValueError(f"{n_tankers} tankers cannot serve {n_crudes} ports x {n_refineries} refineries")
+    rng = np.random.default_rng(seed)
+
+    capacity = rng.uniform(400_000, 735_000, n_refineries).round(-3)
+    # Demand fills 50-80% of each refinery, split over the products at random
+    share = rng.dirichlet(np.ones(n_products), n_refineries).T
+    demand = (share * capacity * rng.uniform(0.5, 0.8, n_refineries)).round()
+    # Quotas cover the total demand with 5-30% to spare at the tightest crude
+    quota = (demand.sum() / n_crudes * rng.uniform(1.05, 1.3, n_crudes)).round(-3)
+
+    # Each port ships its 1:1 share of 75-100% of the refinery's capacity
+    delivery = (capacity / n_crudes * rng.uniform(0.75, 1.0, n_refineries)).round(-2)
+
+    # One tanker class per crude, tankers ordered by class. A random ports x
+    # refineries subset is large enough for any delivery; the rest range from small
+    # coastal tankers to very large carriers.
+    tanker_class = np.sort(np.concatenate([np.arange(n_crudes),
+                                           rng.integers(0, n_crudes, n_tankers - n_crudes)]))
+    tanker_capacity = delivery.max() * rng.uniform(0.3, 3.0, n_tankers)
+    large = rng.choice(n_tankers, n_crudes * n_refineries, replace=False)
+    tanker_capacity[large] = delivery.max() * rng.uniform(1.0, 3.0, len(large))
+    tanker_capacity = tanker_capacity.round(-2)
+    tanker_rate = (10_000 + 0.03 * tanker_capacity * rng.uniform(0.8, 1.2, n_tankers)).round(-3)
+
+    return NetworkData(
+        crudes=tuple(f"Crude {i + 1}" for i in range(n_crudes)),
+        products=tuple(f"Product {i + 1}" for i in range(n_products)),
+        refineries=tuple(f"Refinery {i + 1}" for i in range(n_refineries)),
+        ports=tuple(f"Port {i + 1}" for i in range(n_crudes)),
+        tanker_classes=tuple(f"Class {i + 1}" for i in range(n_crudes)),
+        tankers=tuple(f"Tanker {i + 1}" for i in range(n_tankers)),
+        processing_cost=19.0,
+        crude_cost=rng.uniform(35, 71, n_crudes).round(2),
+        price=rng.uniform(60, 102, n_products).round(2),
+        capacity=capacity,
+        quota=quota,
+        demand=demand,
+        tanker_class=tanker_class,
+        tanker_capacity=tanker_capacity,
+        tanker_rate=tanker_rate,
+        port_charge=rng.uniform(109_000, 177_000, (n_crudes, n_crudes)).round(-3),
+        fuel_cost=rng.uniform(60_000, 78_000, n_crudes).round() / _HOURS,
+        shipping_days=rng.integers(2, 21, (n_crudes, n_refineries)).astype(float),
+        crude_port=np.arange(n_crudes, dtype=np.int64),
+        crude_class=np.arange(n_crudes, dtype=np.int64),
+        delivery=delivery,
+    )
+
+
+def _format(value):
+    # OPL literal of a scalar, list or nested list; floats keep full precision
+    if isinstance(value, np.ndarray):
+        value = value.tolist()
+    if isinstance(value, (list, tuple)):
+        return "[" + ", ".join(_format(v) for v in value) + "]"
+    if isinstance(value, str):
+        return '"' + value.replace('"', '\\"') + '"'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _names(names):
+    return "{" + ", ".join(_format(name) for name in names) + "}"
+
+
+def dat_lines(net):
+    # The Sample.dat layout of net, one "name = value;" entry per line. Tanker data
+    # is one row per class, padded with 0 like tanker_dwt_barrels in Sample.dat.
+    if not (np.array_equal(net.crude_port, np.arange(len(net.crudes)))
+            and np.array_equal(net.crude_class, np.arange(len(net.crudes)) % len(net.tanker_classes))):
+        raise ValueError("the Sample.dat layout ships crude c from port c in tanker class c")
+    if np.any(np.diff(net.tanker_class) < 0):
+        raise ValueError("the Sample.dat layout needs the tankers ordered by class")
+    n_classes = len(net.tanker_classes)
+    per_class = np.bincount(net.tanker_class, minlength=n_classes)
+    slot = np.arange(len(net.tankers)) - np.repeat(np.cumsum(per_class) - per_class, per_class)
+    dwt = np.zeros((n_classes, per_class.max()))
+    rate = np.zeros_like(dwt)
+    dwt[net.tanker_class, slot] = net.tanker_capacity
+    rate[net.tanker_class, slot] = net.tanker_rate
+
+    entries = [
+        ("types_of_crudeoils", len(net.crudes)),
+        ("product_names", len(net.products)),
+        ("num_of_refineries", len(net.refineries)),
+        ("crude_oil_price", net.crude_cost),
+        ("product_price", net.price),
+        ("oil_quota", net.quota),
+        ("product_demand_individual", net.demand.T),
+        ("total_product_demand", net.demand.sum(axis=1)),
+        ("refinery_capacity", net.capacity),
+        ("total_tanker_vessels", n_classes),
+        ("total_tanker_vessels_ships", dwt.shape[1]),
+        ("tanker_dwt_barrels", dwt),
+        ("tanker_price", rate),
+        ("fuel_consumptions_perday", net.fuel_cost * _HOURS),
+        ("trip_days", net.shipping_days),
+        ("port_charges", net.port_charge),
+        ("processing_cost", net.processing_cost),
+        ("delivery", net.delivery),
+    ]
+    lines = [f"{name} = {_format(value)};" for name, value in entries]
+    for name, names in (("Crudes", net.crudes), ("Products", net.products), ("Refineries", net.refineries),
+                        ("Ports", net.ports), ("TankerClasses", net.tanker_classes), ("Tankers", net.tankers)):
+        lines.append(f"{name} = {_names(names)};")
+    return lines
+
+
+def write_dat(net, path):
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.writelines(line + "\n" for line in dat_lines(net))
+
+
+def main(scale=1.0, path=None, seed=0):
+    net = generate_network(scale, seed)
+    if path:
+        write_dat(net, path)
+    print(", ".join(f"{len(getattr(net, name))} {name}" for name in ("crudes", "products", "refineries", "tankers")))
+    print(f"MODEL 1 variables: {len(net.crudes) + net.demand.size}, "
+          f"Model 3 routes: {len(net.ports) * len(net.tankers) * len(net.refineries)}")
+
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 1.0,
+         sys.argv[2] if len(sys.argv) > 2 else None,
+         int(sys.argv[3]) if len(sys.argv) > 3 else 0)
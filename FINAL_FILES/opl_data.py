@@ -0,0 +1,283 @@
+# Reader for the OPL .dat files the planners maintain (Sample.dat, CODE/SAMPLE.dat,
+# CODE/Cplex_Data.txt)
+#
+# The file is tokenised line by line and parsed into NumPy arrays:
+#   name = 19;                          -> int / float
+#   name = [1, 2.5, 3];                 -> 1-D array
+#   name = [[1, 2], [3, 4]];            -> 2-D array
+#   name = {"a", "b"};                  -> 1-D array of str
+#   name = {<"a", 57>, <"b", 48>};      -> structured array with fields f0, f1, ...
+#   name = 1..4;  name = [0, 2..4];     -> integer ranges, expanded in place
+# Lines whose first non-blank character is # are skipped as well. That is not OPL
+# syntax (oplrun rejects it): CODE/Cplex_Data.txt uses such lines as section
+# headings, and the reader accepts them so that file loads as it is kept. A # later
+# in a line is still an error.
+# The parsed result is cached in a binary .npz sidecar next to the .dat file, keyed
+# by the SHA-256 of its contents and PARSER_VERSION, so unchanged files load
+# without re-parsing.
+
+import glob
+import hashlib
+import json
+import os
+import re
+
+import numpy as np
+
+from network_data import NetworkData
+
+# Bump when the parser output changes for some input; it is part of the cache key
+PARSER_VERSION = 2
+
+_TOKEN = re.compile(r'''
+    (?P<string>"(?:[^"\\]|\\.)*")
+  | (?P<range>\.\.)
+  | (?P<number>[-+]?(?:\d+(?:\.(?!\.)\d*)?|\.\d+)(?:[eE][-+]?\d+)?)
+  | (?P<name>[A-Za-z_][A-Za-z0-9_]*)
+  | (?P<punct>[\[\]{}<>,;=:])
+  | (?P<space>\s+)
+  | (?P<error>.)
+''', re.VERBOSE)
+
+
+class OplDataError(ValueError):
+    pass
+
+
+def _tokens(lines):
+    # Yield (kind, value, line_number), skipping // and /* */ comments and the
+    # #-heading lines of CODE/Cplex_Data.txt (see the header)
+    in_block = False
+    for lineno, line in enumerate(lines, 1):
+        pos = 0
+        if in_block:
+            end = line.find("*/")
+            if end < 0:
+                continue
+            pos = end + 2
+            in_block = False
+        if line.lstrip().startswith("#"):
+            continue
+        while pos < len(line):
+            if line.startswith("//", pos):
+                break
+            if line.startswith("/*", pos):
+                end = line.find("*/", pos + 2)
+                if end < 0:
+                    in_block = True
+                    break
+                pos = end + 2
+                continue
+            match = _TOKEN.match(line, pos)
+            kind = match.lastgroup
+            pos = match.end()
+            if kind == "space":
+                continue
+            if kind == "error":
+                raise OplDataError(f"line {lineno}: unexpected character {match.group()!r}")
+            value = match.group()
+            if kind == "string":
+                value = value[1:-1].replace('\\"', '"')
+            elif kind == "number":
+                value = float(value) if any(ch in value for ch in ".eE") else int(value)
+            yield kind, value, lineno
+
+
+class _Parser:
+    _CLOSE = {"[": "]", "{": "}", "<": ">"}
+
+    def __init__(self, tokens):
+        self._tokens = tokens
+        self._peek = next(tokens, None)
+
+    def _next(self):
+        token = self._peek
+        if token is None:
+            raise OplDataError("unexpected end of file")
+        self._peek = next(self._tokens, None)
+        return token
+
+    def _expect(self, punct):
+        kind, value, lineno = self._next()
+        if kind != "punct" or value != punct:
+            raise OplDataError(f"line {lineno}: expected {punct!r}, found {value!r}")
+
+    def _value(self):
+        kind, value, lineno = self._next()
+        if kind == "number" and self._peek and self._peek[0] == "range":
+            self._next()
+            end_kind, end, _ = self._next()
+            if end_kind != "number" or not isinstance(value, int) or not isinstance(end, int):
+                raise OplDataError(f"line {lineno}: a range needs integer bounds, found {value!r}..{end!r}")
+            return _Range(range(value, end + 1))
+        if kind in ("number", "string"):
+            return value
+        if kind == "punct" and value in self._CLOSE:
+            close = self._CLOSE[value]
+            items = []
+            while not (self._peek and self._peek[0] == "punct" and self._peek[1] == close):
+                item = self._value()
+                if isinstance(item, _Range):
+                    items.extend(item)
+                else:
+                    items.append(item)
+                if self._peek and self._peek[0] == "punct" and self._peek[1] == ",":
+                    self._next()
+            self._expect(close)
+            if value == "<":
+                return tuple(items)
+            if value == "{":
+                return _Set(items)
+            return items
+        raise OplDataError(f"line {lineno}: unexpected {value!r}")
+
+    def entries(self):
+        while self._peek is not None:
+            kind, name, lineno = self._next()
+            if kind != "name":
+                raise OplDataError(f"line {lineno}: expected a name, found {name!r}")
+            self._expect("=")
+            value = self._value()
+            self._expect(";")
+            yield name, value
+
+
+class _Set(list):
+    pass
+
+
+class _Range(list):
+    pass
+
+
+def _column_dtype(column):
+    if all(isinstance(v, int) for v in column):
+        return np.int64
+    if all(isinstance(v, (int, float)) for v in column):
+        return np.float64
+    return np.array([str(v) for v in column]).dtype
+
+
+def _to_numpy(value):
+    if isinstance(value, (int, float)):
+        return value
+    if isinstance(value, _Set) and value and isinstance(value[0], tuple):
+        width = len(value[0])
+        if any(len(row) != width for row in value):
+            raise OplDataError("tuple set rows have different lengths")
+        columns = list(zip(*value))
+        dtype = [(f"f{i}", _column_dtype(col)) for i, col in enumerate(columns)]
+        return np.array([tuple(row) for row in value], dtype=dtype)
+    try:
+        return np.array(value)
+    except ValueError:
+        raise OplDataError("ragged arrays are not supported") from None
+
+
+def parse_dat(lines):
+    # Parse an iterable of .dat lines into {name: int | float | np.ndarray}
+    return {name: _to_numpy(value) for name, value in _Parser(_tokens(lines)).entries()}
+
+
+def _file_hash(path):
+    # Contents plus PARSER_VERSION, so sidecars of an older parser are not reused
+    digest = hashlib.sha256(f"opl_data v{PARSER_VERSION}\n".encode())
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def _sidecar(path, digest):
+    return f"{path}.{digest}.npz"
+
+
+def _write_cache(path, digest, data):
+    scalars = {k: v for k, v in data.items() if not isinstance(v, np.ndarray)}
+    arrays = {k: v for k, v in data.items() if isinstance(v, np.ndarray)}
+    target = _sidecar(path, digest)
+    tmp = target + ".tmp"
+    try:
+        with open(tmp, "wb") as fh:
+            np.savez(fh, __scalars__=np.array(json.dumps(scalars)), **arrays)
+        os.replace(tmp, target)
+    except OSError:
+        # A read-only data directory only costs us the cache
+        return
+    for stale in glob.glob(glob.escape(path) + ".*.npz"):
+        if stale != target:
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+
+
+def _read_cache(path, digest):
+    with np.load(_sidecar(path, digest), allow_pickle=False) as cached:
+        data = json.loads(cached["__scalars__"].item())
+        data.update({k: cached[k] for k in cached.files if k != "__scalars__"})
+    return data
+
+
+def load_dat(path, cache=True):
+    # Load an OPL .dat file, reusing the sidecar cache when the contents are unchanged
+    path = os.fspath(path)
+    digest = _file_hash(path) if cache else None
+    if cache and os.path.exists(_sidecar(path, digest)):
+        return _read_cache(path, digest)
+    with open(path, encoding="utf-8") as fh:
+        data = parse_dat(fh)
+    if cache:
+        _write_cache(path, digest, data)
+    return data
+
+
+def _names(data, key, prefix, count):
+    if key in data:
+        return tuple(str(v) for v in data[key])
+    return tuple(f"{prefix} {i + 1}" for i in range(count))
+
+
+def network_from_dat(data, processing_cost=19, delivery=None):
+    # Build a NetworkData from the indexed layout of Sample.dat. Crude o is shipped
+    # from port o in tanker class o; rows of tanker_dwt_barrels are padded with 0.
+    crude_cost = np.asarray(data["crude_oil_price"], dtype=float)
+    price = np.asarray(data["product_price"], dtype=float)
+    capacity = np.asarray(data["refinery_capacity"], dtype=float)
+    dwt = np.asarray(data["tanker_dwt_barrels"], dtype=float)
+    rate = np.asarray(data["tanker_price"], dtype=float)
+    n_crudes, n_products, n_refineries, n_classes = len(crude_cost), len(price), len(capacity), dwt.shape[0]
+
+    class_of, ship_of = np.nonzero(dwt > 0)
+    crudes = _names(data, "Crudes", "Crude", n_crudes)
+    classes = _names(data, "TankerClasses", "Class", n_classes)
+    if "Tankers" in data and len(data["Tankers"]) == len(class_of):
+        tankers = tuple(str(v) for v in data["Tankers"])
+    else:
+        tankers = tuple(f"{classes[k]} {s + 1}" for k, s in zip(class_of, ship_of))
+    if delivery is None:
+        delivery = data.get("delivery", np.zeros(n_refineries))
+
+    return NetworkData(
+        crudes=crudes,
+        products=_names(data, "Products", "Product", n_products),
+        refineries=_names(data, "Refineries", "Refinery", n_refineries),
+        ports=_names(data, "Ports", "Port", n_crudes),
+        tanker_classes=classes,
+        tankers=tankers,
+        processing_cost=float(data.get("processing_cost", processing_cost)),
+        crude_cost=crude_cost,
+        price=price,
+        capacity=capacity,
+        quota=np.asarray(data["oil_quota"], dtype=float),
+        demand=np.asarray(data["product_demand_individual"], dtype=float).T.copy(),
+        tanker_class=class_of.astype(np.int64),
+        tanker_capacity=dwt[class_of, ship_of],
+        tanker_rate=rate[class_of, ship_of],
+        port_charge=np.asarray(data["port_charges"], dtype=float),
+        fuel_cost=np.asarray(data["fuel_consumptions_perday"], dtype=float) / 24,
+        shipping_days=np.asarray(data["trip_days"], dtype=float),
+        crude_port=np.arange(n_crudes, dtype=np.int64),
+        crude_class=np.arange(n_crudes, dtype=np.int64) % n_classes,
+        delivery=np.asarray(delivery, dtype=float),
+    )
@@ -0,0 +1,433 @@
+# Profit model (MODEL 1 / MODEL 2) built two ways
+#
+# build_docplex_model() is the original formulation: one docplex expression and one
+# mdl.add_constraint() per row. build_profit_lp() emits the same LP as sparse CSR
+# matrices plus bound vectors, which any backend in solvers.py can load in bulk.
+# solve_closed_form() solves the same model directly from its structure, and
+# ProfitModel keeps one loaded model for incremental what-if updates.
+#
+# Variable layout of the matrix form:
+#   x[0:C]                       purchase of each crude
+#   x[C + p * R + r]             production of product p at refinery r
+#
+# Constraint 1 forces production >= demand, so the discounted revenue
+# min(x, d) * price + max(x - d, 0) * price * 0.93 is exactly the linear
+# 0.93 * price * x + 0.07 * price * d. The matrix form uses that identity, and
+# the docplex form can use the equivalent in_demand/excess split (revenue_form).
+
+import dataclasses
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import scipy.sparse as sp
+
+from solvers import CplexBackend, get_backend, solve
+from telemetry import NO_TELEMETRY
+
+# Excess production above demand is sold at this fraction of the list price
+DISCOUNT = 0.93
+
+
+@dataclass
+class ProfitSolution:
+    objective: float
+    purchase: np.ndarray      # (crudes,)
+    production: np.ndarray    # (products, refineries)
+    status: str = "optimal"
+
+
+@dataclass
+class ProfitLP:
+    sense: str                # "max" or "min"
+    c: np.ndarray             # objective coefficients
+    offset: float             # constant part of the objective
+    A: sp.csr_matrix          # constraint matrix, one row per constraint
+    senses: np.ndarray        # "L", "G" or "E" per row
+    rhs: np.ndarray
+    lb: np.ndarray
+    ub: np.ndarray
+    rows: dict                # constraint family -> slice of rows
+    shape: tuple              # (crudes, products, refineries)
+    demand_cells: np.ndarray = None  # flat p * R + r cell of each demand row
+    model_file: str = None    # saved solver model, set by model_cache.ModelCache
+
+    @property
+    def num_vars(self):
+        return self.A.shape[1]
+
+    @property
+    def num_rows(self):
+        return self.A.shape[0]
+
+    def split(self, x):
+        # Decision vector -> (purchase, production)
+        n_crudes, n_products, n_refineries = self.shape
+        return x[:n_crudes], x[n_crudes:].reshape(n_products, n_refineries)
+
+    def solution(self, x, status="optimal"):
+        purchase, production = self.split(np.asarray(x, dtype=float))
+        return ProfitSolution(float(self.c @ x + self.offset), purchase.copy(), production.copy(), status)
+
+
+def build_docplex_model(net, sense="max", revenue_form="split"):
+    # The formulation of MODEL 1 / MODEL 2, one constraint at a time.
+    #
+    # revenue_form="minmax" is the original discounted_revenue() with mdl.max/mdl.min,
+    # which docplex turns into logical constraints and so solves as a MIP.
+    # revenue_form="split" writes production = in_demand + excess with
+    # in_demand <= demand, and keeps the model a pure LP with the same optimum.
+    from docplex.mp.model import Model
+
+    if revenue_form not in ("split", "minmax"):
+        raise ValueError(f"unknown revenue_form {revenue_form!r}")
+
+    mdl = Model("ABSA_Oil")
+    purchase_vars = mdl.continuous_var_dict(net.crudes, name="purchase")
+    production_vars = mdl.continuous_var_matrix(net.products, net.refineries, name="produce")
+
+    def discounted_revenue(production, demand, price):
+        # Calculate excess production
+        excess = mdl.max(production - demand, 0)
+        # Calculate revenue for production up to demand
+        regular_revenue = mdl.min(production, demand) * price
+        # Calculate revenue for excess production at a discounted rate
+        excess_revenue = excess * price * DISCOUNT
+        return regular_revenue + excess_revenue
+
+    products = range(len(net.products))
+    refineries = range(len(net.refineries))
+    if revenue_form == "minmax":
+        revenue = mdl.sum(discounted_revenue(production_vars[net.products[p], net.refineries[r]],
+                                             float(net.demand[p, r]), float(net.price[p]))
+                          for p in products for r in refineries)
+    else:
+        # Maximising fills in_demand first because it earns the full price. When
+        # minimising, that order is not guaranteed, so in_demand is fixed at demand.
+        # Constraint 1 already forces production >= demand, so both senses keep
+        # in_demand == min(production, demand).
+        keys = [(prod, ref) for prod in net.products for ref in net.refineries]
+        demand_ub = net.demand.ravel().tolist()
+        in_demand = mdl.continuous_var_dict(keys, ub=dict(zip(keys, demand_ub)), name="in_demand",
+                                            lb=dict(zip(keys, demand_ub)) if sense != "max" else 0)
+        excess = mdl.continuous_var_dict(keys, name="excess")
+        mdl.add_constraints(production_vars[k] == in_demand[k] + excess[k] for k in keys)
+        price = dict(zip(net.products, net.price.tolist()))
+        revenue = mdl.sum(price[k[0]] * (in_demand[k] + DISCOUNT * excess[k]) for k in keys)
+    crude_cost = mdl.sum(float(net.crude_cost[c]) * purchase_vars[crude] for c, crude in enumerate(net.crudes))
+    production_cost = mdl.sum(net.processing_cost * v for v in production_vars.values())
+    if sense == "max":
+        mdl.maximize(revenue - crude_cost - production_cost)
+    else:
+        mdl.minimize(revenue - crude_cost - production_cost)
+
+    # 1. Production meets or exceeds demand in each region for each product
+    for p in products:
+        for r in refineries:
+            if net.demand[p, r] > 0:
+                mdl.add_constraint(production_vars[net.products[p], net.refineries[r]] >= float(net.demand[p, r]))
+
+    # 2. Refinery capacities are not exceeded
+    for r, ref in enumerate(net.refineries):
+        mdl.add_constraint(mdl.sum(production_vars[prod, ref] for prod in net.products) <= float(net.capacity[r]))
+
+    # 3. Crude oil purchases and usage with a 1:1 ratio
+    total_crude_usage = mdl.sum(production_vars.values()) / len(net.crudes)
+    for crude in net.crudes:
+        mdl.add_constraint(purchase_vars[crude] == total_crude_usage)
+
+    # 4. Respecting the monthly supply quota for each crude type
+    for c, crude in enumerate(net.crudes):
+        mdl.add_constraint(purchase_vars[crude] <= float(net.quota[c]))
+
+    return mdl, purchase_vars, production_vars
+
+
+def solve_docplex(net, sense="max", revenue_form="split", telemetry=None, cache=None):
+    # telemetry: a telemetry.RunTelemetry to time the build, solve and extract phases.
+    # cache: a model_cache.ModelCache; the built model is saved there and later
+    # runs on the same data read it into CPLEX instead of rebuilding it.
+    telemetry = telemetry or NO_TELEMETRY
+    key = None if cache is None else cache.key("docplex", net, sense, revenue_form)
+    if key is not None and cache.has_model(key):
+        return _solve_model_file(net, sense, cache.model_file(key), telemetry)
+    with telemetry.phase("build"):
+        mdl, purchase_vars, production_vars = build_docplex_model(net, sense, revenue_form)
+        telemetry.count(variables=mdl.number_of_variables, constraints=mdl.number_of_constraints)
+        if key is not None:
+            cache.store_model(key, mdl.get_cplex())
+    with telemetry.phase("solve"):
+        solved = mdl.solve()
+        details = mdl.solve_details
+        telemetry.count(backend="docplex", solve_status=details.status, iterations=details.nb_iterations,
+                        nodes=details.nb_nodes_processed if details.problem_type.startswith("MILP") else None,
+                        mip_gap=details.mip_relative_gap if details.problem_type.startswith("MILP") else None)
+    if not solved:
+        return None
+    with telemetry.phase("extract"):
+        purchase = np.array([purchase_vars[crude].solution_value for crude in net.crudes])
+        production = np.array([[production_vars[prod, ref].solution_value for ref in net.refineries]
+                               for prod in net.products])
+        telemetry.count(objective=mdl.objective_value)
+    return ProfitSolution(mdl.objective_value, purchase, production)
+
+
+def _solve_model_file(net, sense, path, telemetry):
+    # solve_docplex() on a cached model file: docplex created the purchase columns
+    # first, then production in (product, refinery) order. MPS files hold a
+    # maximisation as the minimisation of the negated objective.
+    backend = CplexBackend()
+    with telemetry.phase("build"):
+        model = backend.read(path)
+        telemetry.count(variables=model.variables.get_num(), constraints=model.linear_constraints.get_num(),
+                        cached=True)
+    try:
+        with telemetry.phase("solve"):
+            status, x = backend.solve(model, None, [])
+            telemetry.count(backend="docplex", solve_status=status, **backend.stats(model, None))
+        if x is None:
+            return None
+        with telemetry.phase("extract"):
+            n_crudes, (n_products, n_refineries) = len(net.crudes), net.demand.shape
+            objective = model.solution.get_objective_value()
+            if (model.objective.get_sense() == model.objective.sense.maximize) != (sense == "max"):
+                objective = -objective
+            telemetry.count(objective=objective)
+            production = x[n_crudes:n_crudes + n_products * n_refineries].reshape(n_products, n_refineries)
+            return ProfitSolution(objective, x[:n_crudes].copy(), production.copy())
+    finally:
+        model.end()
+
+
+def build_profit_lp(net, sense="max", all_demand_rows=False, cache=None):
+    # The same model as build_docplex_model(), as one sparse matrix. Demand rows are
+    # only emitted where demand > 0 unless all_demand_rows, which keeps one row per
+    # (product, refinery) in p * R + r order so demands can change later.
+    # cache: a model_cache.ModelCache to reuse the matrix form (and, for CPLEX, the
+    # saved model file) of earlier builds on the same data.
+    if cache is not None:
+        key = cache.key("profit_lp", net, sense, all_demand_rows)
+        lp = cache.load_problem(key, ProfitLP)
+        return lp if lp is not None else cache.store_problem(key, build_profit_lp(net, sense, all_demand_rows))
+    n_crudes, n_products, n_refineries = len(net.crudes), len(net.products), len(net.refineries)
+    n_prod_vars = n_products * n_refineries
+    n_vars = n_crudes + n_prod_vars
+    prod_col = n_crudes + np.arange(n_prod_vars).reshape(n_products, n_refineries)
+
+    c = np.concatenate([-net.crude_cost,
+                        (DISCOUNT * net.price[:, None] - net.processing_cost
+                         + np.zeros((1, n_refineries))).ravel()])
+    offset = float((1 - DISCOUNT) * (net.price[:, None] * net.demand).sum())
+
+    # 1. Production meets or exceeds demand: x[p, r] >= d[p, r]
+    dem_p, dem_r = np.nonzero(net.demand > 0 if not all_demand_rows else np.ones(net.demand.shape, dtype=bool))
+    n_dem = len(dem_p)
+    demand_rows = (np.arange(n_dem), prod_col[dem_p, dem_r], np.ones(n_dem))
+
+    # 2. Refinery capacities: sum_p x[p, r] <= capacity[r]
+    cap_rows = (np.repeat(np.arange(n_refineries), n_products) + n_dem,
+                prod_col.T.ravel(), np.ones(n_prod_vars))
+
+    # 3. Equal crude split: purchase[c] - sum(x) / C == 0
+    base = n_dem + n_refineries
+    split_rows = (np.concatenate([base + np.arange(n_crudes), np.repeat(base + np.arange(n_crudes), n_prod_vars)]),
+                  np.concatenate([np.arange(n_crudes), np.tile(prod_col.ravel(), n_crudes)]),
+                  np.concatenate([np.ones(n_crudes), np.full(n_crudes * n_prod_vars, -1.0 / n_crudes)]))
+
+    # 4. Supply quota: purchase[c] <= quota[c]
+    base += n_crudes
+    quota_rows = (base + np.arange(n_crudes), np.arange(n_crudes), np.ones(n_crudes))
+
+    blocks = [demand_rows, cap_rows, split_rows, quota_rows]
+    row = np.concatenate([b[0] for b in blocks])
+    col = np.concatenate([b[1] for b in blocks])
+    val = np.concatenate([b[2] for b in blocks])
+    n_rows = base + n_crudes
+    A = sp.csr_matrix((val, (row, col)), shape=(n_rows, n_vars))
+
+    senses = np.array(["G"] * n_dem + ["L"] * n_refineries + ["E"] * n_crudes + ["L"] * n_crudes)
+    rhs = np.concatenate([net.demand[dem_p, dem_r], net.capacity, np.zeros(n_crudes), net.quota])
+    rows = {
+        "demand": slice(0, n_dem),
+        "capacity": slice(n_dem, n_dem + n_refineries),
+        "crude_split": slice(n_dem + n_refineries, base),
+        "quota": slice(base, n_rows),
+    }
+    return ProfitLP(sense, c, offset, A, senses, rhs.astype(float),
+                    np.zeros(n_vars), np.full(n_vars, np.inf), rows,
+                    (n_crudes, n_products, n_refineries), dem_p * n_refineries + dem_r)
+
+
+def load_cplex(lp):
+    # Load a ProfitLP into a fresh cplex.Cplex with one call per block
+    return CplexBackend().load(lp)
+
+
+def solve_profit_lp(lp, backend=None, telemetry=None):
+    # Solve the matrix form with a backend from solvers.BACKENDS ("cplex", "highs",
+    # "simplex"); None picks one at run time, see solvers.get_backend().
+    # telemetry: a telemetry.RunTelemetry to time the solve and extract phases
+    telemetry = telemetry or NO_TELEMETRY
+    telemetry.problem(lp)
+    with telemetry.phase("solve"):
+        result = solve(lp, backend)
+        telemetry.solve_result(result)
+    if result.x is None:
+        return None
+    with telemetry.phase("extract"):
+        return lp.solution(result.x, result.status)
+
+
+def solve_closed_form(net, sense="max"):
+    # Specialised solver for this exact formulation, no CPLEX involved.
+    #
+    # With the equal crude split, every barrel produced buys 1/C of each crude, so
+    # one extra barrel of product p anywhere is worth
+    #     0.93 * price[p] - processing - mean(crude_cost)
+    # independently of the refinery. Starting from production == demand, the optimum
+    # puts all spare refinery capacity into the single best product, filling the
+    # refineries in order until the tightest crude quota (C * min(quota) barrels in
+    # total) runs out. Returns None when the demand itself cannot be met.
+    n_crudes = len(net.crudes)
+    production = np.array(net.demand, dtype=float)
+    slack = net.capacity - production.sum(axis=0)
+    budget = n_crudes * net.quota.min() - production.sum()
+    if slack.min() < -1e-9 or budget < -1e-9:
+        return None
+
+    unit_margin = DISCOUNT * net.price - net.processing_cost
+    gain = unit_margin - net.crude_cost.mean()
+    if sense != "max":
+        gain = -gain
+    best = int(np.argmax(gain))
+    if gain[best] > 0 and budget > 0:
+        filled_before = np.concatenate(([0.0], np.cumsum(slack)[:-1]))
+        production[best] += np.clip(budget - filled_before, 0.0, slack)
+
+    total = production.sum()
+    objective = (unit_margin @ production.sum(axis=1) - net.crude_cost.sum() * total / n_crudes
+                 + (1 - DISCOUNT) * (net.price[:, None] * net.demand).sum())
+    return ProfitSolution(float(objective), np.full(n_crudes, total / n_crudes), production)
+
+
+def _updated(current, values, index):
+    # New copy of current with values applied: a full array, or {name: value} using
+    # index (name -> position, or (name, name) -> (row, column)). Returns the new
+    # array and the flat positions that changed.
+    new = np.array(current, dtype=float)
+    if isinstance(values, dict):
+        for key, value in values.items():
+            new[index(key)] = value
+    else:
+        values = np.asarray(values, dtype=float)
+        if values.shape != new.shape:
+            raise ValueError(f"expected shape {new.shape}, got {values.shape}")
+        new[...] = values
+    changed = np.flatnonzero(new.ravel() != np.asarray(current).ravel())
+    return new, changed
+
+
+class ProfitModel:
+    # Long-lived MODEL 1 / MODEL 2 for what-if questions. The LP is built and loaded
+    # once; update_prices() and update_crude_costs() only rewrite objective
+    # coefficients, and update_demands(), update_capacity() and update_quota() only
+    # right-hand sides, so CPLEX re-solves from the basis of the previous solve.
+    # Other backends keep the matrix form up to date and re-solve it from scratch.
+    #
+    #   model = ProfitModel(load_network())
+    #   model.solve()
+    #   model.update_prices({"Gasoline-92": 75.0})
+    #   model.solve()
+
+    def __init__(self, net, sense="max", backend=None):
+        self.net = net
+        self.lp = build_profit_lp(net, sense, all_demand_rows=True)
+        self.backend = get_backend(backend)
+        self._model = self.backend.load(self.lp) if self.backend.name == "cplex" else None
+        self.solve_time = None
+        self.status = None        # status of the last solve, also when it found no solution
+        self.iterations = None    # simplex iterations of the last solve (CPLEX only)
+
+    def _price_columns(self, price):
+        # Objective coefficients of the production columns for the given prices
+        n_refineries = len(self.net.refineries)
+        return np.repeat(DISCOUNT * price - self.net.processing_cost, n_refineries)
+
+    def _offset(self, price, demand):
+        return float((1 - DISCOUNT) * (price[:, None] * demand).sum())
+
+    def update_prices(self, prices):
+        # Product prices: an array over net.products or {product: price}
+        price, changed = _updated(self.net.price, prices, self.net.product_index.__getitem__)
+        if not len(changed):
+            return
+        n_crudes, n_refineries = len(self.net.crudes), len(self.net.refineries)
+        columns = (n_crudes + changed[:, None] * n_refineries + np.arange(n_refineries)).ravel()
+        self.lp.c[columns] = self._price_columns(price)[columns - n_crudes]
+        self.lp.offset = self._offset(price, self.net.demand)
+        self.net = dataclasses.replace(self.net, price=price)
+        if self._model is not None:
+            self._model.objective.set_linear(zip(columns.tolist(), self.lp.c[columns].tolist()))
+            self._model.objective.set_offset(self.lp.offset)
+
+    def update_crude_costs(self, costs):
+        # Crude oil prices: an array over net.crudes or {crude: cost}
+        crude_cost, changed = _updated(self.net.crude_cost, costs, self.net.crude_index.__getitem__)
+        if not len(changed):
+            return
+        self.lp.c[changed] = -crude_cost[changed]
+        self.net = dataclasses.replace(self.net, crude_cost=crude_cost)
+        if self._model is not None:
+            self._model.objective.set_linear(zip(changed.tolist(), self.lp.c[changed].tolist()))
+
+    def _set_rhs(self, family, changed, values):
+        rows = self.lp.rows[family].start + changed
+        self.lp.rhs[rows] = values
+        if self._model is not None:
+            self._model.linear_constraints.set_rhs(zip(rows.tolist(), np.asarray(values, dtype=float).tolist()))
+
+    def update_demands(self, demands):
+        # Demand: a (products, refineries) array or {(product, refinery): demand}
+        net = self.net
+        demand, changed = _updated(net.demand, demands,
+                                   lambda key: (net.product_index[key[0]], net.refinery_index[key[1]]))
+        if not len(changed):
+            return
+        self._set_rhs("demand", changed, demand.ravel()[changed])
+        self.lp.offset = self._offset(net.price, demand)
+        self.net = dataclasses.replace(net, demand=demand)
+        if self._model is not None:
+            self._model.objective.set_offset(self.lp.offset)
+
+    def update_capacity(self, capacity):
+        # Refinery capacity: an array over net.refineries or {refinery: capacity}
+        capacity, changed = _updated(self.net.capacity, capacity, self.net.refinery_index.__getitem__)
+        if len(changed):
+            self._set_rhs("capacity", changed, capacity[changed])
+            self.net = dataclasses.replace(self.net, capacity=capacity)
+
+    def update_quota(self, quota):
+        # Monthly supply quota: an array over net.crudes or {crude: quota}
+        quota, changed = _updated(self.net.quota, quota, self.net.crude_index.__getitem__)
+        if len(changed):
+            self._set_rhs("quota", changed, quota[changed])
+            self.net = dataclasses.replace(self.net, quota=quota)
+
+    def solve(self):
+        start = time.perf_counter()
+        if self._model is None:
+            result = solve(self.lp, self.backend.name)
+            status, x = result.status, result.x
+        else:
+            status, x = self.backend.solve(self._model, self.lp, [])
+            self.iterations = self._model.solution.progress.get_num_iterations()
+        self.solve_time = time.perf_counter() - start
+        self.status = status
+        if x is None:
+            return None
+        return self.lp.solution(x, status)
+
+    def close(self):
+        if self._model is not None:
+            self._model.end()
+            self._model = None
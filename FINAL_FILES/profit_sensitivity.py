@@ -0,0 +1,127 @@
+# LP sensitivity report for the profit model (MODEL 1 / MODEL 2)
+#
+# One CPLEX solve of the matrix form gives, for every column and row:
+#   variables     value, objective coefficient, reduced cost, and the range of the
+#                 objective coefficient over which the current basis stays optimal
+#   constraints   activity, right-hand side, dual (shadow price), and the range of
+#                 the right-hand side over which the current basis stays optimal
+# so "how far can a crude price move before the plan changes" is a lookup instead of
+# a series of re-solves. Ranging needs the simplex basis, so this uses the CPLEX
+# backend.
+#
+#   python profit_sensitivity.py [max|min] [out.csv]
+
+import csv
+import sys
+
+import numpy as np
+
+from network_data import load_network
+from profit_model import DISCOUNT, build_profit_lp
+from solvers import get_backend
+
+FIELDS = ("kind", "family", "name", "value", "current", "dual", "lower", "upper")
+
+
+def _labels(net, lp):
+    # (family, name) of every column and row of the matrix form
+    n_refineries = len(net.refineries)
+    columns = ([("purchase", crude) for crude in net.crudes]
+               + [("production", f"{prod} @ {ref}") for prod in net.products for ref in net.refineries])
+    rows = [None] * lp.num_rows
+    for family, span in lp.rows.items():
+        for i in range(span.start, span.stop):
+            k = i - span.start
+            if family == "demand":
+                p, r = divmod(int(lp.demand_cells[k]), n_refineries)
+                rows[i] = (family, f"{net.products[p]} @ {net.refineries[r]}")
+            elif family == "capacity":
+                rows[i] = (family, net.refineries[k])
+            else:
+                rows[i] = (family, net.crudes[k])
+    return columns, rows
+
+
+def profit_sensitivity(net, sense="max"):
+    # Solve the profit LP once and return its sensitivity table (a structured array
+    # with FIELDS, variables first), or None if the LP has no optimal solution
+    backend = get_backend("cplex")
+    lp = build_profit_lp(net, sense)
+    model = backend.load(lp)
+    try:
+        status, x = backend.solve(model, lp, [])
+        if status != "optimal":
+            return None
+        solution = model.solution
+        reduced = np.array(solution.get_reduced_costs())
+        duals = np.array(solution.get_dual_values())
+        activity = np.array(solution.get_activity_levels())
+        obj_range = np.array(solution.sensitivity.objective(), dtype=float).reshape(-1, 2)
+        rhs_range = np.array(solution.sensitivity.rhs(), dtype=float).reshape(-1, 2)
+    finally:
+        model.end()
+
+    columns, rows = _labels(net, lp)
+    labels = columns + rows
+    table = np.empty(len(labels), dtype=[
+        ("kind", "U10"), ("family", "U11"), ("name", np.array([name for _, name in labels]).dtype),
+        ("value", float), ("current", float), ("dual", float), ("lower", float), ("upper", float),
+    ])
+    n = lp.num_vars
+    table["kind"] = ["variable"] * n + ["constraint"] * lp.num_rows
+    table["family"] = [family for family, _ in labels]
+    table["name"] = [name for _, name in labels]
+    table["value"] = np.concatenate([x, activity])
+    table["current"] = np.concatenate([lp.c, lp.rhs])
+    table["dual"] = np.concatenate([reduced, duals])
+    ranges = np.concatenate([obj_range, rhs_range])
+    # CPLEX reports "unbounded" as +-1e20
+    ranges[np.abs(ranges) >= 1e20] = np.copysign(np.inf, ranges[np.abs(ranges) >= 1e20])
+    table["lower"], table["upper"] = ranges[:, 0], ranges[:, 1]
+    return table
+
+
+def crude_cost_ranges(table):
+    # {crude: (lowest, highest)} crude price that keeps the current plan optimal.
+    # The purchase column's objective coefficient is -crude_cost.
+    rows = table[table["family"] == "purchase"]
+    return {str(row["name"]): (-float(row["upper"]), -float(row["lower"])) for row in rows}
+
+
+def product_price_ranges(net, table):
+    # {(product, refinery): (lowest, highest)} price at which the production column
+    # of that refinery keeps its place in the plan, with the other refineries' prices
+    # unchanged. The column's coefficient is 0.93 * price - processing cost.
+    rows = table[table["family"] == "production"]
+    ranges = (np.column_stack([rows["lower"], rows["upper"]]) + net.processing_cost) / DISCOUNT
+    keys = [(prod, ref) for prod in net.products for ref in net.refineries]
+    return {key: (float(lo), float(hi)) for key, (lo, hi) in zip(keys, ranges)}
+
+
+def write_csv(table, path):
+    with open(path, "w", newline="", encoding="utf-8") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(FIELDS)
+        writer.writerows(table.tolist())
+
+
+def main(sense="max", path=None):
+    net = load_network()
+    table = profit_sensitivity(net, sense)
+    if table is None:
+        print("No optimal solution")
+        return
+    if path:
+        write_csv(table, path)
+        return
+    print(f"{'kind':<10} {'family':<11} {'name':<28} {'value':>14} {'current':>12} {'dual':>12} "
+          f"{'lower':>14} {'upper':>14}")
+    for row in table:
+        print(f"{row['kind']:<10} {row['family']:<11} {row['name']:<28} {row['value']:>14.2f} "
+              f"{row['current']:>12.2f} {row['dual']:>12.4f} {row['lower']:>14.6g} {row['upper']:>14.6g}")
+    for crude, (lo, hi) in crude_cost_ranges(table).items():
+        print(f"{crude} price can move within [{lo:.6g}, {hi:.6g}] without changing the plan")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:3])
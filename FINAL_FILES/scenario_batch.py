@@ -0,0 +1,244 @@
+# Batch runner for price / demand scenarios against the MODEL 1 formulation
+#
+# A scenario table has one row per scenario and one column per overridden input,
+# named by family (anything not in the table keeps its load_network() value):
+#   scenario                     optional scenario id (default: row number)
+#   crude_cost:<crude>           price of a crude
+#   price:<product>              list price of a product
+#   demand:<product>:<refinery>  demand of a product at a refinery
+#   capacity:<refinery>          refinery capacity
+#   quota:<crude>                monthly supply quota of a crude
+#
+# Scenarios are cut into chunks and spread over a process pool. Every worker builds
+# one ProfitModel when it starts and applies each scenario as coefficient and
+# right-hand side updates. Results stream back in scenario order into one columnar
+# file: .csv, .npz, or .parquet (needs pyarrow). Tables can be read from .csv or
+# .parquet.
+#
+#   python scenario_batch.py scenarios.csv results.csv [--workers N] [--backend highs]
+
+import argparse
+import csv
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+
+from network_data import load_network
+from profit_model import ProfitModel
+
+# Column family -> (ProfitModel update method, NetworkData array, index of the names)
+FAMILIES = {
+    "crude_cost": ("update_crude_costs", "crude_cost", ("crude_index",)),
+    "price": ("update_prices", "price", ("product_index",)),
+    "demand": ("update_demands", "demand", ("product_index", "refinery_index")),
+    "capacity": ("update_capacity", "capacity", ("refinery_index",)),
+    "quota": ("update_quota", "quota", ("crude_index",)),
+}
+
+
+@dataclass
+class BatchReport:
+    scenarios: int
+    infeasible: int
+    unsolved: int             # scenarios without a solution, infeasible ones included
+    seconds: float
+    workers: int
+
+    @property
+    def throughput(self):
+        return self.scenarios / self.seconds if self.seconds else float("inf")
+
+    def __str__(self):
+        return (f"{self.scenarios} scenarios ({self.infeasible} infeasible, {self.unsolved} unsolved) "
+                f"in {self.seconds:.2f} s "
+                f"on {self.workers} worker(s): {self.throughput:.1f} scenarios/s")
+
+
+def read_scenarios(path):
+    # Scenario table -> (ids, column names, float values of shape (scenarios, columns))
+    path = os.fspath(path)
+    if path.endswith(".parquet"):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("reading Parquet scenario tables needs pyarrow") from None
+        table = pq.read_table(path)
+        columns = [name for name in table.column_names if name != "scenario"]
+        ids = (np.asarray(table.column("scenario").to_pylist(), dtype=str) if "scenario" in table.column_names
+               else np.arange(table.num_rows).astype(str))
+        values = np.column_stack([table.column(name).to_numpy().astype(float) for name in columns])
+        return ids, columns, values.reshape(table.num_rows, len(columns))
+
+    with open(path, newline="", encoding="utf-8") as fh:
+        reader = csv.reader(fh)
+        header = next(reader)
+        rows = [row for row in reader if row]
+    id_col = header.index("scenario") if "scenario" in header else None
+    value_cols = [i for i in range(len(header)) if i != id_col]
+    ids = (np.array([row[id_col] for row in rows]) if id_col is not None
+           else np.arange(len(rows)).astype(str))
+    values = np.array([[float(row[i]) for i in value_cols] for row in rows], dtype=float)
+    return ids, [header[i] for i in value_cols], values.reshape(len(rows), len(value_cols))
+
+
+def column_plan(net, columns):
+    # {family: (flat positions in the family's array, table column numbers)}
+    plan = {}
+    for col, name in enumerate(columns):
+        family, *keys = name.split(":")
+        if family not in FAMILIES or len(keys) != len(FAMILIES[family][2]):
+            raise ValueError(f"unknown scenario column {name!r}; expected one of "
+                             "crude_cost:<crude>, price:<product>, demand:<product>:<refinery>, "
+                             "capacity:<refinery>, quota:<crude>")
+        _, array, indexes = FAMILIES[family]
+        try:
+            position = [getattr(net, index)[key] for index, key in zip(indexes, keys)]
+        except KeyError as exc:
+            raise ValueError(f"scenario column {name!r}: unknown name {exc.args[0]!r}") from None
+        flat = int(np.ravel_multi_index(position, getattr(net, array).shape))
+        positions, cols = plan.setdefault(family, ([], []))
+        positions.append(flat)
+        cols.append(col)
+    return {family: (np.array(positions), np.array(cols)) for family, (positions, cols) in plan.items()}
+
+
+def result_columns(net):
+    return (["scenario", "status", "objective"]
+            + [f"purchase:{crude}" for crude in net.crudes]
+            + [f"production:{prod}:{ref}" for prod in net.products for ref in net.refineries])
+
+
+# Per-process state, set up once by _init_worker()
+_worker = {}
+
+
+def _init_worker(net, sense, backend, plan):
+    _worker.update(net=net, model=ProfitModel(net, sense, backend), plan=plan)
+
+
+def _solve_chunk(values):
+    # Solve each scenario row of values; returns (status, objective, decisions)
+    net, model, plan = _worker["net"], _worker["model"], _worker["plan"]
+    n_vars = model.lp.num_vars
+    status = np.empty(len(values), dtype=object)
+    objective = np.full(len(values), np.nan)
+    decisions = np.full((len(values), n_vars), np.nan)
+    for i, row in enumerate(values):
+        for family, (positions, cols) in plan.items():
+            method, array, _ = FAMILIES[family]
+            data = np.array(getattr(net, array), dtype=float)
+            data.flat[positions] = row[cols]
+            getattr(model, method)(data)
+        solution = model.solve()
+        status[i] = model.status
+        if solution is None:
+            continue
+        objective[i] = solution.objective
+        decisions[i] = np.concatenate([solution.purchase, solution.production.ravel()])
+    return status.astype(str), objective, decisions
+
+
+class _Writer:
+    # Columnar result sink: CSV and Parquet are written chunk by chunk, .npz at close
+    def __init__(self, path, columns):
+        self.path = os.fspath(path)
+        self.columns = columns
+        self._chunks = []
+        self._fh = self._parquet = None
+        if self.path.endswith(".csv"):
+            self._fh = open(self.path, "w", newline="", encoding="utf-8")
+            self._csv = csv.writer(self._fh)
+            self._csv.writerow(columns)
+        elif self.path.endswith(".parquet"):
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise ImportError("writing Parquet results needs pyarrow") from None
+        elif not self.path.endswith(".npz"):
+            raise ValueError(f"unsupported output format {self.path!r}; use .csv, .npz or .parquet")
+
+    def write(self, ids, status, objective, decisions):
+        if self._fh is not None:
+            for row in zip(ids.tolist(), status.tolist(), objective.tolist(), decisions.tolist()):
+                self._csv.writerow([row[0], row[1], row[2], *row[3]])
+        elif self.path.endswith(".parquet"):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            arrays = [pa.array(ids), pa.array(status), pa.array(objective)] + [pa.array(col) for col in decisions.T]
+            table = pa.Table.from_arrays(arrays, names=self.columns)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self.path, table.schema)
+            self._parquet.write_table(table)
+        else:
+            self._chunks.append((ids, status, objective, decisions))
+
+    def close(self):
+        if self._fh is not None:
+            self._fh.close()
+        elif self._parquet is not None:
+            self._parquet.close()
+        elif self.path.endswith(".npz"):
+            if self._chunks:
+                ids, status, objective, decisions = (np.concatenate(part) for part in zip(*self._chunks))
+            else:
+                ids = status = np.array([], dtype=str)
+                objective, decisions = np.array([]), np.empty((0, len(self.columns) - 3))
+            columns = {"scenario": ids, "status": status, "objective": objective}
+            columns.update(zip(self.columns[3:], decisions.T))
+            np.savez(self.path, **columns)
+
+
+def run_batch(scenarios, output, net=None, sense="max", backend=None, workers=None, chunk_size=64):
+    # Solve every scenario of the table at scenarios and write the results to output.
+    # workers=1 solves in this process; None uses one worker per CPU.
+    net = net or load_network()
+    ids, columns, values = read_scenarios(scenarios)
+    plan = column_plan(net, columns)
+    workers = workers or os.cpu_count() or 1
+    chunks = [slice(i, i + chunk_size) for i in range(0, len(values), chunk_size)]
+
+    writer = _Writer(output, result_columns(net))
+    infeasible = unsolved = 0
+    start = time.perf_counter()
+    try:
+        if workers == 1:
+            _init_worker(net, sense, backend, plan)
+            results = map(_solve_chunk, (values[chunk] for chunk in chunks))
+            for chunk, (status, objective, decisions) in zip(chunks, results):
+                writer.write(ids[chunk], status, objective, decisions)
+                infeasible += int((status == "infeasible").sum())
+                unsolved += int(np.isnan(objective).sum())
+        else:
+            with ProcessPoolExecutor(workers, initializer=_init_worker,
+                                     initargs=(net, sense, backend, plan)) as pool:
+                results = pool.map(_solve_chunk, (values[chunk] for chunk in chunks))
+                for chunk, (status, objective, decisions) in zip(chunks, results):
+                    writer.write(ids[chunk], status, objective, decisions)
+                    infeasible += int((status == "infeasible").sum())
+                    unsolved += int(np.isnan(objective).sum())
+    finally:
+        writer.close()
+    return BatchReport(len(values), infeasible, unsolved, time.perf_counter() - start, workers)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve a table of MODEL 1 scenarios in parallel.")
+    parser.add_argument("scenarios", help="scenario table (.csv or .parquet)")
+    parser.add_argument("output", help="results file (.csv, .npz or .parquet)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument("--chunk-size", type=int, default=64, help="scenarios per task")
+    parser.add_argument("--backend", default=None, help="solver backend (see solvers.py)")
+    parser.add_argument("--sense", choices=("max", "min"), default="max")
+    args = parser.parse_args(argv)
+    report = run_batch(args.scenarios, args.output, sense=args.sense, backend=args.backend,
+                       workers=args.workers, chunk_size=args.chunk_size)
+    print(report)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
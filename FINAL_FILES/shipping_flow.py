@@ -0,0 +1,240 @@
+# Split crude deliveries over several tankers and trips as a min-cost flow
+#
+# Model 3 sends exactly one tanker per (port, destination) pair. Here a pair's
+# quantity may be split over any number of tankers. The network is
+#
+#   source -> tanker t -> (port o, destination r) -> sink
+#
+# with capacity[t] * max_trips barrels available from each tanker, the pair's
+# quantity required at each (o, r) node, and a cost per barrel on the tanker -> pair
+# arcs. It is solved by successive shortest paths.
+#
+# Every started trip is charged in full and each tanker makes at most max_trips
+# trips, which a flow cannot express exactly, so the whole-trip plan is found
+# heuristically around repeated flow solves:
+#   slopes   the first solve charges route_cost[o, t, r] / min(capacity[t], q[r])
+#            per barrel, the trip cost over the most one trip can carry to the pair;
+#            each later round charges every used arc what it really cost per
+#            barrel in the previous round (whole trips / barrels shipped), so
+#            partial loads get dearer (dynamic slope scaling)
+#   repair   trips per arc are rounded up; a tanker with more than max_trips trips
+#            keeps its largest loads that fit in max_trips, its other arcs are
+#            removed and the flow is solved again
+# The cheapest repaired plan over at most MAX_ROUNDS solves is compared with the
+# one-tanker-per-pair assignment (shipping_model.solve_assignment() with
+# objective=route_cost, a valid plan whenever max_trips >= 1), and the cheaper of
+# the two is returned. It is not guaranteed to be the optimal whole-trip plan.
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from shipping_model import route_cost_tensor, solve_assignment
+
+_EPS = 1e-9
+
+# Flow solves (slope-scaling rounds and repairs) per call
+MAX_ROUNDS = 20
+
+
+@dataclass
+class FlowSolution:
+    objective: float          # cost of all trips, each started trip charged in full
+    shipped: np.ndarray       # barrels per (port, tanker, destination)
+    trips: np.ndarray         # whole trips per (port, tanker, destination)
+    routes: np.ndarray        # table of the used routes
+    augmentations: int        # shortest paths over all flow solves
+    engine: str               # "flow", or "assignment" when that plan was cheaper
+
+    @property
+    def trip_cost(self):
+        # Cost with every started trip charged in full
+        return float(self.routes["cost"].sum())
+
+
+def _shortest_paths(cost, flow, supply_left):
+    # Bellman-Ford over the bipartite residual graph. Tankers with supply left
+    # start at distance 0; forward arcs tanker -> pair cost cost[t, j], and backward
+    # arcs pair -> tanker exist where flow[t, j] > 0 with cost -cost[t, j]. Every
+    # round relaxes all arcs at once, and a shortest path visits each pair at most
+    # once, so pairs + 1 rounds are enough.
+    n_tankers, n_pairs = cost.shape
+    dist_t = np.where(supply_left > _EPS, 0.0, np.inf)
+    pred_t = np.full(n_tankers, -1)
+    dist_p = np.full(n_pairs, np.inf)
+    pred_p = np.full(n_pairs, -1)
+    has_flow = flow > _EPS
+    for _ in range(n_pairs + 1):
+        reach = dist_t[:, None] + cost
+        best_t = np.argmin(reach, axis=0)
+        best = reach[best_t, np.arange(n_pairs)]
+        better_p = best < dist_p - _EPS
+        dist_p[better_p] = best[better_p]
+        pred_p[better_p] = best_t[better_p]
+
+        with np.errstate(invalid="ignore"):
+            back = np.where(has_flow, dist_p[None, :] - cost, np.inf)
+        best_p = np.argmin(back, axis=1)
+        best = back[np.arange(n_tankers), best_p]
+        better_t = best < dist_t - _EPS
+        dist_t[better_t] = best[better_t]
+        pred_t[better_t] = best_p[better_t]
+        if not better_p.any() and not better_t.any():
+            break
+    return dist_p, pred_p, pred_t
+
+
+def min_cost_flow(cost, supply, demand):
+    # Transportation problem: ship demand[j] to each pair from tankers with
+    # supply[t], at cost[t, j] per unit (np.inf where the arc does not exist).
+    # Returns (flow, augmentations), or None if the demand cannot be met.
+    cost = np.asarray(cost, dtype=float)
+    flow = np.zeros(cost.shape)
+    supply_left = np.asarray(supply, dtype=float).copy()
+    demand_left = np.asarray(demand, dtype=float).copy()
+    augmentations = 0
+    while demand_left.max(initial=0.0) > _EPS:
+        dist_p, pred_p, pred_t = _shortest_paths(cost, flow, supply_left)
+        open_pairs = demand_left > _EPS
+        if not np.isfinite(dist_p[open_pairs]).any():
+            return None
+        j = int(np.flatnonzero(open_pairs)[np.argmin(dist_p[open_pairs])])
+
+        # Walk back to the tanker the path starts from
+        path = []
+        amount = demand_left[j]
+        pair = j
+        while True:
+            t = int(pred_p[pair])
+            path.append((t, pair))
+            back = int(pred_t[t])
+            if back < 0:
+                amount = min(amount, supply_left[t])
+                break
+            amount = min(amount, flow[t, back])
+            path.append((t, ~back))
+            pair = back
+
+        for t, arc in path:
+            if arc >= 0:
+                flow[t, arc] += amount
+            else:
+                flow[t, ~arc] -= amount
+        supply_left[path[-1][0]] -= amount
+        demand_left[j] -= amount
+        augmentations += 1
+    return flow, augmentations
+
+
+def _over_trips(trips, max_trips):
+    # Arcs (tanker, pair) to remove so that no tanker makes more than max_trips
+    # trips: each tanker over the limit keeps its largest loads while they fit
+    drop = []
+    for t in np.flatnonzero(trips.sum(axis=1) > max_trips):
+        pairs = np.flatnonzero(trips[t])
+        kept = 0
+        for j in pairs[np.argsort(-trips[t, pairs], kind="stable")]:
+            if kept + trips[t, j] <= max_trips:
+                kept += trips[t, j]
+            else:
+                drop.append((t, j))
+    return tuple(np.array(drop).T)
+
+
+def _spread(net, trips):
+    # Barrels per trip cell: each pair's quantity over its trips, larger tankers first
+    capacity = net.tanker_capacity
+    shipped = np.zeros(trips.shape)
+    order = np.argsort(-capacity, kind="stable")
+    for o, r in zip(*np.nonzero(trips.sum(axis=1))):
+        left = net.delivery[r]
+        for t in order:
+            if trips[o, t, r] and left > 0:
+                shipped[o, t, r] = min(left, capacity[t] * trips[o, t, r])
+                left -= shipped[o, t, r]
+    return shipped
+
+
+def _flow_plan(net, route_cost, max_trips):
+    # (shipped, trips, augmentations) of the cheapest repaired flow over the
+    # slope-scaling rounds, in (port, tanker, destination) layout, or None when no
+    # flow meets the deliveries within max_trips
+    n_ports, n_tankers, n_dest = route_cost.shape
+    capacity = net.tanker_capacity
+    demand = np.tile(net.delivery, n_ports)
+    pair_cost = route_cost.transpose(1, 0, 2).reshape(n_tankers, -1)
+
+    # First slopes: the trip cost over the most the trip can carry to the pair
+    load = np.minimum(capacity[:, None], demand[None, :])
+    first = np.full(pair_cost.shape, np.inf)
+    first[load > 0] = pair_cost[load > 0] / load[load > 0]
+    slope = first.copy()
+    removed = np.zeros(pair_cost.shape, dtype=bool)
+
+    best, augmentations = None, 0
+    for _ in range(MAX_ROUNDS):
+        result = min_cost_flow(np.where(removed, np.inf, slope), capacity * max_trips, demand)
+        if result is None:
+            break
+        flow, paths = result
+        augmentations += paths
+        flow = np.where(flow > _EPS, flow, 0.0)
+        used = flow > 0
+        trips = np.zeros(flow.shape, dtype=np.int64)
+        trips[used] = np.ceil(flow[used] / np.broadcast_to(capacity[:, None], flow.shape)[used] - _EPS)
+
+        drop = _over_trips(trips, max_trips)
+        if len(drop):
+            removed[drop] = True
+            continue
+        cost = float((trips * pair_cost).sum())
+        if best is None or cost < best[0]:
+            best = (cost, flow, trips)
+
+        # Next slopes: what each used arc really cost per barrel this round
+        new = first.copy()
+        new[used] = pair_cost[used] * trips[used] / flow[used]
+        if np.array_equal(new, slope):
+            break
+        slope = new
+    if best is None:
+        return None
+    _, flow, trips = best
+    return (flow.reshape(n_tankers, n_ports, n_dest).transpose(1, 0, 2),
+            trips.reshape(n_tankers, n_ports, n_dest).transpose(1, 0, 2), augmentations)
+
+
+def solve_split_deliveries(net, route_cost=None, max_trips=1):
+    # Deliver net.delivery[r] from every port to every destination, splitting each
+    # pair over as many tankers as needed, each tanker making at most max_trips trips
+    if route_cost is None:
+        route_cost, _ = route_cost_tensor(net)
+    plan = _flow_plan(net, route_cost, max_trips) if max_trips >= 1 else None
+    assignment = solve_assignment(net, route_cost, objective=route_cost) if max_trips >= 1 else None
+
+    engine, augmentations = "flow", 0
+    if plan is not None:
+        shipped, trips, augmentations = plan
+    if assignment is not None and (plan is None or float((trips * route_cost).sum()) > assignment.objective):
+        engine = "assignment"
+        trips = np.rint(assignment.values).astype(np.int64).reshape(route_cost.shape)
+        shipped = _spread(net, trips)
+    elif plan is None:
+        return None
+
+    used = trips > 0
+    t, o, r = np.nonzero(used.transpose(1, 0, 2))
+    ports, tankers = np.array(net.ports), np.array(net.tankers)
+    classes, refineries = np.array(net.tanker_classes), np.array(net.refineries)
+    routes = np.empty(len(t), dtype=[
+        ("port", ports.dtype), ("tanker", tankers.dtype), ("tanker_class", classes.dtype),
+        ("destination", refineries.dtype), ("quantity", float), ("trips", np.int64), ("cost", float),
+    ])
+    routes["port"] = ports[o]
+    routes["tanker"] = tankers[t]
+    routes["tanker_class"] = classes[net.tanker_class[t]]
+    routes["destination"] = refineries[r]
+    routes["quantity"] = shipped[o, t, r]
+    routes["trips"] = trips[o, t, r]
+    routes["cost"] = trips[o, t, r] * route_cost[o, t, r]
+    return FlowSolution(float(routes["cost"].sum()), shipped, trips, routes, augmentations, engine)
@@ -0,0 +1,426 @@
+# Shipping model (Model 3) building blocks
+#
+# Every (port, tanker, destination) route is one cell of a
+# ports x tankers x destinations tensor, in the same order as the model variables
+# (itertools.product(ports, tankers, destinations)), so cell [o, t, r] is variable
+# o * T * R + t * R + r.
+
+from dataclasses import dataclass
+from functools import cached_property
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.optimize import linear_sum_assignment
+
+from solvers import MatrixProblem, SolveResult, solve
+from telemetry import NO_TELEMETRY
+
+
+@dataclass
+class ShippingSolution:
+    objective: float
+    values: np.ndarray        # 0/1 per column, in route order
+    routes: np.ndarray        # decode_routes() table of the selected routes
+    engine: str               # "assignment" or "mip"
+    status: str = "optimal"
+    result: SolveResult = None  # backend timings and incumbents of the "mip" engine
+
+
+class RouteIndex:
+    # Integer layout of the Model 3 variables. CPLEX only ever sees column indices;
+    # the "Port_Tanker_Destination" names are built on first use, for LP export or
+    # debugging, and never parsed back.
+
+    def __init__(self, net):
+        self.net = net
+        self.shape = (len(net.ports), len(net.tankers), len(net.refineries))
+        self.size = self.shape[0] * self.shape[1] * self.shape[2]
+
+    def var(self, o, t, r):
+        # Column index of route (o, t, r); accepts scalars or arrays
+        return np.ravel_multi_index((o, t, r), self.shape)
+
+    def decode(self, index):
+        # Column index (or array of them) -> (port, tanker, destination) indices
+        return np.unravel_index(index, self.shape)
+
+    def grid(self):
+        # Column index of every route as a ports x tankers x destinations array
+        return np.arange(self.size).reshape(self.shape)
+
+    def name(self, index):
+        o, t, r = self.decode(index)
+        return f"{self.net.ports[o]}_{self.net.tankers[t]}_{self.net.refineries[r]}"
+
+    @cached_property
+    def names(self):
+        return [f"{port}_{tanker}_{destination}"
+                for port in self.net.ports for tanker in self.net.tankers for destination in self.net.refineries]
+
+
+def route_cost_tensor(net):
+    # Cost of sending tanker t from port o to refinery r:
+    #     rate[t] + port_charge[o, class(t)] + fuel_cost[class(t)] * days[o, r] * 24
+    # and the matching capacity tensor (a read-only broadcast view).
+    k = net.tanker_class
+    cost = (net.tanker_rate[None, :, None]
+            + net.port_charge[:, k][:, :, None]
+            + net.fuel_cost[k][None, :, None] * net.shipping_days[:, None, :] * 24)
+    capacity = np.broadcast_to(net.tanker_capacity[None, :, None], cost.shape)
+    return cost, capacity
+
+
+def home_port(net):
+    # Port each tanker sails from: the port of the crude its class carries (-1 if none)
+    class_port = np.full(len(net.tanker_classes), -1, dtype=np.int64)
+    class_port[net.crude_class] = net.crude_port
+    return class_port[net.tanker_class]
+
+
+def objective_tensor(net, cost):
+    # Objective coefficients of Model 3: the route cost plus the cost of the crude it
+    # carries, on the tanker's home port only. Routes from other ports cost 0.
+    class_crude = np.full(len(net.tanker_classes), -1, dtype=np.int64)
+    class_crude[net.crude_class] = np.arange(len(net.crudes))
+    crude = class_crude[net.tanker_class]
+    home = home_port(net)
+    crude_cost = np.where(crude >= 0, net.crude_cost[crude], 0.0)
+
+    objective = np.zeros_like(cost)
+    tankers = np.flatnonzero(home >= 0)
+    objective[home[tankers], tankers, :] = (cost[home[tankers], tankers, :]
+                                            + crude_cost[tankers, None] * net.delivery[None, :])
+    return objective
+
+
+class _MinTree:
+    # Segment tree over fixed positions holding (key, tanker) pairs; supports
+    # "smallest pair in positions [lo, n)" and removing a position, both O(log n).
+    _EMPTY = (np.inf, -1)
+
+    def __init__(self, keys, tankers):
+        self.n = len(keys)
+        self.size = 1
+        while self.size < max(self.n, 1):
+            self.size *= 2
+        self.tree = [self._EMPTY] * (2 * self.size)
+        self.tree[self.size:self.size + self.n] = list(zip(keys, tankers))
+        for i in range(self.size - 1, 0, -1):
+            self.tree[i] = min(self.tree[2 * i], self.tree[2 * i + 1])
+
+    def set(self, pos, value):
+        i = pos + self.size
+        self.tree[i] = value
+        i //= 2
+        while i:
+            self.tree[i] = min(self.tree[2 * i], self.tree[2 * i + 1])
+            i //= 2
+
+    def suffix_min(self, lo):
+        best = self._EMPTY
+        lo += self.size
+        hi = self.n + self.size
+        while lo < hi:
+            if lo & 1:
+                best = min(best, self.tree[lo])
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                best = min(best, self.tree[hi])
+            lo //= 2
+            hi //= 2
+        return best
+
+
+class FleetIndex:
+    # Tankers grouped by class and sorted by capacity, so that
+    #   eligible(q)            tankers that can carry q barrels      O(log n + k)
+    #   cheapest(o, r, q)      cheapest available eligible tanker    O(classes * log n)
+    #   allocate(t)/release(t) take a tanker out of / back into the pool  O(log n)
+    # Within a class the route cost differs only by the charter rate, so each class
+    # keeps a min-tree of (rate, tanker) over its capacity order.
+
+    def __init__(self, net):
+        self.net = net
+        self.by_capacity = np.argsort(net.tanker_capacity, kind="stable")
+        self.sorted_capacity = net.tanker_capacity[self.by_capacity]
+        self._classes = []
+        self._position = np.empty(len(net.tankers), dtype=np.int64)
+        for k in range(len(net.tanker_classes)):
+            members = self.by_capacity[net.tanker_class[self.by_capacity] == k]
+            self._position[members] = np.arange(len(members))
+            self._classes.append((net.tanker_capacity[members],
+                                  _MinTree(net.tanker_rate[members].tolist(), members.tolist())))
+        self.available = np.ones(len(net.tankers), dtype=bool)
+
+    def info(self, tanker):
+        # Tanker index or name -> (class, capacity, rate)
+        t = self.net.tanker_index[tanker] if isinstance(tanker, str) else tanker
+        return (self.net.tanker_classes[self.net.tanker_class[t]],
+                float(self.net.tanker_capacity[t]), float(self.net.tanker_rate[t]))
+
+    def count_eligible(self, quantity):
+        return len(self.sorted_capacity) - int(np.searchsorted(self.sorted_capacity, quantity, side="left"))
+
+    def eligible(self, quantity):
+        # Every tanker (available or not) with capacity >= quantity, smallest first
+        return self.by_capacity[np.searchsorted(self.sorted_capacity, quantity, side="left"):]
+
+    def cheapest(self, o, r, quantity):
+        # Available tanker with capacity >= quantity and the lowest cost on route
+        # (o, r); ties go to the lower tanker index. None if there is none.
+        net = self.net
+        best = (np.inf, -1)
+        for k, (capacity, tree) in enumerate(self._classes):
+            rate, t = tree.suffix_min(int(np.searchsorted(capacity, quantity, side="left")))
+            if t < 0:
+                continue
+            cost = rate + net.port_charge[o, k] + net.fuel_cost[k] * net.shipping_days[o, r] * 24
+            best = min(best, (cost, t))
+        return None if best[1] < 0 else best[1]
+
+    def allocate(self, t):
+        k = self.net.tanker_class[t]
+        self._classes[k][1].set(self._position[t], _MinTree._EMPTY)
+        self.available[t] = False
+
+    def release(self, t):
+        k = self.net.tanker_class[t]
+        self._classes[k][1].set(self._position[t], (float(self.net.tanker_rate[t]), int(t)))
+        self.available[t] = True
+
+
+def greedy_allocation(net, fleet=None):
+    # For each (port, destination) in order, take the cheapest tanker not yet used
+    # that can carry the destination's quantity. Returns {(o, r): t}; routes with no
+    # eligible tanker are left out.
+    fleet = fleet or FleetIndex(net)
+    allocation = {}
+    for o in range(len(net.ports)):
+        for r in range(len(net.refineries)):
+            t = fleet.cheapest(o, r, net.delivery[r])
+            if t is None:
+                continue
+            allocation[(o, r)] = t
+            fleet.allocate(t)
+    return allocation
+
+
+def allocation_start(routes, allocation):
+    # {(o, r): t} allocation -> 0/1 vector over the route columns, for a MIP start
+    start = np.zeros(routes.size)
+    if allocation:
+        pairs = np.array(list(allocation.keys()))
+        tankers = np.array(list(allocation.values()))
+        start[routes.var(pairs[:, 0], tankers, pairs[:, 1])] = 1.0
+    return start
+
+
+def constraint_families(net, routes):
+    # The three Model 3 constraint families as rectangular (rows x k) index and
+    # value arrays, each with its sense and right-hand side:
+    #   one_route_per_tanker   sum over (o, r) of x[o, t, r] <= 1         per tanker
+    #   capacity               sum over t of cap[t] * x[o, t, r] >= q[r]  per (o, r)
+    #   one_tanker_per_route   sum over t of x[o, t, r] == 1              per (o, r)
+    n_ports, n_tankers, n_dest = routes.shape
+    var = routes.grid()
+    per_tanker = var.transpose(1, 0, 2).reshape(n_tankers, n_ports * n_dest)
+    per_route = var.transpose(0, 2, 1).reshape(n_ports * n_dest, n_tankers)
+    return [
+        ("one_route_per_tanker", per_tanker, np.ones(per_tanker.shape), "L", np.ones(n_tankers)),
+        ("capacity", per_route, np.broadcast_to(net.tanker_capacity, per_route.shape), "G",
+         np.tile(net.delivery, n_ports)),
+        ("one_tanker_per_route", per_route, np.ones(per_route.shape), "E", np.ones(n_ports * n_dest)),
+    ]
+
+
+def add_rows(model, ind, val, sense, rhs):
+    # Add a whole constraint family to a cplex.Cplex in one call; returns its row range
+    import cplex
+
+    first = model.linear_constraints.get_num()
+    model.linear_constraints.add(
+        lin_expr=[cplex.SparsePair(ind=i, val=v) for i, v in zip(ind.tolist(), val.tolist())],
+        senses=sense * len(rhs),
+        rhs=np.asarray(rhs, dtype=float).tolist(),
+    )
+    return range(first, first + len(rhs))
+
+
+def build_shipping_model(net, routes, route_cost, name_variables=False, objective=None):
+    # Model 3 as a cplex.Cplex: one binary column per route, objective from
+    # objective_tensor() unless another ports x tankers x destinations tensor is
+    # given, and each constraint family added in a single call.
+    # Returns the model and {family: row range}.
+    import cplex
+
+    if objective is None:
+        objective = objective_tensor(net, route_cost)
+    model = cplex.Cplex()
+    model.variables.add(obj=np.asarray(objective, dtype=float).ravel().tolist(),
+                        types="B" * routes.size,
+                        names=routes.names if name_variables else None)
+    model.objective.set_sense(model.objective.sense.minimize)
+    rows = {family: add_rows(model, ind, val, sense, rhs)
+            for family, ind, val, sense, rhs in constraint_families(net, routes)}
+    return model, rows
+
+
+def build_shipping_lp(net, routes, route_cost, objective=None, extra_rows=(), name_variables=False, cache=None):
+    # Model 3 in the matrix form of solvers.MatrixProblem, for any solver backend:
+    # the same binary columns and constraint families as build_shipping_model(),
+    # plus any extra (ind, val, sense, rhs) row blocks. cache: a
+    # model_cache.ModelCache to reuse earlier builds on the same inputs.
+    if cache is not None:
+        extra_rows = list(extra_rows)
+        key = cache.key("shipping_lp", net, route_cost, objective, extra_rows, name_variables)
+        problem = cache.load_problem(key, MatrixProblem)
+        if problem is None:
+            problem = cache.store_problem(key, build_shipping_lp(net, routes, route_cost, objective, extra_rows,
+                                                                 name_variables))
+        return problem
+    if objective is None:
+        objective = objective_tensor(net, route_cost)
+    blocks = [(ind, val, sense, rhs) for _, ind, val, sense, rhs in constraint_families(net, routes)]
+    blocks += [(np.atleast_2d(ind), np.atleast_2d(val), sense, np.atleast_1d(rhs))
+               for ind, val, sense, rhs in extra_rows]
+
+    row_ind, col_ind, data, senses, rhs = [], [], [], [], []
+    first = 0
+    for ind, val, sense, block_rhs in blocks:
+        ind = np.asarray(ind)
+        row_ind.append(first + np.repeat(np.arange(ind.shape[0]), ind.shape[1]))
+        col_ind.append(ind.ravel())
+        data.append(np.broadcast_to(val, ind.shape).ravel())
+        senses.append(np.full(ind.shape[0], sense))
+        rhs.append(np.asarray(block_rhs, dtype=float))
+        first += ind.shape[0]
+    A = sp.csr_matrix((np.concatenate(data), (np.concatenate(row_ind), np.concatenate(col_ind))),
+                      shape=(first, routes.size))
+    return MatrixProblem("min", np.asarray(objective, dtype=float).ravel(), A,
+                         np.concatenate(senses), np.concatenate(rhs),
+                         np.zeros(routes.size), np.ones(routes.size), np.ones(routes.size, dtype=bool),
+                         names=routes.names if name_variables else None)
+
+
+def decode_routes(net, values, route_cost):
+    # Turn the flat solution vector into a table of the selected routes, ordered by
+    # tanker, then port, then destination. Only the nonzero cells are touched.
+    picked = np.asarray(values).reshape(route_cost.shape).transpose(1, 0, 2) > 0.5
+    t, o, r = np.nonzero(picked)
+    ports = np.array(net.ports)
+    tankers = np.array(net.tankers)
+    classes = np.array(net.tanker_classes)
+    refineries = np.array(net.refineries)
+    table = np.empty(len(t), dtype=[
+        ("port", ports.dtype), ("tanker", tankers.dtype), ("tanker_class", classes.dtype),
+        ("destination", refineries.dtype), ("quantity", float), ("cost", float),
+    ])
+    table["port"] = ports[o]
+    table["tanker"] = tankers[t]
+    table["tanker_class"] = classes[net.tanker_class[t]]
+    table["destination"] = refineries[r]
+    table["quantity"] = net.delivery[r]
+    table["cost"] = route_cost[o, t, r]
+    return table
+
+
+def solve_assignment(net, route_cost=None, objective=None, telemetry=None):
+    # Exact solver for Model 3 without side constraints. Every (port, destination)
+    # pair takes exactly one tanker and every tanker serves at most one pair, so the
+    # model is a rectangular assignment of pairs to tankers; with a single tanker the
+    # capacity row reduces to capacity[t] >= quantity[r], which only removes edges.
+    # Solved with SciPy's shortest augmenting path linear_sum_assignment.
+    telemetry = telemetry or NO_TELEMETRY
+    with telemetry.phase("build"):
+        if route_cost is None:
+            route_cost, _ = route_cost_tensor(net)
+        routes = RouteIndex(net)
+        n_ports, n_tankers, n_dest = routes.shape
+        if objective is None:
+            objective = objective_tensor(net, route_cost)
+
+        pair_cost = objective.transpose(0, 2, 1).reshape(n_ports * n_dest, n_tankers)
+        fits = net.tanker_capacity[None, :] >= np.tile(net.delivery, n_ports)[:, None]
+        telemetry.count(variables=routes.size, assignment_edges=int(fits.sum()))
+    with telemetry.phase("solve"):
+        # With more pairs than tankers, linear_sum_assignment matches every tanker
+        # and leaves pairs unserved instead of failing, so check the count
+        pairs = tankers = None
+        if n_tankers >= n_ports * n_dest:
+            try:
+                pairs, tankers = linear_sum_assignment(np.where(fits, pair_cost, np.inf))
+            except ValueError:
+                # Fewer usable tankers than port-destination pairs
+                pass
+        if pairs is None or len(pairs) != n_ports * n_dest:
+            telemetry.count(backend="assignment", solve_status="infeasible")
+            return None
+        telemetry.count(backend="assignment", solve_status="optimal",
+                        objective=float(pair_cost[pairs, tankers].sum()))
+
+    with telemetry.phase("extract"):
+        values = np.zeros(routes.size)
+        values[routes.var(pairs // n_dest, tankers, pairs % n_dest)] = 1.0
+        return ShippingSolution(float(pair_cost[pairs, tankers].sum()), values,
+                                decode_routes(net, values, route_cost), "assignment")
+
+
+def mip_start(net, routes, route_cost, objective=None, start="greedy"):
+    # MIP start for Model 3: "greedy" (greedy_allocation(), cheapest eligible tanker
+    # per port-destination pair), "assignment" (the exact assignment solution, which
+    # ignores side constraints) or a 0/1 vector over the route columns
+    if start is None:
+        return None
+    if isinstance(start, str):
+        if start == "greedy":
+            return allocation_start(routes, greedy_allocation(net))
+        if start == "assignment":
+            solution = solve_assignment(net, route_cost, objective)
+            return None if solution is None else solution.values
+        raise ValueError(f"unknown MIP start {start!r}")
+    return np.asarray(start, dtype=float)
+
+
+def solve_mip(net, route_cost=None, objective=None, extra_rows=(), name_variables=False, backend=None,
+              start=None, telemetry=None, cache=None):
+    # Model 3 as a MIP, plus any extra (ind, val, sense, rhs) row blocks, solved by
+    # a backend from solvers.BACKENDS (None picks one at run time), optionally
+    # warm-started from mip_start() and built through a model_cache.ModelCache
+    telemetry = telemetry or NO_TELEMETRY
+    with telemetry.phase("build"):
+        if route_cost is None:
+            route_cost, _ = route_cost_tensor(net)
+        routes = RouteIndex(net)
+        problem = build_shipping_lp(net, routes, route_cost, objective, extra_rows, name_variables, cache)
+        problem.start = mip_start(net, routes, route_cost, objective, start)
+        telemetry.problem(problem)
+    with telemetry.phase("solve"):
+        result = solve(problem, backend)
+        telemetry.solve_result(result)
+    if result.x is None:
+        return None
+    with telemetry.phase("extract"):
+        return ShippingSolution(result.objective, result.x, decode_routes(net, result.x, route_cost),
+                                "mip", result.status, result)
+
+
+def solve_shipping(net, extra_rows=(), engine="auto", name_variables=False, objective=None, backend=None,
+                   start=None, telemetry=None, cache=None):
+    # Solve Model 3. engine="auto" uses the assignment engine unless extra side
+    # constraints are given, in which case it falls back to the MIP, solved by the
+    # given solver backend and warm-started from start (see mip_start()).
+    # objective replaces the objective_tensor() coefficients when given.
+    # telemetry: a telemetry.RunTelemetry to time the build, solve and extract phases;
+    # cache: a model_cache.ModelCache for the MIP build
+    extra_rows = list(extra_rows)
+    if engine == "auto":
+        engine = "mip" if extra_rows else "assignment"
+    if engine == "assignment":
+        if extra_rows:
+            raise ValueError("the assignment engine cannot take extra side constraints")
+        return solve_assignment(net, objective=objective, telemetry=telemetry)
+    if engine == "mip":
+        return solve_mip(net, objective=objective, extra_rows=extra_rows, name_variables=name_variables,
+                         backend=backend, start=start, telemetry=telemetry, cache=cache)
+    raise ValueError(f"unknown engine {engine!r}")
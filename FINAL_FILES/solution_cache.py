@@ -0,0 +1,260 @@
+# LRU cache of solved MODEL 1 / MODEL 2 / Model 3 queries
+#
+# Planning tools ask the same (prices, demands, fleet) questions over and over.
+# A SolutionCache answers repeats without solving again:
+#   key       SHA-256 of the normalised inputs (see canonical()): only the
+#             NetworkData fields the model reads, every number as float64 (so 5
+#             and 5.0, or -0.0 and 0.0, give the same key), plus the model
+#             options. Entity names are left out of the profit key, since
+#             ProfitSolution is positional, and kept in the shipping key, since
+#             the routes table carries them. The solver backend name is part
+#             of the key: where several plans are optimal (Model 3 often has
+#             ties), backends return different ones.
+#   memory    an OrderedDict of at most max_entries solutions holding at most
+#             max_memory_bytes of arrays, least recently used first (a Model 3
+#             solution carries a dense 0/1 vector over every route, 30 MB at
+#             generate_network(1000)). A solution larger than the whole budget
+#             is kept on disk only. Cached arrays are made read-only, so a hit
+#             hands out the stored solution itself.
+#   disk      optional: one compressed <key>.npz per solution in directory,
+#             bounded by max_bytes with least-recently-used eviction (see
+#             model_cache.py). A disk hit is promoted to memory.
+# Counters: hits (memory), disk_hits, misses, evictions (memory) and
+# disk_evictions. Only optimal solutions and infeasible queries (as None) are
+# cached; a solve that stops on a limit or finds the model unbounded is returned
+# but not kept, so the next request solves again.
+#
+# default_solution_cache() is a memory-only cache (SOLUTION_CACHE_MEMORY_MB),
+# backed by SOLUTION_CACHE_DIR when that is set (size from SOLUTION_CACHE_MAX_MB).
+
+import contextlib
+import dataclasses
+import hashlib
+import json
+import os
+import struct
+from collections import OrderedDict
+
+import numpy as np
+
+from model_cache import DEFAULT_MAX_BYTES, ModelCache
+from profit_model import ProfitSolution, build_profit_lp, solve_profit_lp
+from shipping_model import ShippingSolution, solve_shipping
+from solvers import get_backend
+
+DEFAULT_ENTRIES = 256
+DEFAULT_MEMORY_BYTES = 256 << 20
+
+# NetworkData fields each model reads
+PROFIT_INPUTS = ("processing_cost", "crude_cost", "price", "capacity", "quota", "demand")
+SHIPPING_INPUTS = ("ports", "tankers", "tanker_classes", "refineries", "crude_cost", "tanker_class",
+                   "tanker_capacity", "tanker_rate", "port_charge", "fuel_cost", "shipping_days", "crude_port",
+                   "crude_class", "delivery")
+
+# Solve statuses whose answer is final and can be cached
+CACHED_STATUSES = ("optimal", "infeasible")
+
+_SOLUTIONS = {cls.__name__: cls for cls in (ProfitSolution, ShippingSolution)}
+_MISSING = object()
+
+
+def canonical(value):
+    # Canonical bytes of one normalised input: every number as float64 (so 5 and
+    # 5.0, or -0.0 and 0.0, agree), with type tags and shapes so different inputs
+    # cannot run together
+    if isinstance(value, np.ndarray) and value.dtype.kind in "iubf":
+        value = np.asarray(value, dtype=np.float64) + 0.0
+        return struct.pack(f"<cq{value.ndim}q", b"A", value.ndim, *value.shape) + value.tobytes()
+    if value is None:
+        return b"N"
+    if isinstance(value, str):
+        return b"S" + struct.pack("<q", len(value)) + value.encode()
+    if isinstance(value, (bool, np.bool_, int, float, np.integer, np.floating)):
+        return b"F" + struct.pack("<d", float(value) + 0.0)
+    if isinstance(value, (list, tuple)):
+        if all(isinstance(v, str) for v in value):
+            return canonical("\x1f".join(value) + f"\x1e{len(value)}")    # names as one string
+        return b"T" + struct.pack("<q", len(value)) + b"".join(canonical(v) for v in value)
+    value = np.asarray(value)
+    if value.dtype.kind in "iubf":
+        return canonical(value)
+    return canonical(repr(value.tolist()))
+
+
+def _nbytes(solution):
+    if solution is None:
+        return 0
+    return sum(getattr(solution, field.name).nbytes for field in dataclasses.fields(solution)
+               if isinstance(getattr(solution, field.name), np.ndarray))
+
+
+def _frozen(solution):
+    # solution with every array field read-only
+    if solution is not None:
+        for field in dataclasses.fields(solution):
+            value = getattr(solution, field.name)
+            if isinstance(value, np.ndarray):
+                value.setflags(write=False)
+    return solution
+
+
+class _SolveStatus:
+    # Telemetry stand-in that only keeps the solve status reported by the solver
+    status = None
+
+    def phase(self, name):
+        return contextlib.nullcontext(self)
+
+    def count(self, **counters):
+        self.status = counters.get("solve_status", self.status)
+
+    def problem(self, problem):
+        pass
+
+    def solve_result(self, result):
+        self.status = result.status
+
+
+class SolutionCache:
+    def __init__(self, max_entries=DEFAULT_ENTRIES, directory=None, max_bytes=DEFAULT_MAX_BYTES,
+                 max_memory_bytes=DEFAULT_MEMORY_BYTES):
+        self.max_entries = max_entries
+        self.max_memory_bytes = max_memory_bytes
+        self.disk = None if directory is None else ModelCache(directory, max_bytes)
+        self._memory = OrderedDict()    # key -> (solution, array bytes)
+        self.memory_bytes = 0
+        self.hits = self.disk_hits = self.misses = self.evictions = 0
+
+    @property
+    def disk_evictions(self):
+        return 0 if self.disk is None else self.disk.evictions
+
+    def key(self, kind, net, fields, *options):
+        # Hash of the model kind, the given NetworkData fields and the options
+        parts = [canonical(kind)]
+        parts.extend(canonical(name) + canonical(getattr(net, name)) for name in fields)
+        parts.extend(canonical(option) for option in options)
+        return hashlib.sha256(b"".join(parts)).hexdigest()[:32]
+
+    def get(self, key, default=None):
+        # The cached solution of key (None for a cached infeasible query), or
+        # default when the key is in neither tier
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+        solution = self._read(key)
+        if solution is not _MISSING:
+            self.disk_hits += 1
+            self._remember(key, solution)
+            return solution
+        self.misses += 1
+        return default
+
+    def put(self, key, solution):
+        solution = _frozen(solution)
+        self._remember(key, solution)
+        if self.disk is not None:
+            self._write(key, solution)
+        return solution
+
+    def _remember(self, key, solution):
+        size = _nbytes(solution)
+        if size > self.max_memory_bytes:
+            return
+        if key in self._memory:
+            self.memory_bytes -= self._memory.pop(key)[1]
+        self._memory[key] = (solution, size)
+        self.memory_bytes += size
+        while len(self._memory) > self.max_entries or self.memory_bytes > self.max_memory_bytes:
+            self.memory_bytes -= self._memory.popitem(last=False)[1][1]
+            self.evictions += 1
+
+    def _path(self, key):
+        return os.path.join(self.disk.directory, f"{key}.npz")
+
+    def _read(self, key):
+        if self.disk is None:
+            return _MISSING
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                meta = json.loads(data["__meta__"].item())
+                arrays = {name: data[name] for name in data.files if name != "__meta__"}
+        except FileNotFoundError:
+            return _MISSING
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        if meta["class"] is None:
+            return None
+        return _frozen(_SOLUTIONS[meta["class"]](**meta["values"], **arrays))
+
+    def _write(self, key, solution):
+        # Arrays go in as .npy members, scalars in the JSON header; backend details
+        # (ShippingSolution.result) are not kept
+        arrays, values = {}, {}
+        if solution is not None:
+            for field in dataclasses.fields(solution):
+                value = getattr(solution, field.name)
+                if isinstance(value, np.ndarray):
+                    arrays[field.name] = value
+                elif field.name != "result":
+                    values[field.name] = value
+        meta = {"class": None if solution is None else type(solution).__name__, "values": values}
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as fh:
+            np.savez_compressed(fh, __meta__=np.array(json.dumps(meta)), **arrays)
+        os.replace(tmp, path)
+        self.disk.evict()
+
+    def solve_profit(self, net, sense="max", backend=None):
+        # MODEL 1 (sense="max") or MODEL 2 (sense="min") through the cache
+        backend = get_backend(backend).name
+        key = self.key("profit", net, PROFIT_INPUTS, sense, backend)
+        solution = self.get(key, _MISSING)
+        if solution is _MISSING:
+            status = _SolveStatus()
+            solution = solve_profit_lp(build_profit_lp(net, sense), backend, telemetry=status)
+            if status.status in CACHED_STATUSES:
+                solution = self.put(key, solution)
+        return solution
+
+    def solve_shipping(self, net, engine="auto", objective=None, extra_rows=(), backend=None):
+        # Model 3 through the cache; see shipping_model.solve_shipping()
+        extra_rows = list(extra_rows)
+        backend = get_backend(backend).name
+        key = self.key("shipping", net, SHIPPING_INPUTS, engine, objective, extra_rows, backend)
+        solution = self.get(key, _MISSING)
+        if solution is _MISSING:
+            status = _SolveStatus()
+            solution = solve_shipping(net, extra_rows, engine, objective=objective, backend=backend,
+                                      telemetry=status)
+            if solution is not None:
+                solution = dataclasses.replace(solution, result=None)
+            if status.status in CACHED_STATUSES:
+                solution = self.put(key, solution)
+        return solution
+
+    def stats(self):
+        return {"entries": len(self._memory), "memory_bytes": self.memory_bytes, "hits": self.hits,
+                "disk_hits": self.disk_hits, "misses": self.misses, "evictions": self.evictions,
+                "disk_evictions": self.disk_evictions}
+
+    def clear(self):
+        self._memory.clear()
+        self.memory_bytes = 0
+        if self.disk is not None:
+            self.disk.clear()
+
+
+def default_solution_cache(max_entries=DEFAULT_ENTRIES):
+    # Memory-only SolutionCache (bounded by SOLUTION_CACHE_MEMORY_MB), with a disk
+    # tier in SOLUTION_CACHE_DIR (bounded by SOLUTION_CACHE_MAX_MB) when that is set
+    directory = os.environ.get("SOLUTION_CACHE_DIR") or None
+    max_mb = float(os.environ.get("SOLUTION_CACHE_MAX_MB", DEFAULT_MAX_BYTES / 2 ** 20))
+    memory_mb = float(os.environ.get("SOLUTION_CACHE_MEMORY_MB", DEFAULT_MEMORY_BYTES / 2 ** 20))
+    return SolutionCache(max_entries, directory, int(max_mb * 2 ** 20), int(memory_mb * 2 ** 20))
@@ -0,0 +1,576 @@
+# Solver backends for the matrix form of the models
+#
+# A problem is anything with the attributes of MatrixProblem (ProfitLP is one):
+#   sense            "max" or "min"
+#   c, offset        objective coefficients and constant
+#   A                scipy.sparse constraint matrix, one row per constraint
+#   senses, rhs      "L", "G" or "E" and the right-hand side per row
+#   lb, ub           variable bounds (ub may be np.inf)
+#   integer          bool mask of integer columns, or None for an LP
+#   names            optional column names (only CPLEX uses them)
+#   start            optional MIP start, a full or partial assignment of the columns
+#                    (NaN = not given); HiGHS cannot take one and warns that it
+#                    solves without it
+#   model_file       optional path of the problem saved as an MPS or SAV file
+#                    (see model_cache.py): backends that can read files load it
+#                    instead of the arrays when it exists, and write it when not
+#
+# Backends:
+#   cplex     IBM CPLEX through the cplex package
+#   highs     HiGHS through scipy.optimize.milp, no licence needed
+#   simplex   built-in dense two-phase simplex with depth-first branch-and-bound,
+#             for small instances when neither of the above is installed
+#
+# The backend is picked at run time: solve(problem, backend="highs"), or the
+# SOLVER_BACKEND environment variable, or "auto": HiGHS, or the built-in simplex
+# when SciPy has no milp. CPLEX is never picked automatically (the Community
+# Edition refuses models past 1000 rows or columns); ask for it by name.
+#
+# MIP backends that can observe the search record every improving incumbent as
+# (seconds into the solve, objective) in SolveResult.incumbents, which gives the
+# time to the first incumbent and to the best one with and without a MIP start.
+# Search statistics (iterations, nodes, MIP gap) come from backend.stats() and are
+# None where a backend does not report them.
+
+import importlib.util
+import os
+import time
+import warnings
+from dataclasses import dataclass
+
+import numpy as np
+import scipy.sparse as sp
+
+_TOL = 1e-9
+_INT_TOL = 1e-6
+_BLAND_AFTER = 50
+
+
+class SolverError(RuntimeError):
+    pass
+
+
+@dataclass
+class MatrixProblem:
+    sense: str
+    c: np.ndarray
+    A: sp.csr_matrix
+    senses: np.ndarray
+    rhs: np.ndarray
+    lb: np.ndarray
+    ub: np.ndarray
+    integer: np.ndarray = None
+    offset: float = 0.0
+    names: list = None
+    start: np.ndarray = None
+    model_file: str = None
+
+    @property
+    def num_vars(self):
+        return self.A.shape[1]
+
+    @property
+    def num_rows(self):
+        return self.A.shape[0]
+
+
+@dataclass
+class SolveResult:
+    status: str               # "optimal", "feasible", "infeasible", "unbounded",
+                              # "infeasible_or_unbounded" or "limit"
+    x: np.ndarray             # None unless a feasible point was found
+    objective: float
+    backend: str
+    build_time: float         # seconds spent loading the problem into the solver
+    solve_time: float
+    incumbents: list = None   # (seconds, objective) per improving incumbent, or None
+                              # when the backend does not report them
+    iterations: int = None    # simplex iterations, where the backend reports them
+    nodes: int = None         # branch-and-bound nodes of a MIP solve
+    mip_gap: float = None     # relative MIP gap at the end of a MIP solve
+
+    @property
+    def time_to_first_incumbent(self):
+        return self.incumbents[0][0] if self.incumbents else None
+
+    @property
+    def time_to_optimal(self):
+        return self.solve_time if self.status == "optimal" else None
+
+
+def _is_mip(problem):
+    integer = getattr(problem, "integer", None)
+    return integer is not None and bool(np.any(integer))
+
+
+def _start(problem):
+    # The problem's MIP start as a float vector with NaN for missing entries, or None
+    start = getattr(problem, "start", None)
+    if start is None or not _is_mip(problem):
+        return None
+    return np.asarray(start, dtype=float)
+
+
+def _row_bounds(problem):
+    # senses/rhs -> lower and upper row activity bounds
+    senses = np.asarray(problem.senses)
+    rhs = np.asarray(problem.rhs, dtype=float)
+    lower = np.where(senses == "L", -np.inf, rhs)
+    upper = np.where(senses == "G", np.inf, rhs)
+    return lower, upper
+
+
+class _IncumbentLog:
+    # CPLEX generic callback: note the time of every incumbent improvement
+    def __init__(self, incumbents, started):
+        self.incumbents = incumbents
+        self.started = started
+
+    def invoke(self, context):
+        from cplex.callbacks import Context
+
+        if not context.get_int_info(Context.info.feasible):
+            return
+        objective = context.get_double_info(Context.info.best_solution)
+        if not self.incumbents or objective != self.incumbents[-1][1]:
+            self.incumbents.append((time.perf_counter() - self.started, objective))
+
+
+def _quiet(model):
+    # Silence every CPLEX output stream; errors surface as exceptions
+    model.set_results_stream(None)
+    model.set_log_stream(None)
+    model.set_warning_stream(None)
+    model.set_error_stream(None)
+    return model
+
+
+def _add_start(model, problem):
+    import cplex
+
+    start = _start(problem)
+    if start is not None:
+        given = np.flatnonzero(~np.isnan(start))
+        model.MIP_starts.add(cplex.SparsePair(ind=given.tolist(), val=start[given].tolist()),
+                             model.MIP_starts.effort_level.auto)
+
+
+class CplexBackend:
+    name = "cplex"
+    reports_incumbents = True
+
+    def available(self):
+        return importlib.util.find_spec("cplex") is not None
+
+    def load(self, problem):
+        import cplex
+        from cplex.exceptions import CplexError
+
+        A = sp.csr_matrix(problem.A)
+        model = _quiet(cplex.Cplex())
+        try:
+            model.objective.set_sense(model.objective.sense.maximize if problem.sense == "max"
+                                      else model.objective.sense.minimize)
+            model.objective.set_offset(float(getattr(problem, "offset", 0.0)))
+            kwargs = {}
+            if _is_mip(problem):
+                binary = problem.integer & (problem.lb == 0) & (problem.ub == 1)
+                kwargs["types"] = "".join(np.where(binary, "B", np.where(problem.integer, "I", "C")))
+            if getattr(problem, "names", None) is not None:
+                kwargs["names"] = list(problem.names)
+            model.variables.add(obj=np.asarray(problem.c, dtype=float).tolist(),
+                                lb=np.asarray(problem.lb, dtype=float).tolist(),
+                                ub=np.where(np.isinf(problem.ub), cplex.infinity, problem.ub).tolist(),
+                                **kwargs)
+            ind, val, ptr = A.indices.tolist(), A.data.tolist(), A.indptr.tolist()
+            model.linear_constraints.add(
+                lin_expr=[cplex.SparsePair(ind=ind[s:e], val=val[s:e]) for s, e in zip(ptr[:-1], ptr[1:])],
+                senses="".join(problem.senses),
+                rhs=np.asarray(problem.rhs, dtype=float).tolist(),
+            )
+            _add_start(model, problem)
+        except CplexError as exc:
+            model.end()
+            raise SolverError(str(exc)) from exc
+        return model
+
+    def read(self, path, problem=None):
+        # A model saved by write(), plus the problem's MIP start if it has one
+        import cplex
+        from cplex.exceptions import CplexError
+
+        model = _quiet(cplex.Cplex())
+        try:
+            model.read(path)
+            _add_start(model, problem)
+        except CplexError as exc:
+            model.end()
+            raise SolverError(str(exc)) from exc
+        return model
+
+    def write(self, model, path):
+        # Save a loaded model; the format follows the extension (.lp, .mps, .sav).
+        # Written under a temporary name first, so readers never see half a file.
+        fmt = path.rsplit(".", 1)[-1]
+        tmp = f"{path}.{os.getpid()}.tmp"
+        model.write(tmp, filetype=fmt)
+        os.replace(tmp, path)
+
+    def solve(self, model, problem, incumbents):
+        from cplex.callbacks import Context
+        from cplex.exceptions import CplexError
+
+        if _is_mip(problem):
+            model.set_callback(_IncumbentLog(incumbents, time.perf_counter()), Context.id.global_progress)
+        try:
+            model.solve()
+        except CplexError as exc:
+            raise SolverError(str(exc)) from exc
+        solution = model.solution
+        status = solution.get_status()
+        optimal = {solution.status.optimal, solution.status.optimal_tolerance,
+                   solution.status.MIP_optimal, solution.status.optimal_populated_tolerance}
+        if solution.is_primal_feasible():
+            return ("optimal" if status in optimal else "feasible"), np.array(solution.get_values())
+        if status in (solution.status.unbounded, solution.status.MIP_unbounded):
+            return "unbounded", None
+        if status in (solution.status.infeasible, solution.status.MIP_infeasible):
+            return "infeasible", None
+        if status in (solution.status.infeasible_or_unbounded, solution.status.MIP_infeasible_or_unbounded):
+            return "infeasible_or_unbounded", None
+        return "limit", None
+
+    def stats(self, model, problem):
+        progress = model.solution.progress
+        if not _is_mip(problem):
+            return {"iterations": progress.get_num_iterations()}
+        stats = {"iterations": progress.get_num_iterations(), "nodes": progress.get_num_nodes_processed()}
+        if model.solution.is_primal_feasible():
+            stats["mip_gap"] = model.solution.MIP.get_mip_relative_gap()
+        return stats
+
+
+class HighsBackend:
+    # scipy.optimize.milp takes no MIP start (a given one is dropped with a
+    # warning) and reports no incumbents
+    name = "highs"
+    reports_incumbents = False
+
+    def available(self):
+        from scipy import optimize
+
+        return hasattr(optimize, "milp")
+
+    def load(self, problem):
+        from scipy.optimize import Bounds, LinearConstraint
+
+        lower, upper = _row_bounds(problem)
+        c = np.asarray(problem.c, dtype=float)
+        integrality = (np.asarray(problem.integer, dtype=np.uint8) if _is_mip(problem)
+                       else np.zeros(len(c), dtype=np.uint8))
+        return {
+            "c": -c if problem.sense == "max" else c,
+            "constraints": LinearConstraint(sp.csr_matrix(problem.A), lower, upper),
+            "bounds": Bounds(problem.lb, problem.ub),
+            "integrality": integrality,
+        }
+
+    def solve(self, model, problem, incumbents):
+        from scipy.optimize import milp
+
+        if _start(problem) is not None:
+            warnings.warn("the highs backend cannot take a MIP start; solving without it")
+        result = milp(**model)
+        model["result"] = result
+        if result.status == 0:
+            return "optimal", result.x
+        if result.x is not None:
+            return "feasible", result.x
+        if result.status == 4 and "unbounded or infeasible" in result.message:
+            return "infeasible_or_unbounded", None
+        return {2: "infeasible", 3: "unbounded"}.get(result.status, "limit"), None
+
+    def stats(self, model, problem):
+        # milp() reports no simplex iterations
+        result = model.get("result")
+        if result is None or not _is_mip(problem):
+            return {}
+        return {"nodes": getattr(result, "mip_node_count", None), "mip_gap": getattr(result, "mip_gap", None)}
+
+
+class SimplexBackend:
+    # Dense bounded-variable tableau simplex and depth-first branch-and-bound.
+    # Meant for small instances: problems with more than max_cells tableau cells
+    # are refused.
+    name = "simplex"
+    reports_incumbents = True
+    max_cells = 4_000_000
+    max_nodes = 10_000
+
+    def available(self):
+        return True
+
+    def load(self, problem):
+        lb = np.asarray(problem.lb, dtype=float)
+        if not np.isfinite(lb).all():
+            raise SolverError("the simplex backend needs finite lower bounds")
+        ub = np.asarray(problem.ub, dtype=float)
+        rows = problem.A.shape[0]
+        if (rows + 1) * (problem.A.shape[1] + 2 * rows + 1) > self.max_cells:
+            raise SolverError(f"problem too large for the simplex backend ({rows} rows)")
+        c = np.asarray(problem.c, dtype=float)
+        return {
+            "c": -c if problem.sense == "max" else c,
+            "A": sp.csr_matrix(problem.A).toarray(),
+            "senses": np.asarray(problem.senses),
+            "rhs": np.asarray(problem.rhs, dtype=float),
+            "lb": lb,
+            "ub": ub,
+            "integer": np.asarray(problem.integer, dtype=bool) if _is_mip(problem) else None,
+            "start": _start(problem),
+        }
+
+    def solve(self, model, problem, incumbents):
+        if model["integer"] is None:
+            return _solve_lp(model["c"], model["A"], model["senses"], model["rhs"], model["lb"], model["ub"])[:2]
+        # Report incumbents in the problem's own sense and with its offset
+        sign = -1.0 if problem.sense == "max" else 1.0
+        offset = float(getattr(problem, "offset", 0.0))
+        started = time.perf_counter()
+
+        def found(objective):
+            incumbents.append((time.perf_counter() - started, sign * objective + offset))
+
+        return _branch_and_bound(model, self.max_nodes, found)
+
+    def stats(self, model, problem):
+        return {"nodes": model["nodes"]} if "nodes" in model else {}
+
+
+def _pivot(T, i, j):
+    T[i] /= T[i, j]
+    factor = T[:, j].copy()
+    factor[i] = 0.0
+    T -= np.outer(factor, T[i])
+
+
+def _complement(T, j, upper, flipped):
+    # Replace column j's variable v by upper[j] - v, so it sits at 0 again
+    T[:, -1] -= T[:, j] * upper[j]
+    T[:, j] *= -1
+    flipped[j] = ~flipped[j]
+
+
+def _run_simplex(T, basis, n_cols, upper, flipped):
+    # Bounded-variable simplex over the first n_cols columns of tableau T, whose last
+    # row holds the reduced costs and -objective, and last column the basic values.
+    # Every column lives in [0, upper]; a variable that reaches its upper bound is
+    # complemented instead of being kept as a row.
+    m = T.shape[0] - 1
+    degenerate = 0
+    while True:
+        reduced = T[-1, :n_cols]
+        entering = np.flatnonzero(reduced < -_TOL)
+        if not len(entering):
+            return "optimal"
+        # Most negative reduced cost, or the lowest index (Bland) once the
+        # objective has stalled, which rules out cycling
+        j = entering[0] if degenerate > _BLAND_AFTER else entering[np.argmin(reduced[entering])]
+        column, values = T[:m, j], T[:m, -1]
+        # Basic variables fall to 0 where column > 0 and rise to their bound where < 0
+        ratios = np.full(m, np.inf)
+        down = column > _TOL
+        ratios[down] = values[down] / column[down]
+        up = (column < -_TOL) & np.isfinite(upper[basis])
+        ratios[up] = (upper[basis][up] - values[up]) / -column[up]
+        step = ratios.min(initial=np.inf)
+        degenerate = degenerate + 1 if min(step, upper[j]) <= _TOL else 0
+        if upper[j] <= step + _TOL:
+            if np.isinf(upper[j]):
+                return "unbounded"
+            _complement(T, j, upper, flipped)
+            continue
+        ties = np.flatnonzero(ratios <= step + _TOL)
+        i = ties[np.argmin(basis[ties])]
+        leaving, to_upper = basis[i], bool(up[i])
+        _pivot(T, i, j)
+        basis[i] = j
+        if to_upper:
+            _complement(T, leaving, upper, flipped)
+
+
+def _solve_lp(c, A, senses, rhs, lb, ub):
+    # min c @ x subject to A x (senses) rhs, lb <= x <= ub, by the two-phase method.
+    # Returns (status, x, objective).
+    n = len(c)
+    if (lb > ub + _TOL).any():
+        return "infeasible", None, np.inf
+    # Shift to y = x - lb, 0 <= y <= ub - lb
+    b = rhs - A @ lb
+    flip = b < 0
+    A = np.where(flip[:, None], -A, A)
+    b = np.abs(b)
+    senses = np.where(flip & (senses == "L"), "G", np.where(flip & (senses == "G"), "L", senses))
+
+    m = len(b)
+    slack_rows = np.flatnonzero(senses != "E")
+    art_rows = np.flatnonzero(senses != "L")
+    n_slack, n_art = len(slack_rows), len(art_rows)
+    art_start = n + n_slack
+    T = np.zeros((m + 1, art_start + n_art + 1))
+    T[:m, :n] = A
+    T[slack_rows, n + np.arange(n_slack)] = np.where(senses[slack_rows] == "L", 1.0, -1.0)
+    T[art_rows, art_start + np.arange(n_art)] = 1.0
+    T[:m, -1] = b
+    basis = np.empty(m, dtype=np.int64)
+    basis[slack_rows] = n + np.arange(n_slack)
+    basis[art_rows] = art_start + np.arange(n_art)
+    upper = np.concatenate([ub - lb, np.full(n_slack + n_art, np.inf)])
+    flipped = np.zeros(len(upper), dtype=bool)
+
+    # Phase I: minimise the sum of the artificials
+    T[-1, :art_start] = -T[art_rows, :art_start].sum(axis=0)
+    T[-1, -1] = -T[art_rows, -1].sum()
+    _run_simplex(T, basis, art_start, upper, flipped)
+    if -T[-1, -1] > 1e-7 * max(1.0, np.abs(b).max(initial=0.0)):
+        return "infeasible", None, np.inf
+
+    # Pivot the artificials left in the basis (at zero) out, dropping redundant rows
+    keep = np.ones(m + 1, dtype=bool)
+    for i in np.flatnonzero(basis >= art_start):
+        candidates = np.flatnonzero(np.abs(T[i, :art_start]) > _TOL)
+        if len(candidates):
+            _pivot(T, i, candidates[0])
+            basis[i] = candidates[0]
+        else:
+            keep[i] = False
+    T = np.delete(T[keep], np.s_[art_start:-1], axis=1)
+    basis = basis[keep[:-1]]
+    upper, flipped = upper[:art_start], flipped[:art_start]
+
+    # Phase II: the real objective, in the complemented columns
+    cost = np.concatenate([c, np.zeros(n_slack)])
+    cost = np.where(flipped, -cost, cost)
+    T[-1, :-1] = cost - cost[basis] @ T[:-1, :-1]
+    T[-1, -1] = -cost[basis] @ T[:-1, -1]
+    if _run_simplex(T, basis, art_start, upper, flipped) == "unbounded":
+        return "unbounded", None, -np.inf
+    v = np.zeros(art_start)
+    v[basis] = T[:-1, -1]
+    y = np.where(flipped, upper - v, v)
+    x = lb + y[:n]
+    return "optimal", x, float(c @ x)
+
+
+def _feasible_start(model):
+    # The MIP start if it is complete and satisfies every row, bound and integrality
+    start = model["start"]
+    if start is None or np.isnan(start).any():
+        return None
+    activity = model["A"] @ start
+    rows_ok = np.where(model["senses"] == "L", activity <= model["rhs"] + 1e-6,
+                       np.where(model["senses"] == "G", activity >= model["rhs"] - 1e-6,
+                                np.abs(activity - model["rhs"]) <= 1e-6))
+    integer = model["integer"]
+    if (rows_ok.all() and (start >= model["lb"] - 1e-6).all() and (start <= model["ub"] + 1e-6).all()
+            and (np.abs(start[integer] - np.round(start[integer])) <= _INT_TOL).all()):
+        return start.copy()
+    return None
+
+
+def _branch_and_bound(model, max_nodes, found):
+    # Depth-first, branching on the first fractional integer column. Each node keeps
+    # its parent's LP bound, so nodes the incumbent already beats are never solved.
+    # A feasible MIP start is the first incumbent. found(objective) is called for
+    # every improving incumbent.
+    integer = np.flatnonzero(model["integer"])
+    best_x, best_obj = None, np.inf
+    start = _feasible_start(model)
+    if start is not None:
+        best_x, best_obj = start, float(model["c"] @ start)
+        found(best_obj)
+    stack = [(-np.inf, model["lb"], model["ub"])]
+    nodes = model["nodes"] = 0     # the node count is reported by SimplexBackend.stats()
+    while stack:
+        bound, lb, ub = stack.pop()
+        cutoff = best_obj - _TOL * max(1.0, abs(best_obj))
+        if bound >= cutoff:
+            continue
+        if nodes >= max_nodes:
+            return ("feasible", best_x) if best_x is not None else ("limit", None)
+        nodes += 1
+        model["nodes"] = nodes
+        status, x, obj = _solve_lp(model["c"], model["A"], model["senses"], model["rhs"], lb, ub)
+        if status == "unbounded":
+            return "unbounded", None
+        if status != "optimal" or obj >= cutoff:
+            continue
+        values = x[integer]
+        distance = np.abs(values - np.round(values))
+        if distance.max(initial=0.0) <= _INT_TOL:
+            best_x, best_obj = x, obj
+            best_x[integer] = np.round(values)
+            found(obj)
+            continue
+        pick = int(np.argmax(distance > _INT_TOL))
+        k, value = integer[pick], values[pick]
+        down_ub, up_lb = ub.copy(), lb.copy()
+        down_ub[k] = np.floor(value)
+        up_lb[k] = np.ceil(value)
+        # Explore the branch on the nearer side first
+        branches = [(obj, lb, down_ub), (obj, up_lb, ub)]
+        if value - np.floor(value) > 0.5:
+            branches.reverse()
+        stack.extend(reversed(branches))
+    return ("optimal", best_x) if best_x is not None else ("infeasible", None)
+
+
+BACKENDS = {backend.name: backend for backend in (CplexBackend(), HighsBackend(), SimplexBackend())}
+AUTO_BACKENDS = ("highs", "simplex")    # "auto" takes the first one available
+
+
+def available_backends():
+    return [name for name, backend in BACKENDS.items() if backend.available()]
+
+
+def get_backend(name=None):
+    # Backend by name; None reads SOLVER_BACKEND and defaults to "auto"
+    if name is None:
+        name = os.environ.get("SOLVER_BACKEND", "auto")
+    if name == "auto":
+        return next(BACKENDS[auto] for auto in AUTO_BACKENDS if BACKENDS[auto].available())
+    if name not in BACKENDS:
+        raise ValueError(f"unknown solver backend {name!r}; choose from {sorted(BACKENDS)} or 'auto'")
+    backend = BACKENDS[name]
+    if not backend.available():
+        raise SolverError(f"solver backend {name!r} is not installed")
+    return backend
+
+
+def solve(problem, backend=None):
+    # Load (or read from problem.model_file) and solve problem with the chosen
+    # backend, timing both steps
+    backend = get_backend(backend)
+    start = time.perf_counter()
+    model_file = getattr(problem, "model_file", None) if hasattr(backend, "read") else None
+    if model_file is not None and os.path.exists(model_file):
+        model = backend.read(model_file, problem)
+    else:
+        model = backend.load(problem)
+        if model_file is not None:
+            backend.write(model, model_file)
+    try:
+        loaded = time.perf_counter()
+        incumbents = []
+        status, x = backend.solve(model, problem, incumbents)
+        done = time.perf_counter()
+        stats = backend.stats(model, problem)
+    finally:
+        if hasattr(model, "end"):
+            model.end()
+    objective = np.nan
+    if x is not None:
+        x = np.asarray(x, dtype=float)
+        objective = float(np.asarray(problem.c, dtype=float) @ x + getattr(problem, "offset", 0.0))
+    return SolveResult(status, x, objective, backend.name, loaded - start, done - loaded,
+                       incumbents if backend.reports_incumbents and _is_mip(problem) else None, **stats)
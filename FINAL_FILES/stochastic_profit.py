@@ -0,0 +1,210 @@
+# Two-stage stochastic profit model, solved by sample average approximation and an
+# L-shaped (Benders) decomposition
+#
+# First stage: purchase[c] of each crude, 0 <= purchase <= quota, at crude_cost.
+# Second stage, per demand scenario d: production x[p, r] = in_demand + excess with
+#     in_demand[p, r] <= d[p, r]                 (sold at the list price)
+#     excess >= 0                                (sold at 93% of the list price)
+#     sum_p x[p, r] <= capacity[r]
+#     sum(x) / C <= purchase[c]   for every c    (the 1:1 crude split)
+# at processing_cost per barrel. MODEL 1's hard "production >= demand" becomes the
+# discounted_revenue() kink here: with random demand a hard floor would make some
+# scenarios infeasible, and unmet demand is simply not sold.
+#
+# Given the purchases, a scenario's recourse only sees the crude budget
+# B = C * min(purchase). Its capacity rows (per refinery, inside the one budget
+# row) form a laminar family, so filling the most profitable barrels first is
+# optimal; recourse() does that for a whole block of scenarios at once and also
+# returns dQ/dB, the marginal value of crude. The master problem is a small LP
+# over the purchases and one value variable, cut by one optimality cut per
+# iteration, and is solved with any backend from solvers.py. Scenario blocks are
+# spread over a process pool, so the work per iteration grows linearly with the
+# number of scenarios.
+
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+import scipy.sparse as sp
+
+from demand_montecarlo import lognormal_demand
+from profit_model import DISCOUNT
+from solvers import MatrixProblem, SolverError, solve
+
+_EPS = 1e-9
+
+
+@dataclass
+class StochasticSolution:
+    objective: float          # SAA estimate of the expected profit
+    upper_bound: float        # master bound when the iterations stopped
+    purchase: np.ndarray      # first-stage purchase per crude
+    iterations: int
+    scenarios: int
+    solve_time: float
+
+
+def sample_demands(net, scenarios, cv=0.2, seed=0):
+    # SAA sample: (scenarios, products, refineries) lognormal demands around net.demand
+    return lognormal_demand(net.demand, cv)(np.random.default_rng(seed), scenarios)
+
+
+def _items(net):
+    # The second-stage "items" in decreasing unit margin: (margin, product,
+    # refinery, is_excess) for every in_demand and excess column worth producing
+    n_products, n_refineries = net.demand.shape
+    p, r = np.meshgrid(np.arange(n_products), np.arange(n_refineries), indexing="ij")
+    p, r = np.tile(p.ravel(), 2), np.tile(r.ravel(), 2)
+    excess = np.repeat([False, True], n_products * n_refineries)
+    margin = np.where(excess, DISCOUNT, 1.0) * net.price[p] - net.processing_cost
+    order = np.argsort(-margin, kind="stable")
+    order = order[margin[order] > 0]
+    return margin[order], p[order], r[order], excess[order]
+
+
+def recourse(net, demands, budget):
+    # Optimal second-stage profit of each scenario in demands (scenarios, P, R)
+    # with the same crude budget (barrels), and its derivative in the budget
+    margin, prod, ref, excess = _items(net)
+    n = len(demands)
+    left = np.full(n, float(budget))
+    capacity = np.tile(net.capacity, (n, 1))
+    value = np.zeros(n)
+    room = np.zeros((n, len(margin)), dtype=bool)
+    for k in range(len(margin)):
+        limit = np.inf if excess[k] else demands[:, prod[k], ref[k]]
+        take = np.minimum(np.minimum(limit, capacity[:, ref[k]]), left)
+        value += margin[k] * take
+        capacity[:, ref[k]] -= take
+        left -= take
+        room[:, k] = limit - take > _EPS
+    # The next barrel of crude goes to the best item that still has room in its
+    # refinery; it is worth nothing when the budget is not binding
+    room &= capacity[:, ref] > _EPS
+    marginal = np.where(room, margin, 0.0).max(axis=1, initial=0.0)
+    marginal[left > _EPS] = 0.0
+    return value, marginal
+
+
+# Per-process scenario block, set by _init_worker()
+_worker = {}
+
+
+def _init_worker(net, demands):
+    _worker.update(net=net, demands=demands)
+
+
+def _recourse_block(args):
+    block, budget = args
+    value, marginal = recourse(_worker["net"], _worker["demands"][block], budget)
+    return value.sum(), marginal.sum()
+
+
+def solve_stochastic(net, demands, backend=None, workers=1, blocks=None, tol=1e-7, max_iterations=200):
+    # L-shaped method on the SAA problem over the given demand scenarios.
+    # workers > 1 evaluates scenario blocks in a process pool.
+    start = time.perf_counter()
+    n_crudes = len(net.crudes)
+    n_scenarios = len(demands)
+    if n_scenarios < 1:
+        raise ValueError("solve_stochastic needs at least one demand scenario")
+    blocks = blocks or workers
+    if blocks < 1:
+        raise ValueError(f"blocks and workers must be positive, got {blocks}")
+    chunks = [slice(b, b + -(-n_scenarios // blocks)) for b in range(0, n_scenarios, -(-n_scenarios // blocks))]
+
+    # theta = average recourse: at least 0 (produce nothing), at most the recourse at
+    # the largest budget
+    budget_max = n_crudes * float(net.quota.min())
+    value_max, _ = recourse(net, demands, budget_max)
+    cut_rows, cut_rhs = [], []
+
+    pool = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(net, demands)) if workers > 1 else None
+    if pool is None:
+        _init_worker(net, demands)
+    evaluate = pool.map if pool is not None else map
+    best = (-np.inf, None)
+    upper = np.inf
+    iteration = 0
+    try:
+        for iteration in range(1, max_iterations + 1):
+            if not cut_rows:
+                # No cuts yet: start from the quota; theta <= value_max is the only bound
+                u, upper = np.array(net.quota, dtype=float), float(value_max.mean())
+            else:
+                # Master: max -crude_cost @ u + theta, 0 <= u <= quota, theta <= each cut
+                master = MatrixProblem(
+                    "max", np.append(-net.crude_cost, 1.0), sp.csr_matrix(np.array(cut_rows)),
+                    np.full(len(cut_rows), "L"), np.array(cut_rhs),
+                    np.zeros(n_crudes + 1), np.append(net.quota, value_max.mean()),
+                )
+                result = solve(master, backend)
+                if result.x is None:
+                    raise SolverError(f"stochastic master problem: {result.status}")
+                u, upper = result.x[:n_crudes], result.objective
+
+            budget = n_crudes * float(u.min())
+            totals = list(evaluate(_recourse_block, [(chunk, budget) for chunk in chunks]))
+            q = sum(total for total, _ in totals) / n_scenarios
+            slope = sum(total for _, total in totals) / n_scenarios
+            lower = float(-net.crude_cost @ u + q)
+            if lower > best[0]:
+                best = (lower, u.copy())
+            if upper - best[0] <= tol * max(1.0, abs(upper)):
+                break
+
+            # Cut: theta <= q + slope * C * (u[c*] - u_bar[c*]) at the crude c* with the
+            # smallest purchase (a supergradient of Q(C * min(u)))
+            c_min = int(np.argmin(u))
+            row = np.zeros(n_crudes + 1)
+            row[c_min] = -slope * n_crudes
+            row[-1] = 1.0
+            cut_rows.append(row)
+            cut_rhs.append(q - slope * n_crudes * u[c_min])
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    return StochasticSolution(best[0], upper, best[1], iteration, n_scenarios, time.perf_counter() - start)
+
+
+def build_extensive_form(net, demands):
+    # The same SAA problem as one monolithic LP, for checking and comparison.
+    # Columns: purchase (C), then per scenario in_demand and excess (P * R each).
+    n_scenarios = len(demands)
+    n_crudes = len(net.crudes)
+    n_products, n_refineries = net.demand.shape
+    cells = n_products * n_refineries
+    per = 2 * cells
+    n_vars = n_crudes + n_scenarios * per
+    col = n_crudes + np.arange(n_scenarios * per).reshape(n_scenarios, 2, n_products, n_refineries)
+
+    margin = np.concatenate([net.price - net.processing_cost, DISCOUNT * net.price - net.processing_cost])
+    c = np.concatenate([-net.crude_cost,
+                        np.tile(np.repeat(margin, n_refineries), n_scenarios) / n_scenarios])
+
+    # Capacity: one row per (scenario, refinery) over both column kinds and all products
+    cap_rows = np.broadcast_to(np.arange(n_scenarios)[:, None, None, None] * n_refineries
+                               + np.arange(n_refineries), col.shape)
+    # Crude split: one row per (scenario, crude): sum(x) / C - purchase[c] <= 0
+    base = n_scenarios * n_refineries
+    split_x_rows = base + np.arange(n_scenarios)[:, None] * n_crudes + np.arange(n_crudes)
+    split_cols = col.reshape(n_scenarios, -1)
+    rows = [cap_rows.ravel(),
+            np.repeat(split_x_rows, per, axis=1).ravel(),
+            split_x_rows.ravel()]
+    cols = [col.ravel(),
+            np.tile(split_cols, (1, n_crudes)).ravel(),
+            np.tile(np.arange(n_crudes), n_scenarios)]
+    vals = [np.ones(col.size), np.full(n_scenarios * n_crudes * per, 1.0 / n_crudes),
+            np.full(n_scenarios * n_crudes, -1.0)]
+    n_rows = base + n_scenarios * n_crudes
+    A = sp.csr_matrix((np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))), shape=(n_rows, n_vars))
+
+    ub = np.full(n_vars, np.inf)
+    ub[:n_crudes] = net.quota
+    ub[col[:, 0].ravel()] = demands.ravel()
+    return MatrixProblem("max", c, A, np.full(n_rows, "L"),
+                         np.concatenate([np.tile(net.capacity, n_scenarios), np.zeros(n_scenarios * n_crudes)]),
+                         np.zeros(n_vars), ub)
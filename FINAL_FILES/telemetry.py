@@ -0,0 +1,170 @@
+# Phase timers and counters for model runs
+#
+# A RunTelemetry collects, for one run of a model:
+#   phases     wall time (and call count) of every named phase: load, build, solve,
+#              extract, report, ...
+#   counters   problem size (variables, constraints, nonzeros, integer variables)
+#              and search statistics (iterations, nodes, MIP gap, status, objective)
+#   context    anything passed by the caller (sense, backend, instance, ...)
+# and emits it as one JSON record when the run is closed: appended as one line to a
+# log file, or passed as a dict to a callback. cProfile and tracemalloc capture can
+# be switched on per run; tracemalloc adds the peak memory of every phase.
+#
+# The defaults come from the environment, so the model scripts can be instrumented
+# without editing them:
+#   TELEMETRY_LOG          JSON Lines file to append records to (unset: no record)
+#   TELEMETRY_PROFILE      1 to add the top cProfile entries to the record
+#   TELEMETRY_TRACEMALLOC  1 to add peak memory per phase
+#
+# Library functions take telemetry=None and fall back to NO_TELEMETRY, whose
+# methods do nothing.
+
+import contextlib
+import cProfile
+import json
+import os
+import pstats
+import time
+import tracemalloc
+
+PROFILE_ENTRIES = 25
+
+
+def _env_flag(name):
+    return os.environ.get(name, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+class RunTelemetry:
+    def __init__(self, run, sink=None, profile=None, memory=None, **context):
+        # sink: path of a JSON Lines file, a callable taking the record, or None to
+        # read TELEMETRY_LOG. profile / memory: None reads the environment.
+        self.run = run
+        self.sink = os.environ.get("TELEMETRY_LOG") if sink is None else sink
+        self.context = context
+        self.phases = {}
+        self.counters = {}
+        self.record = None
+        self._started = time.perf_counter()
+        self._timestamp = time.strftime("%Y-%m-%dT%H:%M:%S")
+        self._profiler = None
+        if _env_flag("TELEMETRY_PROFILE") if profile is None else profile:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        self._memory = (_env_flag("TELEMETRY_TRACEMALLOC") if memory is None else memory) and not tracemalloc.is_tracing()
+        # Every phase resets the tracemalloc peak, so the peaks of the run and of the
+        # phases still open are kept here and folded in before each reset
+        self._run_peak = 0
+        self._open_peaks = []
+        if self._memory:
+            tracemalloc.start()
+
+    def _fold_peak(self):
+        peak = tracemalloc.get_traced_memory()[1]
+        self._run_peak = max(self._run_peak, peak)
+        for open_peak in self._open_peaks:
+            open_peak[0] = max(open_peak[0], peak)
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        # Time the block as phase `name`; repeated phases add up
+        if self._memory:
+            self._fold_peak()
+            tracemalloc.reset_peak()
+            self._open_peaks.append([0])
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            entry = self.phases.setdefault(name, {"seconds": 0.0, "calls": 0})
+            entry["seconds"] += time.perf_counter() - start
+            entry["calls"] += 1
+            if self._memory:
+                self._fold_peak()
+                entry["peak_bytes"] = max(entry.get("peak_bytes", 0), self._open_peaks.pop()[0])
+
+    def count(self, **counters):
+        self.counters.update(counters)
+
+    def problem(self, problem):
+        # Size counters of a matrix-form problem (solvers.MatrixProblem, ProfitLP)
+        integer = getattr(problem, "integer", None)
+        self.count(variables=int(problem.A.shape[1]), constraints=int(problem.A.shape[0]),
+                   nonzeros=int(problem.A.nnz), integer_variables=0 if integer is None else int(sum(integer)))
+
+    def solve_result(self, result):
+        # Search counters of a solvers.SolveResult
+        self.count(backend=result.backend, solve_status=result.status,
+                   objective=None if result.x is None else float(result.objective),
+                   load_seconds=result.build_time, solver_seconds=result.solve_time,
+                   iterations=result.iterations, nodes=result.nodes, mip_gap=result.mip_gap)
+
+    def close(self, error=None):
+        # Finish the run and emit its record (once); returns the record
+        if self.record is not None:
+            return self.record
+        record = {
+            "run": self.run,
+            "started": self._timestamp,
+            "seconds": time.perf_counter() - self._started,
+            "status": "ok" if error is None else "error",
+            "phases": self.phases,
+            "counters": self.counters,
+            "context": self.context,
+        }
+        if error is not None:
+            record["error"] = f"{type(error).__name__}: {error}"
+        if self._profiler is not None:
+            self._profiler.disable()
+            record["profile"] = _profile_summary(self._profiler)
+        if self._memory:
+            self._fold_peak()
+            record["peak_bytes"] = self._run_peak
+            tracemalloc.stop()
+        self.record = record
+        _emit(self.sink, record)
+        return record
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(exc)
+        return False
+
+
+def _profile_summary(profiler, entries=PROFILE_ENTRIES):
+    # The top cProfile entries by cumulative time
+    stats = pstats.Stats(profiler).stats
+    rows = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:entries]
+    return [{"function": f"{os.path.basename(filename)}:{line}({name})", "calls": calls,
+             "total_seconds": total, "cumulative_seconds": cumulative}
+            for (filename, line, name), (_, calls, total, cumulative, _) in rows]
+
+
+def _emit(sink, record):
+    if sink is None or sink == "":
+        return
+    if callable(sink):
+        sink(record)
+        return
+    with open(sink, "a", encoding="utf-8") as fh:
+        fh.write(json.dumps(record, default=str) + "\n")
+
+
+class _NoTelemetry:
+    # Stand-in when no telemetry is wanted
+
+    def phase(self, name):
+        return contextlib.nullcontext(self)
+
+    def count(self, **counters):
+        pass
+
+    def problem(self, problem):
+        pass
+
+    def solve_result(self, result):
+        pass
+
+
+NO_TELEMETRY = _NoTelemetry()
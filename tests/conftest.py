@@ -0,0 +1,6 @@
+# The models are flat modules in FINAL_FILES, next to the scripts that import them
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "FINAL_FILES"))
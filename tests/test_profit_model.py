@@ -0,0 +1,103 @@
+# MODEL 1 / MODEL 2: the closed form and ProfitModel against a fresh LP solve
+
+import dataclasses
+import os
+
+import numpy as np
+import pytest
+
+from conftest import ROOT
+from network_data import load_network
+from network_generator import generate_network
+from opl_data import load_dat, network_from_dat
+from profit_model import ProfitModel, build_profit_lp, solve_closed_form, solve_profit_lp
+from solvers import BACKENDS
+
+
+def _networks():
+    yield "network_data", load_network()
+    yield "Sample.dat", network_from_dat(load_dat(os.path.join(ROOT, "Sample.dat"), cache=False))
+    for seed in range(3):
+        yield f"generated-{seed}", generate_network(seed=seed)
+    yield "generated-x10", generate_network(10, seed=7)
+
+
+NETWORKS = dict(_networks())
+
+
+def _lp_solution(net, sense="max"):
+    return solve_profit_lp(build_profit_lp(net, sense), "highs")
+
+
+def _assert_same(solution, expected):
+    assert solution is not None and expected is not None
+    assert solution.objective == pytest.approx(expected.objective, rel=1e-9, abs=1e-6)
+
+
+@pytest.mark.parametrize("sense", ["max", "min"])
+@pytest.mark.parametrize("name", list(NETWORKS))
+def test_closed_form_matches_lp(name, sense):
+    net = NETWORKS[name]
+    solution = solve_closed_form(net, sense)
+    _assert_same(solution, _lp_solution(net, sense))
+    assert np.all(solution.production.sum(axis=0) <= net.capacity + 1e-6)
+    assert np.all(solution.production >= net.demand - 1e-6)
+
+
+def test_closed_form_infeasible_demand():
+    net = load_network()
+    net = dataclasses.replace(net, capacity=net.demand.sum(axis=0) - 1)
+    assert solve_closed_form(net) is None
+    assert _lp_solution(net) is None
+
+
+def _backends():
+    return [name for name in ("highs", "cplex") if BACKENDS[name].available()]
+
+
+@pytest.fixture(params=_backends())
+def model(request):
+    model = ProfitModel(load_network(), backend=request.param)
+    model.solve()
+    yield model
+    model.close()
+
+
+@pytest.mark.parametrize("update, values", [
+    ("update_prices", lambda net: {net.products[0]: net.price[0] * 1.5}),
+    ("update_prices", lambda net: net.price * 0.8),
+    ("update_crude_costs", lambda net: {net.crudes[1]: net.crude_cost[1] + 10}),
+    ("update_demands", lambda net: {(net.products[1], net.refineries[0]): net.demand[1, 0] * 1.2}),
+    ("update_capacity", lambda net: net.capacity * 1.1),
+    ("update_quota", lambda net: {net.crudes[0]: net.quota[0] * 1.2}),
+])
+def test_update_matches_rebuild(model, update, values):
+    getattr(model, update)(values(model.net))
+    _assert_same(model.solve(), _lp_solution(model.net))
+
+
+def test_updates_accumulate(model):
+    net = model.net
+    model.update_prices({net.products[0]: net.price[0] + 20})
+    model.update_demands(net.demand * 1.05)
+    model.update_quota(net.quota * 0.9)
+    _assert_same(model.solve(), _lp_solution(model.net))
+    assert model.net.price[0] == net.price[0] + 20
+
+
+def test_update_keeps_caller_network(model):
+    price = model.net.price.copy()
+    net = model.net
+    model.update_prices(price * 2)
+    np.testing.assert_array_equal(net.price, price)
+
+
+def test_update_rejects_wrong_shape(model):
+    with pytest.raises(ValueError):
+        model.update_capacity(np.ones(len(model.net.refineries) + 1))
+
+
+def test_status_of_unsolved_update(model):
+    model.update_capacity(np.ones(len(model.net.refineries)))
+    assert model.solve() is None
+    assert model.status == "infeasible"
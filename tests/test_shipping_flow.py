@@ -0,0 +1,33 @@
+# Split deliveries: the repaired min-cost flow against the trip limits and the assignment
+
+import numpy as np
+import pytest
+
+from network_data import load_network
+from shipping_flow import min_cost_flow, solve_split_deliveries
+from shipping_model import route_cost_tensor, solve_assignment
+
+
+def test_min_cost_flow_transportation():
+    cost = np.array([[1.0, 4.0], [2.0, np.inf]])
+    flow, _ = min_cost_flow(cost, [5.0, 3.0], [3.0, 4.0])
+    np.testing.assert_allclose(flow, [[1.0, 4.0], [2.0, 0.0]])
+    assert min_cost_flow(cost, [1.0, 1.0], [3.0, 4.0]) is None
+
+
+@pytest.mark.parametrize("max_trips", [1, 2, 3])
+def test_split_plan_is_valid(max_trips):
+    net = load_network()
+    route_cost, _ = route_cost_tensor(net)
+    split = solve_split_deliveries(net, route_cost, max_trips)
+    assignment = solve_assignment(net, route_cost, objective=route_cost)
+    assert split.trips.sum(axis=(0, 2)).max() <= max_trips
+    delivered = split.shipped.sum(axis=1)
+    np.testing.assert_allclose(delivered, np.broadcast_to(net.delivery, delivered.shape))
+    assert np.all(split.shipped <= split.trips * net.tanker_capacity[None, :, None] + 1e-6)
+    assert split.trip_cost == pytest.approx(split.objective)
+    assert split.trip_cost <= assignment.objective + 1e-6
+
+
+def test_no_trips():
+    assert solve_split_deliveries(load_network(), max_trips=0) is None
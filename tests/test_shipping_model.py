@@ -0,0 +1,58 @@
+# Model 3: the assignment engine against the MIP
+
+import dataclasses
+
+import numpy as np
+import pytest
+
+from network_data import load_network
+from network_generator import generate_network
+from shipping_model import RouteIndex, route_cost_tensor, solve_assignment, solve_mip, solve_shipping
+
+NETWORKS = {
+    "network_data": load_network(),
+    "generated-0": generate_network(seed=0),
+    "generated-1": generate_network(seed=1, tankers=40),
+}
+
+
+def _check_plan(net, solution):
+    # One tanker per (port, destination) pair, at most one pair per tanker, and
+    # every tanker large enough for its delivery
+    picked = solution.values.reshape(RouteIndex(net).shape) > 0.5
+    assert np.all(picked.sum(axis=1) == 1)
+    assert np.all(picked.sum(axis=(0, 2)) <= 1)
+    o, t, r = np.nonzero(picked)
+    assert np.all(net.tanker_capacity[t] >= net.delivery[r])
+
+
+@pytest.mark.parametrize("objective", ["default", "route_cost"])
+@pytest.mark.parametrize("name", list(NETWORKS))
+def test_assignment_matches_mip(name, objective):
+    net = NETWORKS[name]
+    route_cost, _ = route_cost_tensor(net)
+    objective = route_cost if objective == "route_cost" else None
+    assignment = solve_assignment(net, route_cost, objective)
+    mip = solve_mip(net, route_cost, objective, backend="highs")
+    assert assignment is not None and mip is not None
+    assert assignment.objective == pytest.approx(mip.objective, rel=1e-9, abs=1e-6)
+    _check_plan(net, assignment)
+    _check_plan(net, mip)
+
+
+def test_too_few_tankers_is_infeasible():
+    net = load_network()
+    n_tankers = len(net.ports) * len(net.refineries) - 1
+    net = dataclasses.replace(
+        net, tankers=net.tankers[:n_tankers], tanker_class=net.tanker_class[:n_tankers],
+        tanker_capacity=net.tanker_capacity[:n_tankers], tanker_rate=net.tanker_rate[:n_tankers])
+    assert solve_assignment(net) is None
+    assert solve_mip(net, backend="highs") is None
+
+
+def test_auto_engine():
+    net = load_network()
+    assert solve_shipping(net).engine == "assignment"
+    with pytest.raises(ValueError):
+        solve_shipping(net, extra_rows=[(np.zeros((1, 1), dtype=np.int64), 1.0, "L", [1.0])],
+                       engine="assignment")
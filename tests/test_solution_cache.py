@@ -0,0 +1,36 @@
+# SolutionCache: what is kept, and under which key
+
+import dataclasses
+
+import numpy as np
+
+import solvers
+from network_data import load_network
+from solution_cache import SolutionCache
+
+
+def test_infeasible_is_cached():
+    net = load_network()
+    net = dataclasses.replace(net, capacity=np.ones_like(net.capacity))
+    cache = SolutionCache()
+    assert cache.solve_profit(net, backend="highs") is None
+    assert cache.solve_profit(net, backend="highs") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_limit_is_not_cached(monkeypatch):
+    monkeypatch.setattr(solvers.HighsBackend, "solve", lambda self, model, problem, incumbents: ("limit", None))
+    cache = SolutionCache()
+    assert cache.solve_profit(load_network(), backend="highs") is None
+    assert cache.solve_profit(load_network(), backend="highs") is None
+    assert (cache.hits, cache.misses, len(cache._memory)) == (0, 2, 0)
+
+
+def test_backend_is_part_of_the_key():
+    net = load_network()
+    cache = SolutionCache()
+    cache.solve_shipping(net, engine="mip", backend="highs")
+    cache.solve_shipping(net, engine="mip", backend="simplex")
+    assert (cache.hits, cache.misses) == (0, 2)
+    cache.solve_shipping(net, engine="mip", backend="highs")
+    assert cache.hits == 1